@@ -7,20 +7,255 @@ import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
+import copy
 import json
+import hashlib
 import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
 from scipy import stats
+from scipy.special import ndtr, ndtri
 from scipy.optimize import minimize
 
+from cache import TTLCache
+from iv_paths import next_power_of_two, simulate_iv_steps
+from iv_window import RollingIVWindow
+from ou_calibration import OUCalibrator
+from portfolio_risk import PortfolioRiskEngine, leg_arrays
+from pricing_engine import DAYS_PER_YEAR, black_scholes, black_scholes_price, implied_volatility
+from vol_surface import SVISurface, SurfaceCalibrator
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Bounds applied to simulated IV paths
+IV_FLOOR = 10.0
+IV_CAP = 150.0
+
+# Number of Monte Carlo paths simulated per vectorized block (a power of two for Sobol balance)
+MC_CHUNK_SIZE = 2**18
+
+# Paths per process-pool shard of the sharded projection (a power of two for Sobol balance)
+MC_SHARD_SIZE = 2**18
+
+# Batching used to estimate Monte Carlo standard errors and apply the target_stderr stopping rule
+MC_ERROR_BATCHES = 8
+MC_MIN_BATCHES = 4
+MC_BATCH_SIZE = 2**13
+MC_MAX_SIMULATIONS = 2**20
+
+# Variance reduction techniques selectable on the analyzer
+VARIANCE_REDUCTION_METHODS = (None, 'antithetic', 'sobol', 'control_variate')
+
+# Monte Carlo estimates reported with standard errors
+MC_ESTIMATES = ('mean', '5th_percentile', 'median', '95th_percentile')
+
+# Estimates whose standard error each variance reduction technique lowers (the target_stderr stopping rule)
+VARIANCE_REDUCED_ESTIMATES = {
+    None: MC_ESTIMATES,
+    'antithetic': ('mean', 'median'),
+    'sobol': ('mean', 'median'),
+    'control_variate': ('mean',),
+}
+
+# Horizons (days) and percentiles of the forward IV fan
+FAN_HORIZONS = (7, 14, 30, 45, 60, 90)
+FAN_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Resolution (vol points) of the streaming IV histograms
+HISTOGRAM_BIN_WIDTH = 0.01
+
+# Expiry (days) used for headline skew metrics and expiries reported in the skew term structure
+SKEW_TARGET_DTE = 30
+SKEW_TERM_DTES = (7, 14, 30, 45, 60, 90)
+
+# Greeks reported for priced option legs and structures
+GREEK_NAMES = ('delta', 'gamma', 'vega', 'theta', 'vanna')
+
+# Stress grid: relative spot moves, parallel IV shocks (vol points) and days of decay applied to every leg
+STRESS_SPOT_MOVES = np.linspace(-0.4, 0.4, 41)
+STRESS_VOL_SHOCKS = np.linspace(-30.0, 30.0, 21)
+STRESS_HORIZON_DAYS = 1.0
+STRESS_MIN_IV = 1.0
+
+# Legs of the recommended structures per 1 ETH: (option_type, strike as a fraction of spot, dte, quantity)
+POSITION_STRUCTURES = {
+    'short_put_spread': (('put', 0.94, 31, -1), ('put', 0.89, 31, 1)),
+    'short_straddle': (('call', 1.0, 31, -1), ('put', 1.0, 31, -1)),
+    'calendar_spread': (('call', 1.0, 14, -1), ('call', 1.0, 31, 1)),
+    'protective_put': (('put', 0.89, 45, 1),)
+}
+
+# Entry rules of the recommended structures: every listed feature must exceed its threshold
+ENTRY_THRESHOLDS = {
+    'short_put_spread': {'vrp': 3.0, 'skew': 8.0, 'ivr': 0.3},
+    'short_straddle': {'vrp': 5.0, 'ivr': 0.35},
+    'calendar_spread': {},
+    'protective_put': {}
+}
+
+# Assessment confidence is HIGH when every listed feature exceeds its threshold (abs_vrp is |VRP|)
+CONFIDENCE_THRESHOLDS = {'ivr': 0.3, 'abs_vrp': 3.0}
+
+def entry_signals(features: Dict[str, np.ndarray], thresholds: Dict[str, Dict[str, float]] = ENTRY_THRESHOLDS) -> Dict[str, np.ndarray]:
+    """Boolean entry mask per strategy over aligned feature columns (missing values never enter)"""
+    columns = {name: np.asarray(values, dtype=float) for name, values in features.items()}
+    n = len(next(iter(columns.values())))
+    signals = {}
+    for strategy, rules in thresholds.items():
+        mask = np.ones(n, dtype=bool)
+        for feature, threshold in rules.items():
+            mask &= columns[feature] > threshold
+        signals[strategy] = mask
+    return signals
+
+def meets_thresholds(features: Dict[str, Optional[float]], rules: Dict[str, float]) -> bool:
+    """Scalar form of entry_signals: whether every listed feature exceeds its threshold"""
+    return all(features.get(feature) is not None and features[feature] > threshold
+               for feature, threshold in rules.items())
+
+def structure_legs(strategy: str, eth_price: float) -> List[Dict]:
+    """Legs of a recommended structure struck off the given spot"""
+    return [{'option_type': option_type, 'strike': eth_price * moneyness, 'dte': dte, 'quantity': quantity}
+            for option_type, moneyness, dte, quantity in POSITION_STRUCTURES[strategy]]
+
+# Warm-started SVI calibration shared across analyzer instances
+surface_calibrator = SurfaceCalibrator()
+
+# Forward projections shared across analyzer instances, keyed on the simulation inputs
+projection_cache = TTLCache(maxsize=256, ttl=300)
+
+# Trailing IV observations fed from stored market data, for IV rank and percentile
+iv_history = RollingIVWindow()
+
+# Mean-reversion parameters of IV, calibrated incrementally from the same stored observations
+ou_calibrator = OUCalibrator()
+
+# Full analyses keyed on the market snapshot hash and analyzer configuration
+analysis_memo = TTLCache(maxsize=16, ttl=900)
+
+# Snapshot fields that change on every collection or read without changing the market state
+VOLATILE_SNAPSHOT_KEYS = ('timestamp', 'source_status', 'freshness', 'collection_ms', 'snapshot_age_seconds')
+
+def snapshot_hash(market_data: Dict) -> str:
+    """Content hash of a market data snapshot, ignoring volatile fields"""
+    normalized = {k: v for k, v in market_data.items() if k not in VOLATILE_SNAPSHOT_KEYS}
+    payload = json.dumps(normalized, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class IVHistogram:
+    """Streaming distribution of bounded IVs: fixed-width bin counts plus running moments
+    
+    Memory is constant in the number of samples, and histograms built from
+    separate batches of paths merge exactly.
+    """
+    
+    def __init__(self, bin_width: float = HISTOGRAM_BIN_WIDTH):
+        self.bin_width = bin_width
+        self.counts = np.zeros(int(np.ceil((IV_CAP - IV_FLOOR) / bin_width)) + 1, dtype=np.int64)
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of squared deviations from the mean
+    
+    def add(self, ivs: np.ndarray):
+        """Add a batch of IV samples"""
+        if len(ivs) == 0:
+            return
+        bins = ((ivs - IV_FLOOR) / self.bin_width).astype(np.int64)
+        np.clip(bins, 0, len(self.counts) - 1, out=bins)
+        self.counts += np.bincount(bins, minlength=len(self.counts))
+        
+        batch_mean = float(np.mean(ivs))
+        self._merge_moments(len(ivs), batch_mean, float(np.sum((ivs - batch_mean)**2)))
+    
+    def merge(self, other: 'IVHistogram'):
+        """Merge another histogram with the same binning into this one"""
+        self.counts += other.counts
+        self._merge_moments(other.count, other.mean, other.m2)
+    
+    def _merge_moments(self, count: int, mean: float, m2: float):
+        """Combine running moments with those of another sample (Chan et al.)"""
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta**2 * self.count * count / total
+        self.count = total
+    
+    @property
+    def std(self) -> float:
+        return float(np.sqrt(self.m2 / self.count)) if self.count else float('nan')
+    
+    def percentiles(self, q) -> np.ndarray:
+        """Percentiles (0-100) interpolated linearly within bins"""
+        cumulative = np.cumsum(self.counts)
+        targets = np.asarray(q, dtype=float) / 100 * self.count
+        bins = np.searchsorted(cumulative, targets, side='left')
+        np.clip(bins, 0, len(self.counts) - 1, out=bins)
+        
+        below = np.where(bins > 0, cumulative[bins - 1], 0)
+        in_bin = np.maximum(self.counts[bins], 1)
+        fraction = np.clip((targets - below) / in_bin, 0, 1)
+        return np.clip(IV_FLOOR + (bins + fraction) * self.bin_width, IV_FLOOR, IV_CAP)
+
+# Forward projection methods
+PROJECTION_METHODS = ('simulation', 'analytic', 'auto')
+
+# Probability of touching the IV bounds above which the analytic projection is not trusted
+BOUND_PROBABILITY_TOLERANCE = 1e-3
+
+# Standard normal quantile of the 95th percentile
+Z_95 = float(ndtri(0.95))
+
+def shard_sizes(n_simulations: int, sobol: bool = False) -> List[int]:
+    """Split paths into MC_SHARD_SIZE shards plus the remainder, which Sobol splits into its binary powers of two"""
+    full, remainder = divmod(n_simulations, MC_SHARD_SIZE)
+    sizes = [MC_SHARD_SIZE] * full
+    if remainder and sobol:
+        sizes += [1 << bit for bit in reversed(range(remainder.bit_length())) if remainder >> bit & 1]
+    elif remainder:
+        sizes.append(remainder)
+    return sizes
+
+def _simulate_iv_shard(model_params: Dict, current_iv: float, n_paths: int, horizons: List[int],
+                       seed_sequence: np.random.SeedSequence) -> List[IVHistogram]:
+    """Process-pool worker: simulate one shard of paths with its own random stream"""
+    analyzer = ETHOptionsAnalyzer(variance_reduction=model_params['variance_reduction'])
+    analyzer.long_term_iv_mean = model_params['long_term_iv_mean']
+    analyzer.mean_reversion_speed = model_params['mean_reversion_speed']
+    analyzer.iv_volatility = model_params['iv_volatility']
+    return analyzer._simulate_iv_histograms(current_iv, n_paths, horizons, np.random.default_rng(seed_sequence))
+
 class ETHOptionsAnalyzer:
-    def __init__(self):
-        """Initialize the analyzer with default parameters"""
-        self.long_term_iv_mean = 55.0
-        self.mean_reversion_speed = 0.5
-        self.iv_volatility = 15.0
+    def __init__(self, projection_method: str = 'simulation', variance_reduction: Optional[str] = None,
+                 use_projection_cache: bool = True, iv_quantization: Optional[float] = None,
+                 iv_window: Optional[RollingIVWindow] = None, iv_calibrator: Optional[OUCalibrator] = None):
+        """Initialize the analyzer with default parameters
+        
+        iv_quantization rounds current IV to a multiple of the given step (in
+        vol points) before projecting, so nearby snapshots share cache entries.
+        iv_window is the IV history used for rank and percentile, and
+        iv_calibrator supplies the IV mean-reversion parameters; both default
+        to the shared instances fed from stored market data.
+        """
+        if projection_method not in PROJECTION_METHODS:
+            raise ValueError(f"projection_method must be one of {PROJECTION_METHODS}")
+        if variance_reduction not in VARIANCE_REDUCTION_METHODS:
+            raise ValueError(f"variance_reduction must be one of {VARIANCE_REDUCTION_METHODS}")
+        
+        self.ou_calibration = (iv_calibrator if iv_calibrator is not None else ou_calibrator).parameters()
+        self.long_term_iv_mean = self.ou_calibration['long_term_iv_mean']
+        self.mean_reversion_speed = self.ou_calibration['mean_reversion_speed']
+        self.iv_volatility = self.ou_calibration['iv_volatility']
+        self.risk_free_rate = 0.0
+        self.projection_method = projection_method
+        self.surface = None  # Fitted SVISurface of the latest snapshot, if it carried an option chain
+        self.variance_reduction = variance_reduction
+        self.use_projection_cache = use_projection_cache
+        self.iv_quantization = iv_quantization
+        self.iv_window = iv_window if iv_window is not None else iv_history
+        self.risk_engine = PortfolioRiskEngine()
         
     def calculate_ivr(self, current_iv: float, historical_ivs: List[float]) -> float:
         """Calculate Implied Volatility Rank"""
@@ -51,51 +286,372 @@ class ETHOptionsAnalyzer:
             return None
         return implied_vol - realized_vol
     
-    def calculate_skew_metrics(self, current_iv: float) -> Dict:
-        """Calculate volatility skew metrics (simulated based on typical patterns)"""
-        # In production, this would use actual strike-level IV data
-        # Simulating typical ETH skew patterns
+    def calculate_chain_ivs(self, option_chain: List[Dict]) -> Dict:
+        """Solve strike-level implied volatilities for a chain of option quotes
+        
+        Quotes carry strike, dte (days), option_type ('call'/'put'), price (USD)
+        and underlying_price (the expiry's forward). IVs are returned in %.
+        """
+        strikes = np.array([q['strike'] for q in option_chain], dtype=float)
+        dtes = np.array([q['dte'] for q in option_chain], dtype=float)
+        forwards = np.array([q['underlying_price'] for q in option_chain], dtype=float)
+        prices = np.array([q['price'] for q in option_chain], dtype=float)
+        is_call = np.array([q['option_type'] == 'call' for q in option_chain])
         
-        # ETH typically shows put skew
-        put_call_skew = 13.0  # 25D put vs call
-        atm_skew = 5.0        # 10D put vs call relative to ATM
-        smile_curvature = 4.7  # Standard deviation across strikes
+        solved = implied_volatility(prices, forwards, strikes, dtes / DAYS_PER_YEAR, 0.0, is_call)
         
         return {
-            'put_call_skew': put_call_skew,
-            'atm_skew': atm_skew,
-            'smile_curvature': smile_curvature
+            'strike': strikes,
+            'dte': dtes,
+            'forward': forwards,
+            'is_call': is_call,
+            'iv': solved['iv'] * 100,
+            'converged': solved['converged'],
+            'arbitrage_violation': solved['arbitrage_violation'],
+            'n_quotes': len(option_chain),
+            'n_converged': int(solved['converged'].sum()),
+            'n_arbitrage_violations': int(solved['arbitrage_violation'].sum())
         }
     
-    def monte_carlo_iv_simulation(self, current_iv: float, n_simulations: int = 10000, days: int = 30) -> Dict:
-        """Monte Carlo simulation for forward IV projections"""
-        np.random.seed(42)  # For reproducibility
+    def calculate_skew_metrics(self, current_iv: float, surface: Optional[SVISurface] = None) -> Dict:
+        """Calculate volatility skew metrics
         
-        dt = 1/252  # Daily time step
-        simulated_ivs = []
-        
-        for _ in range(n_simulations):
-            iv = current_iv
-            for day in range(days):
-                # Mean-reverting process with stochastic component
-                dW = np.random.normal(0, np.sqrt(dt))
-                div = self.mean_reversion_speed * (self.long_term_iv_mean - iv) * dt + self.iv_volatility * dW
-                iv += div
-                iv = max(10, min(150, iv))  # Bound IV between reasonable limits
+        With a fitted surface, reads the SKEW_TARGET_DTE smile: put_call_skew is
+        25-delta put minus call IV, atm_skew is 90% minus 110% moneyness IV and
+        smile_curvature is the standard deviation of IVs between 80% and 120%
+        moneyness. Without one, falls back to typical ETH skew levels.
+        """
+        if surface is None:
+            # Simulating typical ETH skew patterns when no strike-level IV data is available
+            return {
+                'put_call_skew': 13.0,   # 25D put vs call
+                'atm_skew': 5.0,         # Near-the-money put vs call
+                'smile_curvature': 4.7,  # Standard deviation across strikes
+                'source': 'simulated'
+            }
+        
+        grid = surface.grid
+        put_25d = grid.implied_vol(grid.log_moneyness_for_delta(0.25, SKEW_TARGET_DTE, 'put'), SKEW_TARGET_DTE)
+        call_25d = grid.implied_vol(grid.log_moneyness_for_delta(0.25, SKEW_TARGET_DTE, 'call'), SKEW_TARGET_DTE)
+        near_put, near_call = grid.implied_vol(np.log([0.9, 1.1]), SKEW_TARGET_DTE)
+        wings = grid.log_moneyness[np.abs(grid.log_moneyness) <= np.log(1.2)]
+        term_structure = grid.skew_term_structure(SKEW_TERM_DTES)
+        
+        return {
+            'put_call_skew': float(put_25d - call_25d),
+            'atm_skew': float(near_put - near_call),
+            'smile_curvature': float(np.std(grid.implied_vol(wings, SKEW_TARGET_DTE))),
+            'term_structure': [dict(zip(term_structure, map(float, values)))
+                               for values in zip(*term_structure.values())],
+            'source': 'svi_surface',
+            'expiry_dte': SKEW_TARGET_DTE
+        }
+    
+    def monte_carlo_iv_simulation(self, current_iv: float, n_simulations: int = 10000, days: int = 30,
+                                  seed: Optional[int] = 42, method: str = 'simulation',
+                                  target_stderr: Optional[float] = None,
+                                  max_simulations: int = MC_MAX_SIMULATIONS) -> Dict:
+        """Monte Carlo simulation for forward IV projections
+        
+        method='analytic' returns the closed-form horizon distribution of the
+        unbounded process; method='auto' uses it unless the IV bounds are
+        likely to bind, in which case it falls back to simulation.
+        
+        Paths are simulated in independent batches and standard errors of the
+        mean and 5/50/95 percentiles are estimated from the spread of the batch
+        estimates. With target_stderr set, batches of MC_BATCH_SIZE paths are
+        added until the standard errors below are under it or max_simulations
+        is reached, instead of running a fixed n_simulations.
+        
+        The stopping rule only covers the estimates the variance reduction
+        lowers the error of (VARIANCE_REDUCED_ESTIMATES): the mean for control
+        variates, the mean and median for antithetic and Sobol paths, and all
+        four without variance reduction. Errors of the remaining percentiles
+        are still reported in mc_stderr but may be above target_stderr.
+        """
+        if method not in PROJECTION_METHODS:
+            raise ValueError(f"method must be one of {PROJECTION_METHODS}")
+        
+        if method != 'simulation':
+            analytic = self.analytic_iv_projection(current_iv, days)
+            if method == 'analytic' or not analytic['bounds_binding']:
+                return analytic
+            logger.info(f"IV bounds likely to bind (p={analytic['bound_probability']:.4f}), falling back to simulation")
+        
+        rng = np.random.default_rng(seed)  # Local generator for reproducibility
+        
+        if target_stderr is None:
+            batch_size = max(1, -(-n_simulations // MC_ERROR_BATCHES))
+            max_simulations = n_simulations
+        else:
+            batch_size = MC_BATCH_SIZE
+        if self.variance_reduction == 'sobol':
+            batch_size = 1 << (batch_size - 1).bit_length()  # Sobol points are balanced in powers of two
+        
+        # Control variate: the unbounded terminal IV, whose mean is known in closed form
+        track_unbounded = self.variance_reduction == 'control_variate'
+        targeted = [MC_ESTIMATES.index(name) for name in VARIANCE_REDUCED_ESTIMATES[self.variance_reduction]]
+        unbounded_mean = float(self._iv_horizon_moments(current_iv, np.array(days))[0])
+        
+        terminal_batches, unbounded_batches, batch_estimates = [], [], []
+        n_used = 0
+        stderr = np.full(4, np.nan)
+        while n_used < max_simulations:
+            size = batch_size if self.variance_reduction == 'sobol' else min(batch_size, max_simulations - n_used)
+            terminal, unbounded = self._simulate_iv_paths(current_iv, size, days, rng, track_unbounded)
+            terminal_batches.append(terminal)
+            unbounded_batches.append(unbounded)
+            batch_estimates.append(self._iv_estimates(terminal, unbounded, unbounded_mean))
+            n_used += size
             
-            simulated_ivs.append(iv)
+            if len(batch_estimates) > 1:
+                stderr = np.std(batch_estimates, axis=0, ddof=1) / np.sqrt(len(batch_estimates))
+            if (target_stderr is not None and len(batch_estimates) >= MC_MIN_BATCHES
+                    and stderr[targeted].max() <= target_stderr):
+                break
+        
+        simulated_ivs = np.concatenate(terminal_batches)
+        results = self._summarize_iv_distribution(simulated_ivs)
+        if track_unbounded:
+            results['mc_mean'] = self._control_variate_mean(simulated_ivs, np.concatenate(unbounded_batches),
+                                                            unbounded_mean)
+        
+        max_stderr = float(np.max(stderr[targeted])) if len(batch_estimates) > 1 else None
+        results.update({
+            'variance_reduction': self.variance_reduction,
+            'mc_paths_used': n_used,
+            'mc_stderr': dict(zip(MC_ESTIMATES, stderr.tolist())) if max_stderr is not None else None,
+            'mc_stderr_targets': list(VARIANCE_REDUCED_ESTIMATES[self.variance_reduction]),
+            'mc_max_stderr': max_stderr,
+            'converged': None if target_stderr is None else max_stderr is not None and max_stderr <= target_stderr
+        })
+        return results
+    
+    def cached_iv_projection(self, current_iv: float, n_simulations: int = 10000, days: int = 30,
+                             seed: Optional[int] = 42) -> Dict:
+        """Forward IV projection served from the shared LRU/TTL cache when the inputs repeat"""
+        if self.iv_quantization:
+            current_iv = round(current_iv / self.iv_quantization) * self.iv_quantization
+        
+        if not self.use_projection_cache:
+            return self.monte_carlo_iv_simulation(current_iv, n_simulations, days, seed, method=self.projection_method)
         
-        simulated_ivs = np.array(simulated_ivs)
+        key = (float(current_iv), self.mean_reversion_speed, self.long_term_iv_mean, self.iv_volatility,
+               n_simulations, days, seed, self.projection_method, self.variance_reduction)
+        projection = projection_cache.get(key)
+        if projection is None:
+            projection = self.monte_carlo_iv_simulation(current_iv, n_simulations, days, seed,
+                                                        method=self.projection_method)
+            projection_cache.set(key, projection)
+        
+        return dict(projection)
+    
+    def analytic_iv_projection(self, current_iv: float, days: int = 30) -> Dict:
+        """Closed-form horizon distribution of the mean-reverting IV process
+        
+        Uses the exact Gaussian moments of the daily Euler scheme that the
+        simulation runs, ignoring the [10, 150] clamp. `bound_probability` is
+        the largest probability, over all steps, of the unbounded process
+        being outside the bounds; above BOUND_PROBABILITY_TOLERANCE the clamp
+        matters and the simulation should be used instead.
+        """
+        mean, std = self._iv_horizon_moments(current_iv, np.arange(days + 1))
+        
+        # Gaussian tail mass outside the bounds at every step up to the horizon
+        with np.errstate(divide='ignore', invalid='ignore'):
+            below = ndtr((IV_FLOOR - mean[1:]) / std[1:])
+            above = ndtr((mean[1:] - IV_CAP) / std[1:])
+        bound_probability = float(np.nanmax(below + above)) if days > 0 else 0.0
+        
+        horizon_mean, horizon_std = float(mean[-1]), float(std[-1])
         
         return {
-            'mc_mean': np.mean(simulated_ivs),
-            'mc_std': np.std(simulated_ivs),
-            'mc_5th_percentile': np.percentile(simulated_ivs, 5),
-            'mc_95th_percentile': np.percentile(simulated_ivs, 95),
-            'mc_median': np.median(simulated_ivs),
-            'mc_distribution': simulated_ivs.tolist()[:1000]  # Sample for frontend
+            'mc_mean': horizon_mean,
+            'mc_std': horizon_std,
+            'mc_5th_percentile': horizon_mean - Z_95 * horizon_std,
+            'mc_95th_percentile': horizon_mean + Z_95 * horizon_std,
+            'mc_median': horizon_mean,
+            'mc_distribution': [],  # No samples in closed form
+            'method': 'analytic',
+            'bound_probability': bound_probability,
+            'bounds_binding': bound_probability > BOUND_PROBABILITY_TOLERANCE
         }
     
+    def _iv_horizon_moments(self, current_iv: float, steps: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Mean and std of the unbounded daily IV recursion after the given numbers of steps"""
+        dt = 1/252  # Daily time step
+        phi = 1 - self.mean_reversion_speed * dt
+        decay = phi ** steps
+        
+        mean = self.long_term_iv_mean + (current_iv - self.long_term_iv_mean) * decay
+        if phi == 1:
+            variance = self.iv_volatility**2 * dt * steps
+        else:
+            variance = self.iv_volatility**2 * dt * (1 - decay**2) / (1 - phi**2)
+        
+        return mean, np.sqrt(variance)
+    
+    def _iv_model(self) -> Dict:
+        """Parameters of the daily IV recursion, as taken by simulate_iv_steps"""
+        return {
+            'long_term_iv_mean': self.long_term_iv_mean,
+            'mean_reversion_speed': self.mean_reversion_speed,
+            'iv_volatility': self.iv_volatility
+        }
+    
+    def _iv_steps(self, current_iv: float, n_simulations: int, days: int, rng: np.random.Generator,
+                  track_unbounded: bool = False):
+        """Streaming IV recursion with this analyzer's model, bounds and variance reduction"""
+        return simulate_iv_steps(current_iv, n_simulations, days, rng, self._iv_model(), (IV_FLOOR, IV_CAP),
+                                 self.variance_reduction, track_unbounded, MC_CHUNK_SIZE)
+    
+    def _simulate_iv_paths(self, current_iv: float, n_simulations: int, days: int, rng: np.random.Generator,
+                           track_unbounded: bool = False) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Terminal IVs of the mean-reverting process for every path
+        
+        Returns the bounded terminal IVs and, if track_unbounded is set, the
+        terminal IVs of the same paths without the [10, 150] clamp.
+        """
+        terminal_ivs = np.full(n_simulations, float(current_iv))
+        unbounded_ivs = terminal_ivs.copy() if track_unbounded else None
+        for start, day, iv, unbounded, _ in self._iv_steps(current_iv, n_simulations, days, rng, track_unbounded):
+            if day == days:
+                terminal_ivs[start:start + len(iv)] = iv
+                if track_unbounded:
+                    unbounded_ivs[start:start + len(iv)] = unbounded
+        
+        return terminal_ivs, unbounded_ivs
+    
+    def _iv_estimates(self, terminal_ivs: np.ndarray, unbounded_ivs: Optional[np.ndarray],
+                      unbounded_mean: float) -> np.ndarray:
+        """Mean and 5/50/95 percentile estimates of one batch of terminal IVs"""
+        if unbounded_ivs is None:
+            mean = np.mean(terminal_ivs)
+        else:
+            mean = self._control_variate_mean(terminal_ivs, unbounded_ivs, unbounded_mean)
+        return np.concatenate([[mean], np.percentile(terminal_ivs, [5, 50, 95])])
+    
+    def _control_variate_mean(self, terminal_ivs: np.ndarray, unbounded_ivs: np.ndarray,
+                              unbounded_mean: float) -> float:
+        """Control-variate mean of the bounded IVs using the unbounded IVs' known mean"""
+        covariance = np.cov(terminal_ivs, unbounded_ivs)
+        beta = covariance[0, 1] / covariance[1, 1] if covariance[1, 1] > 0 else 0.0
+        return float(np.mean(terminal_ivs) - beta * (np.mean(unbounded_ivs) - unbounded_mean))
+    
+    def _summarize_iv_distribution(self, simulated_ivs: np.ndarray) -> Dict:
+        """Summarize simulated terminal IVs into the forward projection dict"""
+        p5, median, p95 = np.percentile(simulated_ivs, [5, 50, 95])
+        
+        return {
+            'mc_mean': float(np.mean(simulated_ivs)),
+            'mc_std': float(np.std(simulated_ivs)),
+            'mc_5th_percentile': float(p5),
+            'mc_95th_percentile': float(p95),
+            'mc_median': float(median),
+            'mc_distribution': simulated_ivs[:1000].tolist(),  # Sample for frontend
+            'method': 'simulation'
+        }
+    
+    def monte_carlo_iv_fan(self, current_iv: float, horizons: Tuple[int, ...] = FAN_HORIZONS,
+                           n_simulations: int = 10000, seed: Optional[int] = 42,
+                           percentiles: Tuple[float, ...] = FAN_PERCENTILES) -> Dict:
+        """Forward IV quantile fan at several horizons from a single simulation pass
+        
+        Paths are simulated once up to the longest horizon. At each requested
+        horizon the current IVs are folded into a streaming histogram, so only
+        the latest step of each block of paths is ever held in memory. With
+        Sobol shocks n_simulations is rounded up to a power of two.
+        """
+        horizons = sorted(set(int(h) for h in horizons))
+        if not horizons or horizons[0] < 1:
+            raise ValueError("horizons must be positive numbers of days")
+        if self.variance_reduction == 'sobol':
+            n_simulations = next_power_of_two(n_simulations)
+        
+        rng = np.random.default_rng(seed)
+        histograms = self._simulate_iv_histograms(current_iv, n_simulations, horizons, rng)
+        
+        fan = []
+        for days, histogram in zip(horizons, histograms):
+            values = histogram.percentiles(percentiles)
+            fan.append({
+                'days': days,
+                'mean': histogram.mean,
+                'std': histogram.std,
+                'percentiles': {f'{q:g}': float(v) for q, v in zip(percentiles, values)}
+            })
+        
+        return {
+            'current_iv': current_iv,
+            'horizons': horizons,
+            'fan': fan,
+            'variance_reduction': self.variance_reduction,
+            'mc_paths_used': n_simulations
+        }
+    
+    def monte_carlo_iv_sharded(self, current_iv: float, n_simulations: int = 10_000_000, days: int = 30,
+                               seed: Optional[int] = 42, n_workers: Optional[int] = None,
+                               executor: Optional[Executor] = None) -> Dict:
+        """Forward IV projection with paths split across a process pool
+        
+        Paths are split into shards by shard_sizes, independently of the
+        worker count. Each shard draws from its own stream spawned from
+        np.random.SeedSequence(seed), and shard histograms and moments are
+        merged in shard order, so results are bit-reproducible for a seed
+        whatever the number of workers. With Sobol shocks every shard is a
+        power of two, and exactly n_simulations paths are still simulated.
+        An existing executor can be passed in to avoid starting a new pool
+        per call; otherwise n_workers processes (all cores by default) run
+        the shards.
+        """
+        n_workers = n_workers or os.cpu_count() or 1
+        sizes = shard_sizes(n_simulations, self.variance_reduction == 'sobol')
+        seed_sequences = np.random.SeedSequence(seed).spawn(len(sizes))
+        model_params = {
+            'long_term_iv_mean': self.long_term_iv_mean,
+            'mean_reversion_speed': self.mean_reversion_speed,
+            'iv_volatility': self.iv_volatility,
+            'variance_reduction': self.variance_reduction
+        }
+        
+        pool = executor or ProcessPoolExecutor(max_workers=n_workers)
+        try:
+            futures = [pool.submit(_simulate_iv_shard, model_params, current_iv, size, [days], seed_sequence)
+                       for size, seed_sequence in zip(sizes, seed_sequences)]
+            shard_histograms = [future.result()[0] for future in futures]
+        finally:
+            if executor is None:
+                pool.shutdown()
+        
+        histogram = IVHistogram()
+        for shard_histogram in shard_histograms:
+            histogram.merge(shard_histogram)
+        p5, median, p95 = histogram.percentiles([5, 50, 95])
+        
+        return {
+            'mc_mean': histogram.mean,
+            'mc_std': histogram.std,
+            'mc_5th_percentile': float(p5),
+            'mc_95th_percentile': float(p95),
+            'mc_median': float(median),
+            'mc_distribution': [],  # Shards return histograms, not samples
+            'method': 'sharded',
+            'variance_reduction': self.variance_reduction,
+            'mc_paths_used': sum(sizes),
+            'n_shards': len(sizes)
+        }
+    
+    def _simulate_iv_histograms(self, current_iv: float, n_simulations: int, horizons: List[int],
+                                rng: np.random.Generator) -> List[IVHistogram]:
+        """Simulate paths to the longest horizon, accumulating a histogram at each horizon"""
+        histograms = [IVHistogram() for _ in horizons]
+        horizon_index = {h: i for i, h in enumerate(horizons)}
+        for _, day, iv, _, _ in self._iv_steps(current_iv, n_simulations, horizons[-1], rng):
+            if day in horizon_index:
+                histograms[horizon_index[day]].add(iv)
+        
+        return histograms
+    
     def detect_volatility_regime(self, current_iv: float, vix: float) -> Dict:
         """Detect current volatility regime"""
         # Crypto regime classification
@@ -141,6 +697,88 @@ class ETHOptionsAnalyzer:
             'vix_regime': 'low' if vix < 20 else 'medium' if vix < 30 else 'high'
         }
     
+    def price_structures(self, structures: Dict[str, List[Dict]], eth_price: float, current_iv: float) -> Dict:
+        """Price every leg of every option structure in one vectorized Black-Scholes call
+        
+        Legs are dicts with option_type ('call'/'put'), strike, dte and quantity
+        (positive long, negative short). Each structure gets its priced legs,
+        its net premium (positive for a credit) and its net Greeks.
+        """
+        all_legs = [(name, leg) for name, legs in structures.items() for leg in legs]
+        strikes = np.array([leg['strike'] for _, leg in all_legs], dtype=float)
+        dtes = np.array([leg['dte'] for _, leg in all_legs], dtype=float)
+        is_call = np.array([leg['option_type'] == 'call' for _, leg in all_legs])
+        quantities = [float(leg['quantity']) for _, leg in all_legs]
+        vols = self._leg_ivs(strikes, dtes, eth_price, current_iv)
+        
+        greeks = black_scholes(eth_price, strikes, dtes / DAYS_PER_YEAR, vols / 100, self.risk_free_rate, is_call)
+        
+        priced = {name: {'legs': [], 'net_premium': 0.0, 'greeks': dict.fromkeys(GREEK_NAMES, 0.0)}
+                  for name in structures}
+        for i, (name, leg) in enumerate(all_legs):
+            structure = priced[name]
+            structure['legs'].append({
+                **leg,
+                'iv': float(vols[i]),
+                'price': float(greeks['price'][i]),
+                **{greek: float(greeks[greek][i]) for greek in GREEK_NAMES}
+            })
+            structure['net_premium'] -= quantities[i] * float(greeks['price'][i])
+            for greek in GREEK_NAMES:
+                structure['greeks'][greek] += quantities[i] * float(greeks[greek][i])
+        
+        return priced
+    
+    def stress_test_positions(self, positions: List[Dict], eth_price: float, spot_moves=STRESS_SPOT_MOVES,
+                              vol_shocks=STRESS_VOL_SHOCKS, horizon_days: float = STRESS_HORIZON_DAYS) -> Dict:
+        """Revalue every leg of every position over a spot-move x IV-shock grid after horizon_days of decay
+        
+        All legs are broadcast against the grid in a single Black-Scholes call
+        and summed into per-position P&L matrices (rows are spot moves, columns
+        IV shocks) relative to each leg's current price.
+        """
+        spot_moves = np.asarray(spot_moves, dtype=float)
+        vol_shocks = np.asarray(vol_shocks, dtype=float)
+        names = [position['position_type'] for position in positions]
+        legs = leg_arrays(positions)
+        
+        remaining = np.maximum(legs['dte'] - horizon_days, 0.0) / DAYS_PER_YEAR
+        spots = eth_price * (1 + spot_moves)[:, None, None]
+        vols = np.maximum(legs['iv'] + vol_shocks[:, None], STRESS_MIN_IV)[None, :, :] / 100
+        values = black_scholes_price(spots, legs['strike'], remaining, vols, self.risk_free_rate, legs['is_call'])
+        pnl = ((values - legs['price']) * legs['quantity']) @ legs['membership']  # (spot moves, vol shocks, positions)
+        
+        def summarize(matrix: np.ndarray) -> Dict:
+            worst = np.unravel_index(np.argmin(matrix), matrix.shape)
+            best = np.unravel_index(np.argmax(matrix), matrix.shape)
+            return {
+                'pnl': np.round(matrix, 2).tolist(),
+                'worst_pnl': float(matrix[worst]),
+                'worst_scenario': {'spot_move': float(spot_moves[worst[0]]), 'vol_shock': float(vol_shocks[worst[1]])},
+                'best_pnl': float(matrix[best]),
+                'best_scenario': {'spot_move': float(spot_moves[best[0]]), 'vol_shock': float(vol_shocks[best[1]])}
+            }
+        
+        return {
+            'spot_moves': spot_moves.tolist(),
+            'vol_shocks': vol_shocks.tolist(),
+            'horizon_days': horizon_days,
+            'positions': {name: summarize(pnl[:, :, i]) for i, name in enumerate(names)},
+            'combined': summarize(pnl.sum(axis=2))
+        }
+    
+    def portfolio_risk(self, positions: List[Dict], eth_price: float, current_iv: float) -> Dict:
+        """VaR/ES of the positions whose entry criteria are met, on cached joint spot/IV paths"""
+        held = [position for position in positions if position.get('entry_criteria_met')]
+        return self.risk_engine.evaluate(held, eth_price, current_iv, self._iv_model(), (IV_FLOOR, IV_CAP),
+                                         self.risk_free_rate)
+    
+    def _leg_ivs(self, strikes: np.ndarray, dtes: np.ndarray, eth_price: float, current_iv: float) -> np.ndarray:
+        """Implied volatility (in %) used to price each leg: the fitted surface, else current IV"""
+        if self.surface is None:
+            return np.full(len(strikes), float(current_iv))
+        return self.surface.grid.implied_vol(np.log(strikes / eth_price), dtes)
+    
     def generate_trading_positions(self, analysis_results: Dict, market_data: Dict) -> List[Dict]:
         """Generate specific trading position recommendations"""
         positions = []
@@ -151,61 +789,85 @@ class ETHOptionsAnalyzer:
         ivr = analysis_results.get('current_metrics', {}).get('estimated_ivr', 0)
         eth_price = market_data.get('eth_price', 3600)
         
+        # Price all candidate structures per 1 ETH contract
+        priced = self.price_structures({strategy: structure_legs(strategy, eth_price)
+                                        for strategy in POSITION_STRUCTURES}, eth_price, current_iv)
+        features = {'vrp': vrp, 'skew': skew, 'ivr': ivr}
+        signals = {strategy: meets_thresholds(features, rules) for strategy, rules in ENTRY_THRESHOLDS.items()}
+        
         # Position 1: Short Put Spread (High Priority)
-        if vrp > 3 and skew > 8 and ivr > 0.3:
+        if signals['short_put_spread']:
+            spread = priced['short_put_spread']
+            credit = spread['net_premium']
+            width = eth_price * 0.94 - eth_price * 0.89
             positions.append({
                 'position_type': 'Short Put Spread',
                 'strategy': 'Monetize elevated put skew and positive VRP',
                 'strikes': f'SELL ${eth_price * 0.94:.0f} Put / BUY ${eth_price * 0.89:.0f} Put',
                 'expiry': '31 DTE',
-                'net_credit_debit': 50.0,
-                'max_risk': 150.0,
-                'max_profit': 50.0,
+                'net_credit_debit': round(credit, 2),
+                'max_risk': round(width - credit, 2),
+                'max_profit': round(credit, 2),
                 'win_probability': 0.75,
                 'priority': 'HIGH',
                 'entry_criteria_met': True,
+                'legs': spread['legs'],
+                'greeks': spread['greeks'],
                 'position_details': {
                     'sell_strike': eth_price * 0.94,
                     'buy_strike': eth_price * 0.89,
-                    'breakeven': eth_price * 0.94 - 50,
+                    'breakeven': eth_price * 0.94 - credit,
                     'sizing': '10-30 spreads',
                     'rationale': f'VRP: {vrp:.1f}%, Skew: {skew:.1f}%, IVR: {ivr:.2f}'
                 }
             })
         
         # Position 2: Short Straddle (Medium Priority)
-        if vrp > 5 and ivr > 0.35:
+        if signals['short_straddle']:
+            straddle = priced['short_straddle']
+            credit = straddle['net_premium']
             positions.append({
                 'position_type': 'Short Straddle',
                 'strategy': 'Capture volatility risk premium with delta-neutral exposure',
                 'strikes': f'SELL ${eth_price:.0f} Call & Put',
                 'expiry': '31 DTE',
-                'net_credit_debit': 200.0,
+                'net_credit_debit': round(credit, 2),
                 'max_risk': None,  # Undefined risk
-                'max_profit': 200.0,
+                'max_profit': round(credit, 2),
                 'win_probability': 0.60,
                 'priority': 'MEDIUM',
                 'entry_criteria_met': vrp > 5 and current_iv > 60,
+                'legs': straddle['legs'],
+                'greeks': straddle['greeks'],
                 'position_details': {
                     'strike': eth_price,
-                    'breakevens': [eth_price - 200, eth_price + 200],
+                    'breakevens': [eth_price - credit, eth_price + credit],
                     'sizing': '1-5 straddles',
                     'rationale': f'VRP: {vrp:.1f}%, IV: {current_iv:.1f}%'
                 }
             })
         
         # Position 3: Calendar Spread (Lower Priority)
+        calendar = priced['calendar_spread']
+        debit = -calendar['net_premium']
+        # Best case: spot pins the strike at the front expiry, leaving the back month's time value
+        back_leg = calendar['legs'][1]
+        back_value_at_front_expiry = float(black_scholes_price(
+            eth_price, eth_price, (back_leg['dte'] - 14) / DAYS_PER_YEAR, back_leg['iv'] / 100,
+            self.risk_free_rate, True))
         positions.append({
             'position_type': 'Calendar Spread',
             'strategy': 'Exploit term structure backwardation',
             'strikes': f'SELL 14 DTE / BUY 31 DTE ${eth_price:.0f} Call',
             'expiry': '14/31 DTE',
-            'net_credit_debit': -30.0,
-            'max_risk': 30.0,
-            'max_profit': 60.0,
+            'net_credit_debit': round(-debit, 2),
+            'max_risk': round(debit, 2),
+            'max_profit': round(back_value_at_front_expiry - debit, 2),
             'win_probability': 0.55,
             'priority': 'LOW',
             'entry_criteria_met': True,
+            'legs': calendar['legs'],
+            'greeks': calendar['greeks'],
             'position_details': {
                 'strike': eth_price,
                 'sizing': '5-25 calendars',
@@ -214,17 +876,21 @@ class ETHOptionsAnalyzer:
         })
         
         # Position 4: Protective Puts (Hedge)
+        hedge = priced['protective_put']
+        premium = -hedge['net_premium']
         positions.append({
             'position_type': 'Protective Put',
             'strategy': 'Portfolio protection given bearish options flow',
             'strikes': f'BUY ${eth_price * 0.89:.0f} Put',
             'expiry': '45 DTE',
-            'net_credit_debit': -95.0,
-            'max_risk': 95.0,
+            'net_credit_debit': round(-premium, 2),
+            'max_risk': round(premium, 2),
             'max_profit': None,  # Protection value
             'win_probability': None,
             'priority': 'HEDGE',
             'entry_criteria_met': True,
+            'legs': hedge['legs'],
+            'greeks': hedge['greeks'],
             'position_details': {
                 'strike': eth_price * 0.89,
                 'protection_level': '11% below current price',
@@ -247,19 +913,28 @@ class ETHOptionsAnalyzer:
         # Calculate core metrics
         vrp = self.calculate_vrp(current_iv, current_rv_30d)
         
-        # Estimate IVR and percentile (would use historical data in production)
-        historical_ivs = [45, 50, 55, 60, 65, 70, 75, 80, 85, 90]  # Simulated
-        estimated_ivr = self.calculate_ivr(current_iv, historical_ivs)
-        iv_percentile = self.calculate_iv_percentile(current_iv, historical_ivs)
+        # IVR and percentile against explicit history if given, otherwise the rolling IV window
+        if historical_data is not None:
+            estimated_ivr = self.calculate_ivr(current_iv, historical_data)
+            iv_percentile = self.calculate_iv_percentile(current_iv, historical_data)
+        else:
+            estimated_ivr = self.iv_window.iv_rank(current_iv)
+            if estimated_ivr is None:
+                estimated_ivr = self.calculate_ivr(current_iv, [])
+            iv_percentile = self.iv_window.percentile(current_iv)
+            if iv_percentile is None:
+                iv_percentile = self.calculate_iv_percentile(current_iv, [])
         
-        # Skew analysis
-        skew_metrics = self.calculate_skew_metrics(current_iv)
+        # Skew analysis from a surface fitted to strike-level IVs when the snapshot carries an option chain
+        option_chain = market_data.get('option_chain')
+        self.surface = surface_calibrator.calibrate(self.calculate_chain_ivs(option_chain)) if option_chain else None
+        skew_metrics = self.calculate_skew_metrics(current_iv, self.surface)
         
         # Regime detection
         regime_analysis = self.detect_volatility_regime(current_iv, vix)
         
         # Monte Carlo projections
-        mc_projections = self.monte_carlo_iv_simulation(current_iv)
+        mc_projections = self.cached_iv_projection(current_iv)
         
         # Cross-asset analysis
         cross_asset = self.calculate_cross_asset_signals(market_data)
@@ -270,14 +945,18 @@ class ETHOptionsAnalyzer:
             'current_metrics': {
                 'eth_iv': current_iv,
                 'eth_rv_30d': current_rv_30d,
+                'rv_source': market_data.get('rv_source', {}).get('eth_rv_30d', 'daily_close'),
                 'vrp': vrp,
                 'estimated_ivr': estimated_ivr,
-                'iv_percentile': iv_percentile
+                'iv_percentile': iv_percentile,
+                'iv_history_count': len(historical_data) if historical_data is not None else len(self.iv_window)
             },
             'skew_analysis': skew_metrics,
+            'vol_surface': self.surface.to_dict() if self.surface else None,
             'regime_analysis': regime_analysis,
             'cross_asset': cross_asset,
             'forward_projections': mc_projections,
+            'iv_model': self.ou_calibration,
             'options_flow': {
                 'puts_bought': market_data.get('puts_bought', 32.5),
                 'calls_bought': market_data.get('calls_bought', 20.8),
@@ -289,12 +968,36 @@ class ETHOptionsAnalyzer:
         trading_positions = self.generate_trading_positions(results, market_data)
         results['trading_positions'] = trading_positions
         
+        # Portfolio VaR/ES of the positions to be put on
+        results['portfolio_risk'] = self.portfolio_risk(trading_positions, market_data.get('eth_price', 3600), current_iv)
+        
         # Add assessment summary
         results['assessment'] = self._generate_assessment_summary(results)
         
         logger.info("Comprehensive analysis completed")
         return results
     
+    def memoized_analysis(self, market_data: Dict) -> Dict:
+        """comprehensive_analysis served from the shared memo when the snapshot is unchanged
+        
+        A new snapshot hashes differently, so it never sees a previous
+        snapshot's analysis; superseded entries age out of the bounded memo.
+        The memo keeps the fitted surface alongside the analysis so a hit
+        restores self.surface, and every call returns a deep copy that callers
+        may modify without touching the memoized entry.
+        """
+        key = (snapshot_hash(market_data), id(self.iv_window), self.iv_window.version, self.mean_reversion_speed, self.long_term_iv_mean,
+               self.iv_volatility, self.projection_method, self.variance_reduction, self.iv_quantization)
+        memoized = analysis_memo.get(key)
+        if memoized is None:
+            results = self.comprehensive_analysis(market_data)
+            analysis_memo.set(key, (copy.deepcopy(results), self.surface))
+            return results
+        
+        logger.info("Serving memoized analysis for unchanged market snapshot")
+        results, self.surface = memoized
+        return copy.deepcopy(results)
+    
     def _generate_assessment_summary(self, results: Dict) -> Dict:
         """Generate high-level assessment summary"""
         current_iv = results['current_metrics']['eth_iv']
@@ -323,6 +1026,8 @@ class ETHOptionsAnalyzer:
         else:
             vrp_assessment = "NEGATIVE PREMIUM"
         
+        confident = meets_thresholds({'ivr': ivr, 'abs_vrp': abs(vrp)}, CONFIDENCE_THRESHOLDS)
+        
         # Trading recommendation
         high_priority_positions = [p for p in results['trading_positions'] if p['priority'] == 'HIGH']
         
@@ -331,7 +1036,7 @@ class ETHOptionsAnalyzer:
             'vrp_assessment': vrp_assessment,
             'regime': results['regime_analysis']['crypto_regime'],
             'top_opportunity': high_priority_positions[0]['position_type'] if high_priority_positions else None,
-            'risk_level': 'MODERATE',
-            'confidence': 'HIGH' if ivr > 0.3 and abs(vrp) > 3 else 'MEDIUM'
+            'risk_level': results['portfolio_risk']['risk_level'],
+            'confidence': 'HIGH' if confident else 'MEDIUM'
         }
 
@@ -0,0 +1,269 @@
+"""
+ETH Options Strategy Backtester
+Vectorized replay of the recommended-position entry rules over stored market snapshots
+"""
+
+import itertools
+import math
+import numpy as np
+import pandas as pd
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from analysis_engine import ENTRY_THRESHOLDS, POSITION_STRUCTURES, entry_signals
+from iv_window import IV_HISTORY_DAYS
+from pricing_engine import DAYS_PER_YEAR, black_scholes_price
+
+# Put-call skew assumed for snapshots without a stored skew measurement (the analyzer's default)
+DEFAULT_SKEW = 13.0
+
+# Trades whose first snapshot after the planned exit is later than this are treated as unpriceable
+MAX_EXIT_LAG_DAYS = 1.0
+
+# Threshold combinations evaluated per broadcast block (bounds the (combinations x trades) mask size)
+SWEEP_CHUNK_SIZE = 256
+
+# Largest threshold grid a sweep will evaluate (product of the candidate list lengths)
+MAX_SWEEP_COMBINATIONS = 20_000
+
+SWEEP_RANK_METRICS = ('total_pnl', 'mean_pnl', 'hit_rate', 'pnl_to_drawdown')
+
+
+def sweep_size(grid: Dict[str, Sequence[float]]) -> int:
+    """Number of threshold combinations a sweep over grid evaluates"""
+    return math.prod(len(np.atleast_1d(values)) for values in grid.values())
+
+
+def prepare_features(history: pd.DataFrame, window_days: int = IV_HISTORY_DAYS) -> Dict[str, np.ndarray]:
+    """Feature columns for backtests from a snapshot history
+
+    history needs timestamp, eth_price, eth_iv_deribit and eth_rv_30d columns
+    and may carry put_call_skew. IV rank is measured against a trailing
+    window of the IV series itself, like the live rolling IV window. Rows
+    missing price or IV are dropped.
+    """
+    frame = history.dropna(subset=['eth_price', 'eth_iv_deribit']).sort_values('timestamp')
+    frame = frame.drop_duplicates('timestamp', keep='last').set_index('timestamp')
+    iv = frame['eth_iv_deribit'].astype(float)
+
+    rolling = iv.rolling(f'{window_days}D')
+    low, high = rolling.min(), rolling.max()
+    ivr = ((iv - low) / (high - low)).clip(0, 1).where(high > low, 0.5)
+
+    vrp = iv - frame['eth_rv_30d'].astype(float)
+    skew = frame['put_call_skew'] if 'put_call_skew' in frame else pd.Series(np.nan, index=frame.index)
+    timestamps = frame.index.values.astype('datetime64[s]').astype(np.int64)
+
+    return {
+        'time': timestamps.astype(float),
+        'eth_price': frame['eth_price'].to_numpy(dtype=float),
+        'iv': iv.to_numpy(),
+        'vrp': vrp.to_numpy(),
+        'abs_vrp': vrp.abs().to_numpy(),
+        'ivr': ivr.to_numpy(),
+        'skew': skew.astype(float).fillna(DEFAULT_SKEW).to_numpy()
+    }
+
+
+class StrategyBacktester:
+    """Replay the entry rules over feature columns and price every trade in one call per strategy
+
+    Entry rules are evaluated as boolean masks over the whole series. A
+    trade opens at a signalling snapshot with its structure struck off that
+    snapshot's spot and priced at its IV, and closes at the first snapshot
+    after its shortest leg expires, repriced at that snapshot's spot and IV.
+    Without overlapping, a strategy holds one trade at a time and the loop
+    runs over trades, never over snapshots.
+    """
+
+    def __init__(self, risk_free_rate: float = 0.0, overlapping: bool = False,
+                 max_exit_lag_days: float = MAX_EXIT_LAG_DAYS):
+        self.risk_free_rate = risk_free_rate
+        self.overlapping = overlapping
+        self.max_exit_lag_days = max_exit_lag_days
+
+    def run(self, features: Dict[str, np.ndarray], thresholds: Optional[Dict[str, Dict[str, float]]] = None) -> Dict:
+        """Per-strategy P&L (USD per 1 ETH structure), hit rate and drawdown"""
+        thresholds = ENTRY_THRESHOLDS if thresholds is None else thresholds
+        signals = entry_signals(features, thresholds)
+
+        results = {}
+        for strategy, mask in signals.items():
+            trades = self.simulate_trades(features, strategy, mask)
+            results[strategy] = {'n_signals': int(mask.sum()), **summarize_trades(trades['pnl'])}
+        return {
+            'n_snapshots': len(features['time']),
+            'start': _iso(features['time'][0]) if len(features['time']) else None,
+            'end': _iso(features['time'][-1]) if len(features['time']) else None,
+            'strategies': results
+        }
+
+    def simulate_trades(self, features: Dict[str, np.ndarray], strategy: str, mask: np.ndarray) -> Dict[str, np.ndarray]:
+        """Entry and exit snapshot indices, premiums and P&L of the trades taken on a mask"""
+        candidates = np.flatnonzero(mask)
+        if not self.overlapping:
+            # Chain on exit times first so only the trades actually taken get priced
+            entries, exits = self._exit_indices(features['time'], strategy, candidates)
+            candidates = entries[chain_trades(entries, exits)]
+        return self.trade_table(features, strategy, candidates)
+
+    def _exit_indices(self, times: np.ndarray, strategy: str, candidates: np.ndarray):
+        """Candidates that can be priced at exit, with the snapshot index each one exits at"""
+        hold_days = min(leg[2] for leg in POSITION_STRUCTURES[strategy])
+        exits = np.searchsorted(times, times[candidates] + hold_days * 86400, side='left')
+        priceable = exits < len(times)
+        priceable[priceable] &= times[exits[priceable]] - times[candidates[priceable]] <= \
+            (hold_days + self.max_exit_lag_days) * 86400
+        return candidates[priceable], exits[priceable]
+
+    def trade_table(self, features: Dict[str, np.ndarray], strategy: str,
+                    candidates: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """Trades opened at each candidate snapshot (all snapshots by default) that can be priced at exit"""
+        legs = POSITION_STRUCTURES[strategy]
+        option_types, moneyness, dtes, quantities = (np.array(column) for column in zip(*legs))
+        is_call = option_types == 'call'
+        dtes = dtes.astype(float)
+        quantities = quantities.astype(float)
+
+        times = features['time']
+        if candidates is None:
+            candidates = np.arange(len(times))
+        candidates, exits = self._exit_indices(times, strategy, candidates)
+
+        spot_in, spot_out = features['eth_price'][candidates, None], features['eth_price'][exits, None]
+        strikes = spot_in * moneyness
+        elapsed = (times[exits] - times[candidates])[:, None] / 86400
+
+        entry_value = black_scholes_price(spot_in, strikes, dtes / DAYS_PER_YEAR,
+                                          features['iv'][candidates, None] / 100, self.risk_free_rate, is_call)
+        exit_value = black_scholes_price(spot_out, strikes, np.maximum(dtes - elapsed, 0) / DAYS_PER_YEAR,
+                                         features['iv'][exits, None] / 100, self.risk_free_rate, is_call)
+
+        return {
+            'entry_index': candidates,
+            'exit_index': exits,
+            'net_premium': -(entry_value * quantities).sum(axis=1),
+            'pnl': ((exit_value - entry_value) * quantities).sum(axis=1)
+        }
+
+    def sweep(self, features: Dict[str, np.ndarray], strategy: str, grid: Dict[str, Sequence[float]],
+              rank_by: str = 'total_pnl', min_trades: int = 1, n_workers: Optional[int] = None,
+              executor: Optional[Executor] = None) -> pd.DataFrame:
+        """Backtest every combination of entry thresholds and return them ranked
+
+        grid maps feature names to candidate thresholds; features of the
+        strategy's own rule that are not in the grid keep their thresholds.
+        Trades for every snapshot are priced once and shared by all
+        combinations. With overlapping trades each block of combinations is
+        one broadcast mask over that table; one-at-a-time trading is path
+        dependent, so its combinations are spread over a process pool when
+        n_workers or an executor is given. Combinations are generated one
+        block at a time; grids above MAX_SWEEP_COMBINATIONS are rejected.
+        """
+        if rank_by not in SWEEP_RANK_METRICS:
+            raise ValueError(f"rank_by must be one of {SWEEP_RANK_METRICS}")
+        n_combinations = sweep_size(grid)
+        if n_combinations > MAX_SWEEP_COMBINATIONS:
+            raise ValueError(f"grid has {n_combinations} combinations, more than {MAX_SWEEP_COMBINATIONS}")
+        rules = {**ENTRY_THRESHOLDS[strategy], **grid}
+        names = list(rules)
+
+        table = self.trade_table(features, strategy)
+        columns = np.array([features[name][table['entry_index']] for name in names]).reshape(len(names), -1)
+        shared = (columns, table['pnl'], table['entry_index'], table['exit_index'])
+        blocks = combination_blocks([np.atleast_1d(grid.get(name, rules[name])) for name in names])
+
+        if self.overlapping:
+            metrics = [_overlapping_metrics(block, columns, table['pnl']) for block in blocks]
+        elif executor is not None:
+            metrics = list(executor.map(_chained_metrics, blocks, itertools.repeat(shared)))
+        elif n_workers:
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_set_sweep_table, initargs=(shared,)) as pool:
+                metrics = list(pool.map(_chained_metrics, blocks))
+        else:
+            metrics = [_chained_metrics(block, shared) for block in blocks]
+
+        results = pd.DataFrame(np.concatenate(metrics).reshape(-1, len(names) + 4),
+                               columns=names + ['n_trades', 'total_pnl', 'hit_rate', 'max_drawdown'])
+        results['n_trades'] = results['n_trades'].astype(int)
+        results['mean_pnl'] = results['total_pnl'] / results['n_trades'].where(results['n_trades'] > 0)
+        results['pnl_to_drawdown'] = results['total_pnl'] / results['max_drawdown'].where(results['max_drawdown'] > 0)
+        results = results[results['n_trades'] >= min_trades]
+        return results.sort_values(rank_by, ascending=False, na_position='last').reset_index(drop=True)
+
+
+def combination_blocks(values: Sequence[np.ndarray], block_size: int = SWEEP_CHUNK_SIZE) -> Iterator[np.ndarray]:
+    """Cartesian product of the candidate values as (combinations x features) blocks of at most block_size rows"""
+    combinations = itertools.product(*values)
+    while True:
+        block = np.array(list(itertools.islice(combinations, block_size)), dtype=float)
+        if not len(block):
+            return
+        yield block
+
+
+def chain_trades(entries: np.ndarray, exits: np.ndarray) -> List[int]:
+    """Positions of the trades taken when a new trade may only open once the previous one has closed"""
+    chosen = []
+    position = 0
+    while position < len(entries):
+        chosen.append(position)
+        position = np.searchsorted(entries, exits[position], side='left')
+    return chosen
+
+
+def _overlapping_metrics(block: np.ndarray, columns: np.ndarray, pnl: np.ndarray) -> np.ndarray:
+    """Thresholds then (n_trades, total_pnl, hit_rate, max_drawdown) per combination, every signal trading"""
+    mask = np.all(columns[None, :, :] > block[:, :, None], axis=1)
+    masked = mask * pnl
+    counts = mask.sum(axis=1)
+    equity = np.cumsum(masked, axis=1)
+    drawdown = (np.maximum.accumulate(np.maximum(equity, 0.0), axis=1) - equity).max(axis=1, initial=0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        hit_rate = (mask & (pnl > 0)).sum(axis=1) / counts
+    return np.column_stack([block, counts, equity[:, -1] if equity.shape[1] else np.zeros(len(block)),
+                            hit_rate, drawdown])
+
+
+# Trade table installed once per sweep worker process by the pool initializer
+_sweep_table = None
+
+def _set_sweep_table(shared):
+    global _sweep_table
+    _sweep_table = shared
+
+
+def _chained_metrics(block: np.ndarray, shared=None) -> np.ndarray:
+    """Thresholds then (n_trades, total_pnl, hit_rate, max_drawdown) per combination, one trade at a time"""
+    columns, pnl, entries, exits = shared if shared is not None else _sweep_table
+    mask = np.all(columns[None, :, :] > block[:, :, None], axis=1)
+    metrics = np.empty((len(block), 4))
+    for row, signal in enumerate(mask):
+        taken = np.flatnonzero(signal)
+        trades = pnl[taken[chain_trades(entries[taken], exits[taken])]]
+        summary = summarize_trades(trades)
+        metrics[row] = (summary['n_trades'], summary['total_pnl'],
+                        np.nan if summary['hit_rate'] is None else summary['hit_rate'], summary['max_drawdown'])
+    return np.column_stack([block, metrics])
+
+
+def summarize_trades(pnl: np.ndarray) -> Dict:
+    """Total and average P&L, hit rate and maximum drawdown of cumulative P&L in trade order"""
+    if len(pnl) == 0:
+        return {'n_trades': 0, 'total_pnl': 0.0, 'mean_pnl': None, 'hit_rate': None,
+                'max_drawdown': 0.0, 'best_trade': None, 'worst_trade': None}
+    equity = np.cumsum(pnl)
+    drawdown = np.maximum.accumulate(np.maximum(equity, 0.0)) - equity
+    return {
+        'n_trades': len(pnl),
+        'total_pnl': float(equity[-1]),
+        'mean_pnl': float(pnl.mean()),
+        'hit_rate': float((pnl > 0).mean()),
+        'max_drawdown': float(drawdown.max()),
+        'best_trade': float(pnl.max()),
+        'worst_trade': float(pnl.min())
+    }
+
+
+def _iso(seconds: float) -> str:
+    return pd.Timestamp(int(seconds), unit='s').isoformat()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the ETH Options Analyzer
+"""
+
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from analysis_engine import IV_CAP, IV_FLOOR, ETHOptionsAnalyzer
+from backtest import StrategyBacktester, prepare_features
+from data_collector import ETHDataCollector
+from garch import GARCHModel
+from pricing_engine import black_scholes, black_scholes_price, implied_volatility
+from realized_vol import rolling_realized_volatility
+
+
+def legacy_monte_carlo_iv_simulation(analyzer, current_iv, n_simulations=10000, days=30):
+    """Original per-path, per-step loop kept as the benchmark baseline"""
+    np.random.seed(42)
+
+    dt = 1/252
+    simulated_ivs = []
+
+    for _ in range(n_simulations):
+        iv = current_iv
+        for day in range(days):
+            dW = np.random.normal(0, np.sqrt(dt))
+            div = analyzer.mean_reversion_speed * (analyzer.long_term_iv_mean - iv) * dt + analyzer.iv_volatility * dW
+            iv += div
+            iv = max(10, min(150, iv))
+
+        simulated_ivs.append(iv)
+
+    return np.array(simulated_ivs)
+
+
+def time_call(func, *args, repeat=3, **kwargs):
+    """Return the best wall-clock time of several calls in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_monte_carlo():
+    """Compare the vectorized Monte Carlo engine with the legacy loop"""
+    print("🎲 Benchmarking Monte Carlo IV simulation...")
+
+    analyzer = ETHOptionsAnalyzer()
+    current_iv = 65.4
+
+    legacy_time = time_call(legacy_monte_carlo_iv_simulation, analyzer, current_iv, repeat=1)
+    vectorized_time = time_call(analyzer.monte_carlo_iv_simulation, current_iv)
+    print(f"   10,000 paths - legacy loop: {legacy_time * 1000:.1f} ms")
+    print(f"   10,000 paths - vectorized:  {vectorized_time * 1000:.1f} ms "
+          f"({legacy_time / vectorized_time:.0f}x faster)")
+
+    for n_simulations in (100_000, 1_000_000):
+        elapsed = time_call(analyzer.monte_carlo_iv_simulation, current_iv, n_simulations=n_simulations, repeat=1)
+        print(f"   {n_simulations:,} paths - vectorized: {elapsed * 1000:.1f} ms")
+
+    analytic_time = time_call(analyzer.monte_carlo_iv_simulation, current_iv, method='analytic', repeat=100)
+    print(f"   closed-form analytic:     {analytic_time * 1e6:.1f} us")
+
+
+def benchmark_variance_reduction():
+    """Compare paths and time needed to reach a target standard error"""
+    print("\n📉 Benchmarking variance reduction (target stderr 0.02)...")
+
+    for variance_reduction in (None, 'antithetic', 'sobol', 'control_variate'):
+        analyzer = ETHOptionsAnalyzer(variance_reduction=variance_reduction)
+        start = time.perf_counter()
+        result = analyzer.monte_carlo_iv_simulation(65.4, target_stderr=0.02)
+        elapsed = time.perf_counter() - start
+        print(f"   {str(variance_reduction):<16} {result['mc_paths_used']:>9,} paths  "
+              f"{elapsed * 1000:7.1f} ms  stderr {result['mc_max_stderr']:.4f} "
+              f"({', '.join(result['mc_stderr_targets'])})")
+
+
+def benchmark_sharded_monte_carlo(n_simulations=10_000_000):
+    """Measure process-pool scaling of the sharded Monte Carlo engine"""
+    print(f"\n🧩 Benchmarking sharded Monte Carlo ({n_simulations:,} paths, {os.cpu_count()} cores)...")
+
+    analyzer = ETHOptionsAnalyzer()
+    worker_counts = [n for n in (1, 2, 4, 8, 16) if n <= (os.cpu_count() or 1)]
+    baseline = None
+
+    for n_workers in worker_counts:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            # Warm the pool so worker start-up is not timed
+            analyzer.monte_carlo_iv_sharded(65.4, n_simulations=n_workers, n_workers=n_workers, executor=executor)
+            elapsed = time_call(analyzer.monte_carlo_iv_sharded, 65.4, n_simulations=n_simulations,
+                                n_workers=n_workers, executor=executor, repeat=1)
+        baseline = baseline or elapsed
+        print(f"   {n_workers:>2} workers: {elapsed:6.2f} s  speedup {baseline / elapsed:4.1f}x  "
+              f"efficiency {baseline / elapsed / n_workers:4.0%}")
+
+
+def benchmark_black_scholes(n_options=1_000_000):
+    """Measure vectorized Black-Scholes throughput on a synthetic chain"""
+    print(f"\n💲 Benchmarking Black-Scholes pricing ({n_options:,} options)...")
+
+    rng = np.random.default_rng(0)
+    spot = np.full(n_options, 3600.0)
+    strike = rng.uniform(2000, 5000, n_options)
+    time_to_expiry = rng.uniform(1, 365, n_options) / 365
+    vol = rng.uniform(0.3, 1.2, n_options)
+    is_call = rng.random(n_options) < 0.5
+
+    for func in (black_scholes_price, black_scholes):
+        elapsed = time_call(func, spot, strike, time_to_expiry, vol, 0.0, is_call)
+        print(f"   {func.__name__:<20} {elapsed * 1000:7.1f} ms  {n_options / elapsed / 1e6:5.1f}M options/s")
+
+
+def benchmark_implied_volatility(n_quotes=100_000):
+    """Measure batch implied-volatility inversion on synthetic quotes"""
+    print(f"\n🔁 Benchmarking implied volatility solver ({n_quotes:,} quotes)...")
+
+    rng = np.random.default_rng(1)
+    spot = np.full(n_quotes, 3600.0)
+    strike = rng.uniform(2000, 6000, n_quotes)
+    time_to_expiry = rng.uniform(1, 365, n_quotes) / 365
+    vol = rng.uniform(0.3, 1.2, n_quotes)
+    is_call = rng.random(n_quotes) < 0.5
+    prices = black_scholes_price(spot, strike, time_to_expiry, vol, 0.0, is_call)
+
+    elapsed = time_call(implied_volatility, prices, spot, strike, time_to_expiry, 0.0, is_call)
+    result = implied_volatility(prices, spot, strike, time_to_expiry, 0.0, is_call)
+    print(f"   {elapsed * 1000:.1f} ms  {n_quotes / elapsed / 1e6:.2f}M quotes/s  "
+          f"converged {result['converged'].mean():.2%}  iterations {result['iterations']}")
+
+
+def benchmark_realized_volatility(n_prices=5 * 365, windows=(1, 7, 30, 60, 90)):
+    """Compare the single-pass RV kernel with one legacy call per window"""
+    print(f"\n📏 Benchmarking realized volatility ({n_prices:,} daily prices, {len(windows)} windows)...")
+
+    rng = np.random.default_rng(2)
+    prices = list(3600 * np.exp(np.cumsum(rng.normal(0, 0.03, n_prices))))
+    collector = ETHDataCollector()
+
+    def legacy():
+        for window in windows:
+            returns = [np.log(prices[i] / prices[i - 1]) for i in range(1, len(prices))]
+            np.std(returns[-window:]) * np.sqrt(252) * 100
+
+    legacy_time = time_call(legacy)
+    latest_time = time_call(collector.calculate_realized_volatilities, prices, windows)
+    series_time = time_call(rolling_realized_volatility, prices, windows)
+    print(f"   legacy loop per window:  {legacy_time * 1000:.2f} ms")
+    print(f"   single pass (latest):    {latest_time * 1000:.2f} ms ({legacy_time / latest_time:.0f}x faster)")
+    print(f"   single pass (full series): {series_time * 1000:.2f} ms")
+
+
+def benchmark_garch_fit(n_returns=5 * 365):
+    """Measure cold and warm-started GJR-GARCH maximum-likelihood fits"""
+    print(f"\n📈 Benchmarking GJR-GARCH(1,1) fit ({n_returns:,} daily returns)...")
+
+    rng = np.random.default_rng(3)
+    returns = rng.standard_t(5, n_returns) * 0.03
+
+    cold_time = time_call(lambda: GARCHModel().fit(returns))
+    model = GARCHModel()
+    model.fit(returns[:-1])
+    warm_time = time_call(model.fit, returns)
+    print(f"   cold start: {cold_time * 1000:.1f} ms")
+    print(f"   warm start: {warm_time * 1000:.1f} ms  forecasts {', '.join(f'{h}d {vol:.1f}%' for h, vol in model.forecast().items())}")
+
+
+def benchmark_backtest(years=5):
+    """Measure a backtest of the entry rules over hourly synthetic snapshots"""
+    n_snapshots = years * 365 * 24
+    print(f"\n🔙 Benchmarking strategy backtest ({n_snapshots:,} hourly snapshots)...")
+
+    rng = np.random.default_rng(4)
+    hourly_vol = 1 / np.sqrt(365 * 24)
+    iv = 60 + np.cumsum(rng.normal(0, 30 * hourly_vol, n_snapshots))
+    history = pd.DataFrame({
+        'timestamp': pd.date_range('2020-01-01', periods=n_snapshots, freq='h'),
+        'eth_price': 3600 * np.exp(np.cumsum(rng.normal(0, 0.7 * hourly_vol, n_snapshots))),
+        'eth_iv_deribit': np.clip(iv, 20, 150),
+        'eth_rv_30d': np.clip(iv, 20, 150) - rng.normal(4, 5, n_snapshots)
+    })
+
+    features_time = time_call(prepare_features, history)
+    features = prepare_features(history)
+    for overlapping in (False, True):
+        backtester = StrategyBacktester(overlapping=overlapping)
+        elapsed = time_call(backtester.run, features)
+        trades = sum(r['n_trades'] for r in backtester.run(features)['strategies'].values())
+        print(f"   overlapping={str(overlapping):<5} {elapsed * 1000:7.1f} ms  {trades:,} trades")
+    print(f"   feature preparation:    {features_time * 1000:.1f} ms")
+
+    grid = {'vrp': np.arange(0, 10, 0.5), 'ivr': np.arange(0, 1, 0.05), 'abs_vrp': (0, 3, 5)}
+    n_combinations = 20 * 20 * 3
+    for overlapping in (False, True):
+        elapsed = time_call(StrategyBacktester(overlapping=overlapping).sweep, features, 'short_put_spread', grid,
+                            repeat=1)
+        print(f"   sweep of {n_combinations:,} thresholds, overlapping={str(overlapping):<5} {elapsed * 1000:7.1f} ms")
+
+
+def benchmark_portfolio_risk():
+    """Measure portfolio VaR/ES and the share of it spent simulating joint spot/IV paths"""
+    print("\n🛡️  Benchmarking portfolio VaR/ES...")
+
+    analyzer = ETHOptionsAnalyzer()
+    market_data = {'eth_price': 3614.96, 'eth_iv_deribit': 65.4, 'eth_rv_30d': 59.0, 'vix': 17.73}
+    results = analyzer.comprehensive_analysis(market_data)
+    positions = results['trading_positions']
+
+    simulate_time = time_call(analyzer.risk_engine.simulate_paths, 3614.96, 65.4, analyzer._iv_model(),
+                              (IV_FLOOR, IV_CAP))
+    total_time = time_call(analyzer.portfolio_risk, positions, 3614.96, 65.4)
+    print(f"   {analyzer.risk_engine.n_paths:,} paths, {sum(len(p['legs']) for p in positions)} legs")
+    print(f"   simulate paths:     {simulate_time * 1000:.1f} ms")
+    print(f"   simulate + reprice: {total_time * 1000:.1f} ms")
+
+
+def main():
+    """Run all benchmarks"""
+    print("⏱️  ETH Options Analyzer - Benchmarks")
+    print("=" * 50)
+
+    benchmarks = [
+        benchmark_monte_carlo,
+        benchmark_variance_reduction,
+        benchmark_sharded_monte_carlo,
+        benchmark_black_scholes,
+        benchmark_implied_volatility,
+        benchmark_realized_volatility,
+        benchmark_garch_fit,
+        benchmark_backtest,
+        benchmark_portfolio_risk,
+    ]
+
+    for benchmark in benchmarks:
+        benchmark()
+
+    print("\n" + "=" * 50)
+    print("✅ Benchmarks completed")
+
+
+if __name__ == '__main__':
+    main()
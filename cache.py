@@ -0,0 +1,244 @@
+"""
+ETH Options Result Cache
+Bounded in-memory caching with LRU and TTL eviction, stale-while-revalidate freshness and
+coalescing of concurrent identical calls
+"""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Thread-safe mapping bounded by size (least recently used evicted first) and entry age
+
+    Ages are measured with clock, which returns the current time in seconds
+    (time.monotonic unless replaced in tests).
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value and mark it recently used, or default on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0]):
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and self.clock() - stored_at > self.ttl
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+class StaleWhileRevalidateCache:
+    """Latest value per key, judged against that key's TTL and maximum staleness
+
+    Up to ttl seconds old a value is fresh. Past it and up to max_stale it
+    is stale: still served, with one background refresh claimed by the first
+    caller to see it. Beyond max_stale it is expired and must be fetched
+    before use. Keys without a policy use default_policy. clock returns
+    the current time in seconds (time.monotonic unless replaced in tests).
+    """
+
+    def __init__(self, policies: Optional[Dict[Hashable, Tuple[float, float]]] = None,
+                 default_policy: Tuple[float, float] = (60.0, 300.0),
+                 clock: Callable[[], float] = time.monotonic):
+        self.policies = dict(policies or {})
+        self.default_policy = default_policy
+        self.clock = clock
+        self._entries = {}  # key -> (stored_at monotonic, fetched_at UTC datetime, value)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.fresh_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.refreshes = 0
+
+    def lookup(self, key: Hashable) -> Tuple[str, Any, Optional[datetime]]:
+        """State ('fresh', 'stale', 'expired' or 'miss'), value and UTC fetch time of a key
+
+        The value is None for 'expired' and 'miss'.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return 'miss', None, None
+
+            stored_at, fetched_at, value = entry
+            ttl, max_stale = self.policies.get(key, self.default_policy)
+            age = self.clock() - stored_at
+            if age <= ttl:
+                self.fresh_hits += 1
+                return 'fresh', value, fetched_at
+            if age <= max_stale:
+                self.stale_hits += 1
+                return 'stale', value, fetched_at
+            self.misses += 1
+            self.expirations += 1
+            return 'expired', None, None
+
+    def set(self, key: Hashable, value: Any):
+        """Store a freshly fetched value"""
+        with self._lock:
+            self._entries[key] = (self.clock(), datetime.utcnow(), value)
+
+    def claim_refresh(self, key: Hashable) -> bool:
+        """Whether the caller should refresh key in the background (False if a refresh is already running)"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self.refreshes += 1
+            return True
+
+    def release_refresh(self, key: Hashable):
+        """Mark the background refresh of key as finished, whatever its outcome"""
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def clear(self):
+        """Drop all entries, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Counters for monitoring, with the age of each entry in seconds"""
+        with self._lock:
+            now = self.clock()
+            lookups = self.fresh_hits + self.stale_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'fresh_hits': self.fresh_hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_rate': (self.fresh_hits + self.stale_hits) / lookups if lookups else None,
+                'expirations': self.expirations,
+                'background_refreshes': self.refreshes,
+                'refreshing': sorted(str(key) for key in self._refreshing),
+                'ages': {str(key): now - stored_at for key, (stored_at, _, _) in self._entries.items()}
+            }
+
+
+class _Flight:
+    """One in-flight call and the outcome its waiters receive"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; callers arriving meanwhile wait for it and share its outcome
+
+    Nothing is kept once the call finishes, so later callers start a fresh
+    call. Exceptions are shared like values.
+    """
+
+    def __init__(self):
+        self._flights = {}  # key -> _Flight of the call in progress
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+        self._coalesced_by_key = Counter()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Result of fn() and whether it came from another caller's call"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+                self._coalesced_by_key[key] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, True
+
+        try:
+            flight.value = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value, False
+
+    def stats(self) -> Dict:
+        """Counters for monitoring; coalesced is the number of calls saved"""
+        with self._lock:
+            calls = self.executions + self.coalesced
+            return {
+                'in_flight': len(self._flights),
+                'executions': self.executions,
+                'coalesced': self.coalesced,
+                'coalesced_rate': self.coalesced / calls if calls else None,
+                'coalesced_by_key': {str(key): count for key, count in self._coalesced_by_key.items()}
+            }
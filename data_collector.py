@@ -3,65 +3,235 @@ ETH Options Data Collector
 Real-time data collection from multiple sources
 """
 
+import asyncio
 import requests
 import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial
 import numpy as np
 import pandas as pd
-from typing import Dict, Optional, List
+from requests.adapters import HTTPAdapter
+from typing import Any, Callable, Dict, Optional, List, Tuple
 import logging
 
+from cache import SingleFlight, StaleWhileRevalidateCache
+from price_history import DAY_SECONDS, PriceHistoryStore, price_history_path
+from realized_vol import CRYPTO_PERIODS_PER_YEAR, RANGE_ESTIMATORS, StreamingRealizedVariance, realized_volatility
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Realized volatility windows (days) reported per asset
+ETH_RV_WINDOWS = (1, 7, 30)
+BTC_RV_WINDOWS = (7, 30)
+
+# Daily closes read from each asset's price history for realized volatility
+ETH_HISTORY_DAYS = 90
+BTC_HISTORY_DAYS = 30
+
+# Days requested when a price history is empty (the CoinGecko public API serves up to a year of dailies)
+PRICE_HISTORY_BACKFILL_DAYS = 365
+
+# CoinGecko ids of the assets with a local price history
+PRICE_HISTORY_ASSETS = ('ethereum', 'bitcoin')
+
+# Snapshot fields served from intraday windows once those windows hold a full set of bars
+INTRADAY_RV_FIELDS = {'eth_rv_1d': '1d', 'eth_rv_7d': '7d', 'eth_rv_30d': '30d'}
+
+# Bars requested per Deribit chart-data call when backfilling intraday history
+INTRADAY_FETCH_BARS = 5000
+
+# Intraday ETH bars accumulated across collector instances
+eth_intraday_rv = StreamingRealizedVariance()
+
+# Serializes updates and reads of the intraday accumulators
+intraday_rv_lock = threading.Lock()
+
+# Deadline (seconds) of each upstream source in collect_all_data; a source past it is reported as timed out
+SOURCE_DEADLINES = {
+    'eth_price': 10,
+    'eth_history': 15,
+    'deribit_iv': 10,
+    'option_chain': 10,
+    'intraday_rv': 20,
+    'btc_history': 15,
+    'vix': 10
+}
+
+# (TTL, maximum staleness) in seconds of each source's cached value: fresh values are served
+# without a fetch, stale ones are served while a background refresh runs, older ones are refetched
+SOURCE_CACHE_POLICIES = {
+    'eth_price': (15, 120),
+    'eth_history': (3600, 86400),
+    'deribit_iv': (5, 60),
+    'option_chain': (30, 300),
+    'intraday_rv': (60, 900),
+    'btc_history': (3600, 86400),
+    'vix': (30, 900)
+}
+
+# Snapshot fields derived from each source, for per-field freshness
+SOURCE_FIELDS = {
+    'eth_price': ('eth_price',),
+    'deribit_iv': ('eth_iv_deribit',),
+    'option_chain': ('option_chain',),
+    'btc_history': ('btc_rv_7d', 'btc_rv_30d'),
+    'vix': ('vix',)
+}
+
+# Keep-alive connections per upstream host
+HTTP_POOL_SIZE = 16
+
+# Threads running blocking fetches; callers coalesced onto another's fetch hold a thread while they wait
+FETCH_WORKERS = 4 * HTTP_POOL_SIZE
+
+
+def create_session() -> requests.Session:
+    """HTTP session with connection pools sized for concurrent fetches"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'User-Agent': 'ETH-Options-Dashboard/1.0'
+    })
+    return session
+
+
+# One pooled HTTP client and fetch pool shared by every collector, so connections survive across requests
+http_session = create_session()
+fetch_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='eth-fetch')
+
+# Coalesces concurrent fetches of the same source by collectors on the shared session and accumulator
+source_flights = SingleFlight()
+
+# Latest value of each source for the same collectors
+source_cache = StaleWhileRevalidateCache(SOURCE_CACHE_POLICIES)
+
+# Persisted daily closes for the same collectors
+price_histories = {asset: PriceHistoryStore(asset, price_history_path(asset)) for asset in PRICE_HISTORY_ASSETS}
+
 class ETHDataCollector:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'ETH-Options-Dashboard/1.0'
-        })
+    def __init__(self, periods_per_year: float = CRYPTO_PERIODS_PER_YEAR, rv_estimator: Optional[str] = 'yang_zhang',
+                 intraday_rv: Optional[StreamingRealizedVariance] = None, session: Optional[requests.Session] = None,
+                 deadlines: Optional[Dict[str, float]] = None, flights: Optional[SingleFlight] = None,
+                 cache: Optional[StaleWhileRevalidateCache] = None,
+                 histories: Optional[Dict[str, PriceHistoryStore]] = None):
+        """Create a collector
         
+        periods_per_year annualizes daily realized vols (365 for crypto, 252
+        for equity conventions). rv_estimator picks the intraday estimator
+        that replaces daily close-to-close RV once its window is full, or
+        None to always use daily closes. intraday_rv defaults to the shared
+        ETH accumulator and session to the shared pooled HTTP client.
+        deadlines overrides entries of SOURCE_DEADLINES. flights coalesces
+        concurrent fetches of a source, cache keeps each source's latest
+        value and histories holds the daily closes per CoinGecko asset;
+        collectors on the shared session and accumulator default to the
+        shared source_flights, source_cache and persisted price_histories,
+        others to their own in-memory ones.
+        """
+        if rv_estimator is not None and rv_estimator not in RANGE_ESTIMATORS:
+            raise ValueError(f"rv_estimator must be one of {RANGE_ESTIMATORS} or None")
+        self.periods_per_year = periods_per_year
+        self.rv_estimator = rv_estimator
+        self.intraday_rv = intraday_rv if intraday_rv is not None else eth_intraday_rv
+        self.session = session if session is not None else http_session
+        self.deadlines = {**SOURCE_DEADLINES, **(deadlines or {})}
+        shared = session is None and intraday_rv is None
+        self.flights = flights if flights is not None else source_flights if shared else SingleFlight()
+        self.cache = cache if cache is not None else (
+            source_cache if shared else StaleWhileRevalidateCache(SOURCE_CACHE_POLICIES))
+        self.histories = histories if histories is not None else (
+            price_histories if shared else {asset: PriceHistoryStore(asset) for asset in PRICE_HISTORY_ASSETS})
+    
+    def _guarded(self, fetch: Callable, default: Any, label: str) -> Any:
+        """Result of a raising fetch, or default after logging its error"""
+        try:
+            return fetch()
+        except Exception as e:
+            logger.error(f"Error fetching {label}: {e}")
+            return default
+    
+    def fetch_eth_price(self, timeout: float = 10) -> float:
+        """Current ETH price from CoinGecko; raises on failure"""
+        url = "https://api.coingecko.com/api/v3/simple/price"
+        params = {
+            'ids': 'ethereum',
+            'vs_currencies': 'usd'
+        }
+        response = self.session.get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        return data['ethereum']['usd']
+    
     def get_eth_price(self) -> Optional[float]:
         """Get current ETH price from CoinGecko"""
-        try:
-            url = "https://api.coingecko.com/api/v3/simple/price"
-            params = {
-                'ids': 'ethereum',
-                'vs_currencies': 'usd'
+        return self._guarded(self.fetch_eth_price, None, "ETH price")
+    
+    def fetch_deribit_iv_data(self, timeout: float = 10) -> Dict:
+        """Latest ETH volatility index value from Deribit; raises on failure"""
+        # Deribit public API for volatility index
+        url = "https://www.deribit.com/api/v2/public/get_volatility_index_data"
+        params = {
+            'currency': 'ETH',
+            'start_timestamp': int((datetime.now() - timedelta(days=1)).timestamp() * 1000),
+            'end_timestamp': int(datetime.now().timestamp() * 1000)
+        }
+        response = self.session.get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        
+        if data.get('result') and len(data['result']) > 0:
+            latest = data['result'][-1]
+            return {
+                'eth_iv_deribit': latest[1],  # volatility value
+                'timestamp': datetime.fromtimestamp(latest[0] / 1000)
             }
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            return data['ethereum']['usd']
-        except Exception as e:
-            logger.error(f"Error fetching ETH price: {e}")
-            return None
+        return {'eth_iv_deribit': None}
     
     def get_deribit_iv_data(self) -> Dict:
         """Get ETH implied volatility data from Deribit"""
-        try:
-            # Deribit public API for volatility index
-            url = "https://www.deribit.com/api/v2/public/get_volatility_index_data"
-            params = {
-                'currency': 'ETH',
-                'start_timestamp': int((datetime.now() - timedelta(days=1)).timestamp() * 1000),
-                'end_timestamp': int(datetime.now().timestamp() * 1000)
-            }
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+        return self._guarded(self.fetch_deribit_iv_data, {'eth_iv_deribit': None}, "Deribit IV data")
+    
+    def fetch_deribit_option_chain(self, timeout: float = 10) -> List[Dict]:
+        """ETH option chain mark prices from Deribit; raises on failure"""
+        url = "https://www.deribit.com/api/v2/public/get_book_summary_by_currency"
+        params = {
+            'currency': 'ETH',
+            'kind': 'option'
+        }
+        response = self.session.get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        
+        now = datetime.utcnow()
+        chain = []
+        for summary in data.get('result', []):
+            # Instrument names look like ETH-27DEC24-3600-C
+            _, expiry, strike, option_type = summary['instrument_name'].split('-')
+            expiry_time = datetime.strptime(expiry, '%d%b%y') + timedelta(hours=8)  # 08:00 UTC expiry
+            mark_price = summary.get('mark_price')
+            underlying_price = summary.get('underlying_price')
+            if mark_price is None or not underlying_price or expiry_time <= now:
+                continue
             
-            if data.get('result') and len(data['result']) > 0:
-                latest = data['result'][-1]
-                return {
-                    'eth_iv_deribit': latest[1],  # volatility value
-                    'timestamp': datetime.fromtimestamp(latest[0] / 1000)
-                }
-            return {'eth_iv_deribit': None}
-        except Exception as e:
-            logger.error(f"Error fetching Deribit IV data: {e}")
-            return {'eth_iv_deribit': None}
+            chain.append({
+                'instrument_name': summary['instrument_name'],
+                'strike': float(strike),
+                'dte': (expiry_time - now).total_seconds() / 86400,
+                'option_type': 'call' if option_type == 'C' else 'put',
+                'price': mark_price * underlying_price,  # Deribit marks are quoted in ETH
+                'underlying_price': underlying_price
+            })
+        return chain
+    
+    def get_deribit_option_chain(self) -> List[Dict]:
+        """Get ETH option chain mark prices from Deribit"""
+        return self._guarded(self.fetch_deribit_option_chain, [], "Deribit option chain")
     
     def get_binance_options_data(self) -> Dict:
         """Get ETH options data from Binance (simulated for now)"""
@@ -79,85 +249,157 @@ class ETHDataCollector:
     
     def calculate_realized_volatility(self, prices: List[float], window: int = 30) -> float:
         """Calculate realized volatility from price series"""
-        if len(prices) < window + 1:
-            return None
+        return self.calculate_realized_volatilities(prices, (window,))[window]
+    
+    def calculate_realized_volatilities(self, prices: List[float], windows=ETH_RV_WINDOWS) -> Dict[int, Optional[float]]:
+        """Latest realized volatility for several windows from one pass over the price series"""
+        return realized_volatility(prices, windows, self.periods_per_year)
+    
+    def fetch_market_chart(self, coin_id: str, days: int, timeout: float = 15) -> Tuple[np.ndarray, np.ndarray]:
+        """Timestamps (epoch seconds) and USD prices of a CoinGecko coin's daily chart; raises on failure"""
+        url = f"https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart"
+        params = {
+            'vs_currency': 'usd',
+            'days': days,
+            'interval': 'daily'
+        }
+        response = self.session.get(url, params=params, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
         
-        # Calculate log returns
-        returns = []
-        for i in range(1, len(prices)):
-            returns.append(np.log(prices[i] / prices[i-1]))
+        points = np.array(data['prices'], dtype=float).reshape(-1, 2)
+        return points[:, 0] / 1000, points[:, 1]
+    
+    def fetch_historical_prices(self, coin_id: str, days: int, timeout: float = 15) -> List[float]:
+        """Daily USD closes of a CoinGecko coin; raises on failure"""
+        return self.fetch_market_chart(coin_id, days, timeout)[1].tolist()
+    
+    def sync_price_history(self, coin_id: str, timeout: float = 15) -> int:
+        """Fetch only the daily closes the coin's local history lacks; returns the number of new closes
         
-        # Take last 'window' returns
-        recent_returns = returns[-window:]
+        An empty history is backfilled with PRICE_HISTORY_BACKFILL_DAYS.
+        Otherwise the request covers the tail since the last stored close,
+        reaching back to the first gap on the first sync after loading.
+        Raises on failure.
+        """
+        history = self.histories[coin_id]
+        start = history.fetch_start(backfill_gaps=not history.backfilled)
+        if start is None:
+            days = PRICE_HISTORY_BACKFILL_DAYS
+        else:
+            days = min(int((time.time() - start) // DAY_SECONDS) + 1, PRICE_HISTORY_BACKFILL_DAYS)
         
-        # Calculate annualized volatility
-        volatility = np.std(recent_returns) * np.sqrt(252) * 100
-        return volatility
+        added = history.merge(*self.fetch_market_chart(coin_id, max(days, 1), timeout))
+        history.backfilled = True
+        if added:
+            history.save()
+        return added
+    
+    def historical_prices(self, coin_id: str, days: int) -> List[float]:
+        """Last `days` daily closes from the coin's local history, then the latest quote"""
+        return self.histories[coin_id].closes(days).tolist()
     
-    def get_eth_historical_prices(self, days: int = 90) -> List[float]:
+    def get_eth_historical_prices(self, days: int = ETH_HISTORY_DAYS) -> List[float]:
         """Get ETH historical prices for volatility calculation"""
-        try:
-            url = "https://api.coingecko.com/api/v3/coins/ethereum/market_chart"
+        self._guarded(partial(self.sync_price_history, 'ethereum'), 0, "ETH historical prices")
+        return self.historical_prices('ethereum', days)
+    
+    def fetch_intraday_bars(self, timeout: float = 15) -> int:
+        """Feed completed ETH-PERPETUAL bars from Deribit that the intraday accumulator has not seen
+        
+        Bars are added as each chunk arrives, so a failure part way keeps
+        what was fetched before it; the accumulator is locked only while a
+        chunk is added, not during the request. Raises on failure.
+        """
+        accumulator = self.intraday_rv
+        bar_ms = accumulator.bar_seconds * 1000
+        url = "https://www.deribit.com/api/v2/public/get_tradingview_chart_data"
+        now_ms = int(time.time() * 1000)
+        last_complete_ms = now_ms - now_ms % bar_ms - bar_ms  # Start of the latest finished bar
+        if accumulator.last_bar_time is not None:
+            start_ms = int(accumulator.last_bar_time * 1000) + bar_ms
+        else:
+            start_ms = last_complete_ms - accumulator.capacity * bar_ms
+        
+        added = 0
+        while start_ms <= last_complete_ms:
+            end_ms = min(start_ms + (INTRADAY_FETCH_BARS - 1) * bar_ms, last_complete_ms)
             params = {
-                'vs_currency': 'usd',
-                'days': days,
-                'interval': 'daily'
+                'instrument_name': 'ETH-PERPETUAL',
+                'start_timestamp': start_ms,
+                'end_timestamp': end_ms,
+                'resolution': str(accumulator.bar_seconds // 60)
             }
-            response = self.session.get(url, params=params, timeout=15)
+            response = self.session.get(url, params=params, timeout=timeout)
             response.raise_for_status()
-            data = response.json()
+            result = response.json().get('result', {})
             
-            prices = [price[1] for price in data['prices']]
-            return prices
-        except Exception as e:
-            logger.error(f"Error fetching ETH historical prices: {e}")
-            return []
+            with intraday_rv_lock:
+                for tick, open_, high, low, close in zip(result.get('ticks', []), result.get('open', []),
+                                                         result.get('high', []), result.get('low', []),
+                                                         result.get('close', [])):
+                    if tick <= last_complete_ms:
+                        added += accumulator.add_bar(open_, high, low, close, tick / 1000)
+            start_ms = end_ms + bar_ms
+        return added
+    
+    def update_intraday_rv(self) -> int:
+        """Feed completed ETH-PERPETUAL bars from Deribit that the intraday accumulator has not seen"""
+        return self._guarded(self.fetch_intraday_bars, 0, "ETH intraday bars")
+    
+    def intraday_rv_fields(self) -> Dict:
+        """Snapshot RV fields from the intraday windows that hold a full set of bars
+        
+        Waits for a chunk being added by another thread, so half-updated
+        sums are never read.
+        """
+        if self.rv_estimator is None:
+            return {}
+        with intraday_rv_lock:
+            fields = {}
+            for field, window in INTRADAY_RV_FIELDS.items():
+                if window in self.intraday_rv.window_names and self.intraday_rv.is_ready(window):
+                    fields[field] = self.intraday_rv.volatility(window)[self.rv_estimator]
+            return fields
+    
+    def get_intraday_realized_volatility(self) -> Dict:
+        """Snapshot RV fields from full intraday windows, with the source used for each"""
+        if self.rv_estimator is None:
+            return {}
+        
+        self.update_intraday_rv()
+        return self.intraday_rv_fields()
+    
+    def btc_realized_volatility(self, prices: List[float]) -> Dict:
+        """BTC 7-day and 30-day realized volatility from daily closes"""
+        rv = self.calculate_realized_volatilities(prices, BTC_RV_WINDOWS)
+        return {
+            'btc_rv_7d': rv[7],
+            'btc_rv_30d': rv[30]
+        }
     
     def get_btc_realized_volatility(self) -> Dict:
         """Get BTC realized volatility for comparison"""
-        try:
-            # Get BTC historical prices
-            url = "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart"
-            params = {
-                'vs_currency': 'usd',
-                'days': 30,
-                'interval': 'daily'
-            }
-            response = self.session.get(url, params=params, timeout=15)
-            response.raise_for_status()
-            data = response.json()
-            
-            prices = [price[1] for price in data['prices']]
-            
-            # Calculate 7-day and 30-day RV
-            rv_7d = self.calculate_realized_volatility(prices, 7)
-            rv_30d = self.calculate_realized_volatility(prices, 30)
-            
-            return {
-                'btc_rv_7d': rv_7d,
-                'btc_rv_30d': rv_30d
-            }
-        except Exception as e:
-            logger.error(f"Error fetching BTC volatility: {e}")
-            return {'btc_rv_7d': None, 'btc_rv_30d': None}
+        self._guarded(partial(self.sync_price_history, 'bitcoin'), 0, "BTC volatility")
+        return self.btc_realized_volatility(self.historical_prices('bitcoin', BTC_HISTORY_DAYS))
+    
+    def fetch_vix(self, timeout: float = 10) -> Optional[float]:
+        """Current VIX level from Yahoo Finance; raises on failure"""
+        # Using Yahoo Finance API for VIX
+        url = "https://query1.finance.yahoo.com/v8/finance/chart/%5EVIX"
+        response = self.session.get(url, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+        
+        if 'chart' in data and 'result' in data['chart'] and len(data['chart']['result']) > 0:
+            result = data['chart']['result'][0]
+            if 'meta' in result and 'regularMarketPrice' in result['meta']:
+                return result['meta']['regularMarketPrice']
+        return None
     
     def get_vix_data(self) -> Optional[float]:
         """Get current VIX level"""
-        try:
-            # Using Yahoo Finance API for VIX
-            url = "https://query1.finance.yahoo.com/v8/finance/chart/%5EVIX"
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'chart' in data and 'result' in data['chart'] and len(data['chart']['result']) > 0:
-                result = data['chart']['result'][0]
-                if 'meta' in result and 'regularMarketPrice' in result['meta']:
-                    return result['meta']['regularMarketPrice']
-            return None
-        except Exception as e:
-            logger.error(f"Error fetching VIX data: {e}")
-            return None
+        return self._guarded(self.fetch_vix, None, "VIX data")
     
     def get_move_index(self) -> Optional[float]:
         """Get MOVE index (bond volatility)"""
@@ -185,28 +427,118 @@ class ETHDataCollector:
             logger.error(f"Error fetching options flow: {e}")
             return {}
     
-    def collect_all_data(self) -> Dict:
-        """Collect all market data in one call"""
-        logger.info("Starting comprehensive data collection...")
+    def source_fetchers(self) -> Dict[str, Callable]:
+        """Raising fetch for each upstream source of collect_all_data, keyed like SOURCE_DEADLINES"""
+        fetchers = {
+            'eth_price': self.fetch_eth_price,
+            'eth_history': partial(self.sync_price_history, 'ethereum'),
+            'deribit_iv': self.fetch_deribit_iv_data,
+            'option_chain': self.fetch_deribit_option_chain,
+            'intraday_rv': self.fetch_intraday_bars,
+            'btc_history': partial(self.sync_price_history, 'bitcoin'),
+            'vix': self.fetch_vix
+        }
+        if self.rv_estimator is None:
+            del fetchers['intraday_rv']
+        return fetchers
+    
+    def _fetch_and_store(self, name: str, fetch: Callable) -> Tuple[Any, bool, datetime]:
+        """Fetch a source through the single-flight layer and cache the result"""
+        value, coalesced = self.flights.do(name, partial(fetch, timeout=self.deadlines[name]))
+        if not coalesced:
+            self.cache.set(name, value)
+        return value, coalesced, datetime.utcnow()
+    
+    def _refresh_in_background(self, name: str, fetch: Callable):
+        try:
+            self._fetch_and_store(name, fetch)
+        except Exception as e:
+            logger.error(f"Background refresh of {name} failed: {e}")
+        finally:
+            self.cache.release_refresh(name)
+    
+    async def fetch_source(self, name: str, fetch: Callable) -> Tuple[Any, Dict]:
+        """Cached value of a source, or one blocking fetch on the shared pool under its deadline
         
-        # Get current ETH price
-        eth_price = self.get_eth_price()
+        A fresh cached value is returned as is. A stale one is returned at
+        once while a background refresh runs. Otherwise the source is
+        fetched. Returns the value (None unless one was available) and a
+        status record with the outcome ('ok', 'error' or 'timeout'), the
+        cache state, the UTC time the value was fetched, the elapsed time,
+        and whether a fetch was shared from a concurrent caller.
+        
+        A fetch past its deadline is abandoned by this call but keeps its
+        worker thread until it returns (its HTTP timeout equals the
+        deadline). Nothing is cached for a timed-out source, so the next
+        call is a 'miss' again: while the abandoned fetch is still running
+        it joins that fetch through the single-flight layer, otherwise it
+        starts a new one, and either way it waits up to the full deadline
+        again. If the abandoned fetch does return, its value is cached and
+        served to later calls as usual.
+        """
+        deadline = self.deadlines[name]
+        start = time.perf_counter()
+        state, value, fetched_at = self.cache.lookup(name)
+        if state in ('fresh', 'stale'):
+            if state == 'stale' and self.cache.claim_refresh(name):
+                fetch_executor.submit(self._refresh_in_background, name, fetch)
+            status = {'status': 'ok', 'cache': state, 'coalesced': False}
+        else:
+            loop = asyncio.get_running_loop()
+            call = partial(self._fetch_and_store, name, fetch)
+            try:
+                value, coalesced, fetched_at = await asyncio.wait_for(loop.run_in_executor(fetch_executor, call),
+                                                                      deadline)
+                status = {'status': 'ok', 'cache': state, 'coalesced': coalesced}
+            except asyncio.TimeoutError:
+                logger.error(f"Timed out fetching {name} after {deadline}s")
+                value, status = None, {'status': 'timeout', 'cache': state, 'error': f"no response within {deadline}s"}
+            except Exception as e:
+                logger.error(f"Error fetching {name}: {e}")
+                value, status = None, {'status': 'error', 'cache': state, 'error': str(e)}
+        status['fetched_at'] = fetched_at
+        status['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        return value, status
+    
+    async def fetch_sources(self, fetchers: Dict[str, Callable]) -> Tuple[Dict[str, Any], Dict[str, Dict]]:
+        """Fetch every source concurrently; returns values and statuses keyed by source"""
+        outcomes = await asyncio.gather(*(self.fetch_source(name, fetch) for name, fetch in fetchers.items()))
+        values = {name: value for name, (value, _) in zip(fetchers, outcomes)}
+        statuses = {name: status for name, (_, status) in zip(fetchers, outcomes)}
+        return values, statuses
+    
+    async def collect_all_data_async(self) -> Dict:
+        """Collect all market data with every upstream fetched at the same time
+        
+        Latency is bounded by the slowest uncached source or its deadline.
+        Failed sources leave their fields empty, as the individual getters
+        do, 'source_status' records the outcome of each, and 'freshness'
+        gives the fetch time and age of each field.
+        """
+        logger.info("Starting comprehensive data collection...")
+        start = time.perf_counter()
+        fetched, source_status = await self.fetch_sources(self.source_fetchers())
         
-        # Get historical prices for volatility calculation
-        eth_prices = self.get_eth_historical_prices()
+        # Current ETH price
+        eth_price = fetched['eth_price']
         
-        # Calculate ETH realized volatilities
-        eth_rv_1d = self.calculate_realized_volatility(eth_prices, 1) if eth_prices else None
-        eth_rv_7d = self.calculate_realized_volatility(eth_prices, 7) if eth_prices else None
-        eth_rv_30d = self.calculate_realized_volatility(eth_prices, 30) if eth_prices else None
+        # Calculate ETH realized volatilities from the local price history, which keeps its closes when a sync fails
+        eth_rv = self.calculate_realized_volatilities(self.historical_prices('ethereum', ETH_HISTORY_DAYS),
+                                                      ETH_RV_WINDOWS)
+        intraday_rv = self.intraday_rv_fields()
+        rv_fields = {field: intraday_rv.get(field, eth_rv[window])
+                     for field, window in zip(('eth_rv_1d', 'eth_rv_7d', 'eth_rv_30d'), ETH_RV_WINDOWS)}
+        rv_source = {field: f'intraday_{self.rv_estimator}' if field in intraday_rv else 'daily_close'
+                     for field in rv_fields}
         
-        # Get implied volatility data
-        deribit_data = self.get_deribit_iv_data()
+        # Implied volatility data
+        deribit_data = fetched['deribit_iv'] or {'eth_iv_deribit': None}
+        option_chain = fetched['option_chain'] or []
         binance_data = self.get_binance_options_data()
         
-        # Get cross-asset data
-        btc_data = self.get_btc_realized_volatility()
-        vix = self.get_vix_data()
+        # Cross-asset data
+        btc_data = self.btc_realized_volatility(self.historical_prices('bitcoin', BTC_HISTORY_DAYS))
+        vix = fetched['vix']
         move = self.get_move_index()
         
         # Get options flow
@@ -216,20 +548,44 @@ class ETHDataCollector:
         market_data = {
             'timestamp': datetime.utcnow(),
             'eth_price': eth_price,
-            'eth_rv_1d': eth_rv_1d,
-            'eth_rv_7d': eth_rv_7d,
-            'eth_rv_30d': eth_rv_30d,
+            **rv_fields,
+            'rv_source': rv_source,
             'vix': vix,
             'move_index': move,
+            'option_chain': option_chain,
             **deribit_data,
             **binance_data,
             **btc_data,
-            **flow_data
+            **flow_data,
+            'source_status': source_status,
+            'freshness': self.field_freshness(source_status, rv_source),
+            'collection_ms': (time.perf_counter() - start) * 1000
         }
         
         logger.info(f"Data collection completed. ETH Price: ${eth_price}")
         return market_data
     
+    def field_freshness(self, source_status: Dict[str, Dict], rv_source: Dict[str, str]) -> Dict[str, Dict]:
+        """Source, UTC fetch time and age in seconds of each upstream snapshot field"""
+        field_sources = {field: source for source, fields in SOURCE_FIELDS.items() for field in fields}
+        for field, source in rv_source.items():
+            field_sources[field] = 'eth_history' if source == 'daily_close' else 'intraday_rv'
+        
+        now = datetime.utcnow()
+        freshness = {}
+        for field, source in field_sources.items():
+            fetched_at = source_status.get(source, {}).get('fetched_at')
+            freshness[field] = {
+                'source': source,
+                'fetched_at': fetched_at,
+                'age_seconds': (now - fetched_at).total_seconds() if fetched_at is not None else None
+            }
+        return freshness
+    
+    def collect_all_data(self) -> Dict:
+        """Collect all market data in one call"""
+        return asyncio.run(self.collect_all_data_async())
+    
     def get_cached_data(self) -> Dict:
         """Get cached/demo data for development"""
         return {
@@ -13,6 +13,8 @@ from scipy.optimize import minimize
 import warnings
 warnings.filterwarnings('ignore')
 
+from garch import GARCH_FORECAST_HORIZONS, GARCHModel
+
 # Set up plotting style
 plt.style.use('seaborn-v0_8')
 sns.set_palette("husl")
@@ -52,6 +54,9 @@ class ETHVolatilityAnalyzer:
             'puts_sold': 24.8,
             'calls_bought': 20.8
         }
+        
+        # Volatility model refitted from its previous estimate on each forecast
+        self.garch = GARCHModel()
     
     def calculate_ivr(self, current_iv, min_iv_252d, max_iv_252d):
         """Calculate Implied Volatility Rank"""
@@ -89,26 +94,19 @@ class ETHVolatilityAnalyzer:
         }
     
     def garch_volatility_forecast(self, returns_series, forecast_days=30):
-        """Simple GARCH(1,1) volatility forecast"""
-        # Simplified GARCH implementation
-        # In practice, would use arch library for full GARCH modeling
-        
-        returns = np.array(returns_series)
-        mean_return = np.mean(returns)
-        
-        # GARCH parameters (simplified estimation)
-        omega = 0.000001  # Long-term variance
-        alpha = 0.1       # ARCH coefficient
-        beta = 0.85       # GARCH coefficient
+        """GJR-GARCH(1,1) volatility forecast (annualized %) over the next forecast_days
         
-        # Calculate conditional variance
-        variance = np.var(returns)
-        forecasted_variance = omega + alpha * (returns[-1] - mean_return)**2 + beta * variance
-        
-        # Annualized volatility forecast
-        forecasted_vol = np.sqrt(forecasted_variance * 252) * 100
-        
-        return forecasted_vol
+        The model is refitted by maximum likelihood on every call, warm-started
+        from the previous fit.
+        """
+        self.garch.fit(returns_series)
+        return self.garch.forecast((forecast_days,))[forecast_days]
+    
+    def garch_analysis(self, returns_series, horizons=GARCH_FORECAST_HORIZONS):
+        """Fitted GARCH parameters with volatility forecasts for several horizons"""
+        fit = self.garch.fit(returns_series)
+        fit['forecasts'] = self.garch.forecast(horizons)
+        return fit
     
     def monte_carlo_iv_simulation(self, n_simulations=10000, days=30):
         """Monte Carlo simulation for forward IV projections"""
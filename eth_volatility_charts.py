@@ -30,8 +30,10 @@ COLORS = {
 }
 
 class ETHVolatilityVisualizer:
-    def __init__(self):
-        """Initialize the visualizer with analysis data"""
+    def __init__(self, surface=None):
+        """Initialize the visualizer with analysis data and an optional fitted SVISurface"""
+        self.surface = surface
+        
         # Set up matplotlib for high-quality output
         plt.rcParams['figure.dpi'] = 300
         plt.rcParams['savefig.dpi'] = 300
@@ -62,17 +64,17 @@ class ETHVolatilityVisualizer:
         strikes = np.array([0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3])  # Moneyness
         expiries = np.array([7, 14, 30, 60, 90, 180])  # Days to expiry
         
-        # Create realistic ETH volatility surface
         X, Y = np.meshgrid(strikes, expiries)
         
-        # ETH volatility surface model (higher vol for puts and short expiries)
-        Z = np.zeros_like(X)
-        for i, exp in enumerate(expiries):
-            for j, strike in enumerate(strikes):
-                base_vol = 65  # ATM vol
-                skew_effect = (1 - strike) * 15  # Put skew
-                term_effect = np.exp(-exp/60) * 10  # Term structure
-                Z[i, j] = base_vol + skew_effect + term_effect
+        if self.surface is not None:
+            # Bilinear lookups on the surface's precomputed grid
+            Z = self.surface.grid.implied_vol(np.log(X), Y)
+        else:
+            # ETH volatility surface model (higher vol for puts and short expiries)
+            base_vol = 65  # ATM vol
+            skew_effect = (1 - X) * 15  # Put skew
+            term_effect = np.exp(-Y/60) * 10  # Term structure
+            Z = base_vol + skew_effect + term_effect
         
         # Create contour plot
         contour = ax.contourf(X, Y, Z, levels=20, cmap='RdYlBu_r', alpha=0.8)
@@ -89,8 +91,9 @@ class ETHVolatilityVisualizer:
                     fontsize=14, fontweight='bold', pad=20)
         
         # Add current ATM point
+        atm_iv = float(self.surface.grid.implied_vol(0.0, 30)) if self.surface is not None else self.current_data["eth_iv"]
         ax.scatter([1.0], [30], color='red', s=100, zorder=5, 
-                  label=f'Current ATM IV: {self.current_data["eth_iv"]:.1f}%')
+                  label=f'Current ATM IV: {atm_iv:.1f}%')
         ax.legend()
         
         plt.tight_layout()
@@ -0,0 +1,149 @@
+"""
+ETH Options GARCH Volatility Model
+Maximum-likelihood GARCH(1,1) / GJR-GARCH(1,1) fits with multi-step variance forecasts
+"""
+
+import time
+import numpy as np
+from typing import Dict, Iterable
+from scipy.optimize import minimize
+from scipy.signal import lfilter
+
+from realized_vol import CRYPTO_PERIODS_PER_YEAR
+
+# Returns are scaled to percent before fitting so omega is not vanishingly small
+RETURN_SCALE = 100.0
+
+# Persistence (alpha + gamma/2 + beta) kept strictly below one for a finite long-run variance
+MAX_PERSISTENCE = 0.9999
+
+GARCH_FORECAST_HORIZONS = (30, 60, 90)
+
+# Starting point of a cold fit as (alpha, gamma, beta); omega is set from the sample variance
+COLD_START = (0.08, 0.04, 0.88)
+
+
+class GARCHModel:
+    """GARCH(1,1), or GJR-GARCH(1,1) when gjr=True, fitted by Gaussian maximum likelihood
+
+    The conditional variance recursion and its parameter derivatives are
+    linear filters in the lagged squared shocks, so both are evaluated with
+    one lfilter call instead of a Python loop, and the optimizer gets exact
+    gradients. Each fit starts from the previous fit's parameters.
+    """
+
+    def __init__(self, gjr: bool = True, periods_per_year: float = CRYPTO_PERIODS_PER_YEAR):
+        self.gjr = gjr
+        self.periods_per_year = periods_per_year
+        self.params = None  # (omega, alpha, gamma, beta) of the latest fit, in percent-return units
+        self.last_fit = None
+
+    def fit(self, returns) -> Dict:
+        """Fit to daily log returns (decimals) and return parameters and fit diagnostics"""
+        start = time.perf_counter()
+        returns = np.asarray(returns, dtype=float) * RETURN_SCALE
+        returns = returns[np.isfinite(returns)]
+        if len(returns) < 30:
+            raise ValueError("GARCH fit needs at least 30 returns")
+
+        shocks = returns - returns.mean()
+        sq = shocks * shocks
+        variance0 = float(sq.mean())
+        negative = (shocks < 0).astype(float)
+
+        warm_started = self.params is not None
+        if warm_started:
+            x0 = np.array(self.params)
+        else:
+            alpha, gamma, beta = COLD_START
+            x0 = np.array([variance0 * (1 - alpha - gamma / 2 - beta), alpha, gamma, beta])
+        if not self.gjr:
+            x0[2] = 0.0
+
+        bounds = [(1e-8 * variance0, 10 * variance0), (0.0, 1.0), (0.0, 1.0) if self.gjr else (0.0, 0.0), (0.0, 1.0)]
+        x0 = np.clip(x0, [b[0] for b in bounds], [b[1] for b in bounds])
+        constraints = [{
+            'type': 'ineq',
+            'fun': lambda p: MAX_PERSISTENCE - p[1] - 0.5 * p[2] - p[3],
+            'jac': lambda p: np.array([0.0, -1.0, -0.5, -1.0])
+        }]
+
+        result = minimize(_negative_log_likelihood, x0, args=(sq, negative, variance0), jac=True,
+                          method='SLSQP', bounds=bounds, constraints=constraints,
+                          options={'maxiter': 200, 'ftol': 1e-10})
+
+        omega, alpha, gamma, beta = result.x
+        variance = _conditional_variance(result.x, sq, negative, variance0)
+        # One-step-ahead variance for the day after the sample
+        next_variance = omega + (alpha + gamma * negative[-1]) * sq[-1] + beta * variance[-1]
+        self.params = tuple(float(p) for p in result.x)
+
+        persistence = alpha + 0.5 * gamma + beta
+        long_run_variance = omega / (1 - persistence)
+        self.last_fit = {
+            'omega': float(omega) / RETURN_SCALE**2,
+            'alpha': float(alpha),
+            'gamma': float(gamma),
+            'beta': float(beta),
+            'persistence': float(persistence),
+            'long_run_vol': self._annualize(long_run_variance),
+            'conditional_vol': self._annualize(next_variance),
+            'log_likelihood': float(-result.fun - 0.5 * len(sq) * np.log(2 * np.pi)),
+            'n_returns': len(sq),
+            'converged': bool(result.success),
+            'iterations': int(result.nit),
+            'warm_started': warm_started,
+            'fit_time_ms': (time.perf_counter() - start) * 1000,
+            '_next_variance': float(next_variance),
+            '_long_run_variance': float(long_run_variance)
+        }
+        return {k: v for k, v in self.last_fit.items() if not k.startswith('_')}
+
+    def forecast(self, horizons: Iterable[int] = GARCH_FORECAST_HORIZONS) -> Dict[int, float]:
+        """Annualized volatility (%) over the next h days: root of the average forecast daily variance"""
+        if self.last_fit is None:
+            raise ValueError("fit the model before forecasting")
+        persistence = self.last_fit['persistence']
+        long_run = self.last_fit['_long_run_variance']
+        gap = self.last_fit['_next_variance'] - long_run
+
+        forecasts = {}
+        for h in horizons:
+            # Sum of persistence**(k-1) for k = 1..h: the gap to the long-run variance decays geometrically
+            decay_sum = h if persistence == 1 else (1 - persistence**h) / (1 - persistence)
+            forecasts[h] = self._annualize(long_run + gap * decay_sum / h)
+        return forecasts
+
+    def _annualize(self, daily_variance: float) -> float:
+        return float(np.sqrt(max(daily_variance, 0.0) * self.periods_per_year) / RETURN_SCALE * 100)
+
+
+def _conditional_variance(params, sq: np.ndarray, negative: np.ndarray, variance0: float) -> np.ndarray:
+    """sigma2[t] = omega + (alpha + gamma * 1[e[t-1] < 0]) * e[t-1]**2 + beta * sigma2[t-1], sigma2[0] = variance0"""
+    omega, alpha, gamma, beta = params
+    drive = np.empty_like(sq)
+    drive[0] = variance0
+    drive[1:] = omega + (alpha + gamma * negative[:-1]) * sq[:-1]
+    variance = lfilter([1.0], [1.0, -beta], drive[1:], zi=[beta * variance0])[0]
+    return np.concatenate(([variance0], variance))
+
+
+def _negative_log_likelihood(params, sq: np.ndarray, negative: np.ndarray, variance0: float):
+    """Gaussian negative log-likelihood (without the constant) and its gradient"""
+    omega, alpha, gamma, beta = params
+    variance = _conditional_variance(params, sq, negative, variance0)
+    variance = np.maximum(variance, 1e-12)
+
+    # Derivatives of sigma2 obey the same recursion with their own drives; sigma2[0] is fixed
+    drives = np.empty((4, len(sq) - 1))
+    drives[0] = 1.0
+    drives[1] = sq[:-1]
+    drives[2] = negative[:-1] * sq[:-1]
+    drives[3] = variance[:-1]
+    derivatives = lfilter([1.0], [1.0, -beta], drives, axis=1)
+
+    ratio = sq / variance
+    nll = 0.5 * float(np.sum(np.log(variance) + ratio))
+    weights = 0.5 * (1.0 - ratio[1:]) / variance[1:]
+    gradient = derivatives @ weights
+    return nll, gradient
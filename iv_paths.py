@@ -0,0 +1,91 @@
+"""
+ETH Options IV Path Kernel
+Streaming simulation of the bounded mean-reverting daily IV recursion
+"""
+
+import numpy as np
+from typing import Dict, Iterator, Optional, Tuple
+from scipy.special import ndtri
+from scipy.stats import qmc
+
+from ou_calibration import OU_DT
+
+# Days of shocks drawn at a time, bounding memory at IV_STEP_BLOCK x paths-per-block normals
+IV_STEP_BLOCK = 8
+
+# Paths advanced together by default
+IV_PATH_BLOCK = 2**18
+
+
+def is_power_of_two(n: int) -> bool:
+    return n > 0 and n & (n - 1) == 0
+
+
+def next_power_of_two(n: int) -> int:
+    return 1 << (max(n, 1) - 1).bit_length()
+
+
+def draw_standard_normals(rng: np.random.Generator, days: int, n_paths: int,
+                          variance_reduction: Optional[str] = None) -> np.ndarray:
+    """(days x paths) standard normals using the selected variance reduction
+
+    'sobol' maps a scrambled Sobol point set (one dimension per day) through
+    the normal quantile, with the points handed to paths in random order so
+    that successive calls (padding) are independent of each other. Sobol
+    points are only balanced for power-of-two counts, so other path counts
+    fall back to pseudo-random normals.
+    """
+    if variance_reduction == 'antithetic':
+        half = rng.standard_normal((days, (n_paths + 1) // 2))
+        return np.concatenate([half, -half], axis=1)[:, :n_paths]
+
+    if variance_reduction == 'sobol' and is_power_of_two(n_paths):
+        points = qmc.Sobol(d=days, scramble=True, seed=rng).random_base2(n_paths.bit_length() - 1)
+        np.clip(points, 1e-12, 1 - 1e-12, out=points)
+        return np.ascontiguousarray(ndtri(points[rng.permutation(n_paths)].T))
+
+    return rng.standard_normal((days, n_paths))
+
+
+def simulate_iv_steps(current_iv: float, n_paths: int, days: int, rng: np.random.Generator, iv_model: Dict,
+                      iv_bounds: Tuple[float, float], variance_reduction: Optional[str] = None,
+                      track_unbounded: bool = False,
+                      block_size: int = IV_PATH_BLOCK) -> Iterator[Tuple[int, int, np.ndarray, Optional[np.ndarray], np.ndarray]]:
+    """Advance IV paths one day at a time, yielding after every step
+
+    iv[t+1] = clip(iv[t] + kappa * (theta - iv[t]) * dt + sigma * sqrt(dt) * z, *iv_bounds)
+    with iv_model holding long_term_iv_mean (theta), mean_reversion_speed
+    (kappa) and iv_volatility (sigma). Paths are advanced in blocks of at
+    most block_size; for each block and day 1..days this yields (start,
+    day, iv, unbounded, shocks): the index of the block's first path, the
+    IVs after the step, the same paths without the clamp (None unless
+    track_unbounded) and the standard normals that drove the step. The
+    arrays are reused in place, so copy what must outlive the step.
+
+    Shocks are drawn IV_STEP_BLOCK days at a time, so memory is bounded by
+    the block of paths, never the (days x paths) matrix. With Sobol shocks
+    each block of days gets its own scrambled point set (padding).
+    """
+    dt = OU_DT
+    decay = 1 - iv_model['mean_reversion_speed'] * dt
+    drift = iv_model['mean_reversion_speed'] * iv_model['long_term_iv_mean'] * dt
+    scale = iv_model['iv_volatility'] * np.sqrt(dt)
+    floor, cap = iv_bounds
+
+    for start in range(0, n_paths, block_size):
+        size = min(block_size, n_paths - start)
+        iv = np.full(size, float(current_iv))
+        unbounded = iv.copy() if track_unbounded else None
+        step = np.empty(size)
+        for first_day in range(0, days, IV_STEP_BLOCK):
+            shocks = draw_standard_normals(rng, min(IV_STEP_BLOCK, days - first_day), size, variance_reduction)
+            for offset, z in enumerate(shocks):
+                np.multiply(z, scale, out=step)
+                step += drift
+                iv *= decay
+                iv += step
+                np.clip(iv, floor, cap, out=iv)
+                if track_unbounded:
+                    unbounded *= decay
+                    unbounded += step
+                yield start, first_day + offset + 1, iv, unbounded, z
@@ -0,0 +1,156 @@
+"""
+ETH Options Rolling IV Window
+Incremental IV rank and percentile over a trailing window of stored IV observations
+"""
+
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Union
+
+# Trailing window (days) over which IV rank and percentile are measured
+IV_HISTORY_DAYS = 252
+
+# Resolution (vol points) and upper end of the order-statistics index
+IV_RANK_BIN_WIDTH = 0.01
+IV_RANK_MAX = 500.0
+
+EPOCH = datetime(1970, 1, 1)
+
+Timestamp = Union[datetime, float, int]
+
+
+def to_epoch_seconds(timestamp: Timestamp) -> float:
+    """Seconds since the epoch of a naive UTC datetime or a numeric timestamp"""
+    if isinstance(timestamp, datetime):
+        return (timestamp.replace(tzinfo=None) - EPOCH).total_seconds()
+    return float(timestamp)
+
+
+class RollingIVWindow:
+    """Trailing window of timestamped IVs with incremental min, max and percentile rank
+
+    Values enter in time order and leave once older than the window span.
+    Monotonic deques give the window min and max in O(1); a Fenwick tree of
+    counts over 0.01 vol-point bins gives O(log n) insert, evict and rank.
+    """
+
+    def __init__(self, window_days: float = IV_HISTORY_DAYS, bin_width: float = IV_RANK_BIN_WIDTH,
+                 max_iv: float = IV_RANK_MAX):
+        self.span = timedelta(days=window_days).total_seconds()
+        self.bin_width = bin_width
+        self.n_bins = int(round(max_iv / bin_width)) + 1
+        self._tree = [0] * (self.n_bins + 1)  # 1-indexed Fenwick tree of bin counts
+        self._entries = deque()  # (sequence, seconds, value, bin) in arrival order
+        self._min = deque()  # (sequence, value) with increasing values
+        self._max = deque()  # (sequence, value) with decreasing values
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self.last_timestamp = None
+        self.version = 0  # Bumped on every accepted value, for cache keys
+
+    def push(self, value: float, timestamp: Timestamp) -> bool:
+        """Add an observation and evict those that fell out of the window
+
+        Observations not newer than the latest one are ignored, so
+        overlapping syncs from the same table are harmless. Returns whether
+        the value was accepted.
+        """
+        if value is None:
+            return False
+        value = float(value)
+        seconds = to_epoch_seconds(timestamp)
+
+        with self._lock:
+            if self._entries and seconds <= self._entries[-1][1]:
+                return False
+
+            self._sequence += 1
+            b = self._bin(value)
+            self._entries.append((self._sequence, seconds, value, b))
+            self._update(b, 1)
+
+            while self._min and self._min[-1][1] >= value:
+                self._min.pop()
+            self._min.append((self._sequence, value))
+            while self._max and self._max[-1][1] <= value:
+                self._max.pop()
+            self._max.append((self._sequence, value))
+
+            cutoff = seconds - self.span
+            while self._entries[0][1] < cutoff:
+                sequence, _, _, old_bin = self._entries.popleft()
+                self._update(old_bin, -1)
+                if self._min[0][0] == sequence:
+                    self._min.popleft()
+                if self._max[0][0] == sequence:
+                    self._max.popleft()
+
+            self.last_timestamp = timestamp
+            self.version += 1
+            return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def min(self) -> Optional[float]:
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+    def iv_rank(self, current_iv: float) -> Optional[float]:
+        """Position of current_iv between the window min and max, clipped to [0, 1]"""
+        with self._lock:
+            if len(self._entries) < 2:
+                return None
+            low, high = self._min[0][1], self._max[0][1]
+        if high == low:
+            return 0.5
+        return max(0.0, min(1.0, (current_iv - low) / (high - low)))
+
+    def percentile(self, current_iv: float) -> Optional[float]:
+        """Fraction of the window below current_iv, ties counted as half (percentileofscore 'rank')"""
+        with self._lock:
+            n = len(self._entries)
+            if n == 0:
+                return None
+            b = self._bin(current_iv)
+            below = self._prefix(b - 1)
+            at_or_below = self._prefix(b)
+        if current_iv < 0:
+            below = at_or_below = 0
+        elif current_iv > (self.n_bins - 1) * self.bin_width:
+            below = at_or_below = n
+        return (below + at_or_below + (1 if at_or_below > below else 0)) / (2 * n)
+
+    def stats(self) -> Dict:
+        """Window summary for monitoring"""
+        return {
+            'count': len(self._entries),
+            'min': self.min,
+            'max': self.max,
+            'window_days': self.span / 86400,
+            'last_timestamp': self.last_timestamp.isoformat() if isinstance(self.last_timestamp, datetime)
+            else self.last_timestamp
+        }
+
+    def _bin(self, value: float) -> int:
+        return min(max(int(round(value / self.bin_width)), 0), self.n_bins - 1)
+
+    def _update(self, b: int, delta: int):
+        i = b + 1
+        while i <= self.n_bins:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, b: int) -> int:
+        """Number of observations in bins 0..b"""
+        total = 0
+        i = b + 1
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
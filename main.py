@@ -8,7 +8,7 @@ from flask_cors import CORS
 from src.models.user import db
 from src.models.eth_data import ETHMarketData, ETHOptionsFlow, ETHAnalysisResults, TradingPositions
 from src.routes.user import user_bp
-from src.routes.eth_analysis import eth_bp
+from src.routes.eth_analysis import eth_bp, init_snapshot_poller, sync_iv_history
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -27,6 +27,13 @@ db.init_app(app)
 
 with app.app_context():
     db.create_all()
+    sync_iv_history()  # Backfill the IV window and OU calibrator once; stored snapshots feed them afterwards
+
+# Background market snapshots every SNAPSHOT_POLL_SECONDS (0 disables); under the debug
+# reloader only the serving child process polls
+poll_seconds = float(os.environ.get('SNAPSHOT_POLL_SECONDS', 30))
+if poll_seconds > 0 and (__name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+    init_snapshot_poller(app, poll_seconds)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -0,0 +1,119 @@
+"""
+ETH Options IV Mean-Reversion Calibration
+Closed-form AR(1) maximum-likelihood fit of the Ornstein-Uhlenbeck IV model from running sums
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from iv_window import Timestamp, to_epoch_seconds
+
+# Model time step of one day, matching the daily step of the IV projections
+OU_DT = 1 / 252
+
+# Day-over-day IV pairs needed before calibrated parameters replace the defaults
+MIN_OU_PAIRS = 30
+
+DEFAULT_OU_PARAMETERS = {
+    'long_term_iv_mean': 55.0,
+    'mean_reversion_speed': 0.5,
+    'iv_volatility': 15.0
+}
+
+
+class OUCalibrator:
+    """Incremental OU fit of daily IV: IV[t+1] = a + b * IV[t] + e with e ~ N(0, s2)
+
+    Observations are reduced to the last IV of each UTC day, and consecutive
+    days contribute one pair to running sums (n, Sx, Sy, Sxx, Syy, Sxy) from
+    which the AR(1) maximum-likelihood estimate is closed form. Adding rows
+    is O(1) each and the fit is cached until the sums change, together with
+    the date range it covers.
+    """
+
+    def __init__(self, dt: float = OU_DT):
+        self.dt = dt
+        self._lock = threading.Lock()
+        self.n = 0
+        self.sum_x = self.sum_y = self.sum_xx = self.sum_yy = self.sum_xy = 0.0
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self._closed = None  # (day, iv) of the latest completed day
+        self._open = None  # (day, iv) of the day still receiving observations
+        self._cached = None
+
+    def push(self, value: float, timestamp: Timestamp) -> bool:
+        """Add an IV observation; observations not newer than the last are ignored"""
+        if value is None:
+            return False
+        seconds = to_epoch_seconds(timestamp)
+        day = int(seconds // 86400)
+
+        with self._lock:
+            if self.last_timestamp is not None and seconds <= to_epoch_seconds(self.last_timestamp):
+                return False
+            if self.first_timestamp is None:
+                self.first_timestamp = timestamp
+            self.last_timestamp = timestamp
+
+            if self._open is not None and day > self._open[0]:
+                if self._closed is not None and self._open[0] - self._closed[0] == 1:
+                    self._add_pair(self._closed[1], self._open[1])
+                self._closed = self._open
+            self._open = (day, float(value))
+            return True
+
+    def _add_pair(self, x: float, y: float):
+        self.n += 1
+        self.sum_x += x
+        self.sum_y += y
+        self.sum_xx += x * x
+        self.sum_yy += y * y
+        self.sum_xy += x * y
+        self._cached = None
+
+    def parameters(self) -> Dict:
+        """Calibrated long_term_iv_mean, mean_reversion_speed and iv_volatility with their data range
+
+        Falls back to the default parameters (calibrated=False) until enough
+        pairs are available or when the series shows no mean reversion.
+        """
+        with self._lock:
+            if self._cached is None:
+                self._cached = self._fit()
+            return dict(self._cached)
+
+    def _fit(self) -> Dict:
+        n = self.n
+        fit = {
+            **DEFAULT_OU_PARAMETERS,
+            'calibrated': False,
+            'n_pairs': n,
+            'data_start': _isoformat(self.first_timestamp),
+            'data_end': _isoformat(self.last_timestamp)
+        }
+        denominator = n * self.sum_xx - self.sum_x**2
+        if n < MIN_OU_PAIRS or denominator <= 0:
+            return fit
+
+        b = (n * self.sum_xy - self.sum_x * self.sum_y) / denominator
+        a = (self.sum_y - b * self.sum_x) / n
+        # Mean squared residual expanded in the running sums
+        residual_var = (self.sum_yy + n * a * a + b * b * self.sum_xx
+                        - 2 * a * self.sum_y - 2 * b * self.sum_xy + 2 * a * b * self.sum_x) / n
+        if not 0 < b < 1 or residual_var <= 0:
+            return fit
+
+        fit.update({
+            'long_term_iv_mean': a / (1 - b),
+            'mean_reversion_speed': (1 - b) / self.dt,
+            'iv_volatility': (residual_var / self.dt) ** 0.5,
+            'calibrated': True,
+            'ar1_coefficient': b
+        })
+        return fit
+
+
+def _isoformat(timestamp: Optional[Timestamp]):
+    return timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp
@@ -0,0 +1,157 @@
+"""
+ETH Options Price History Store
+Local daily close history per asset, extended incrementally instead of re-downloaded
+"""
+
+import logging
+import os
+import threading
+import numpy as np
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 86400
+
+# Daily closes kept per asset
+PRICE_HISTORY_MAX_DAYS = 400
+
+# Points whose timestamp lies this close to a bar boundary are completed closes; others are provisional
+BAR_ALIGNMENT_TOLERANCE_SECONDS = 60
+
+# Stores persist here as <asset>.npz
+PRICE_HISTORY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database', 'price_history')
+
+
+class PriceHistoryStore:
+    """Completed bar closes of one asset as float64 timestamp and price arrays, plus the latest quote
+
+    Points aligned to a bar boundary (CoinGecko daily points sit at 00:00
+    UTC) are closes and are kept sorted by time, one per bar, newest value
+    winning. An unaligned point is the provisional latest quote and is
+    served after the closes until a newer close arrives. With a path the
+    store loads itself on creation and save() writes it back atomically.
+    """
+
+    def __init__(self, asset: str, path: Optional[str] = None, interval: int = DAY_SECONDS,
+                 max_points: int = PRICE_HISTORY_MAX_DAYS):
+        self.asset = asset
+        self.path = path
+        self.interval = interval
+        self.max_points = max_points
+        self.timestamps = np.empty(0)  # Epoch seconds of each close
+        self.prices = np.empty(0)
+        self.latest = None  # (timestamp, price) of the provisional quote
+        self.backfilled = False  # Set once gaps have been checked after loading
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def last_timestamp(self) -> Optional[float]:
+        return float(self.timestamps[-1]) if len(self.timestamps) else None
+
+    def merge(self, timestamps, prices) -> int:
+        """Add fetched points (epoch seconds); returns how many bars were not stored before"""
+        timestamps = np.asarray(timestamps, dtype=float)
+        prices = np.asarray(prices, dtype=float)
+        valid = np.isfinite(timestamps) & np.isfinite(prices) & (prices > 0)
+        timestamps, prices = timestamps[valid], prices[valid]
+        offset = timestamps % self.interval
+        aligned = np.minimum(offset, self.interval - offset) <= BAR_ALIGNMENT_TOLERANCE_SECONDS
+
+        with self._lock:
+            if (~aligned).any():
+                newest = int(np.argmax(np.where(aligned, -np.inf, timestamps)))
+                if self.latest is None or timestamps[newest] >= self.latest[0]:
+                    self.latest = (float(timestamps[newest]), float(prices[newest]))
+
+            bars = np.round(timestamps[aligned] / self.interval) * self.interval
+            closes = prices[aligned]
+            known = len(self.timestamps)
+            if len(bars) == 0:
+                return 0
+
+            if known == 0 or bars.min() > self.timestamps[-1]:
+                # Common case: only the tail after the last stored close
+                order = np.argsort(bars, kind='stable')
+                bars, closes = bars[order], closes[order]
+                keep = np.append(bars[1:] != bars[:-1], True)  # Last value of each bar
+                merged_ts = np.concatenate((self.timestamps, bars[keep]))
+                merged_px = np.concatenate((self.prices, closes[keep]))
+            else:
+                # Backfill: later entries win, so fetched values replace stored ones for the same bar
+                all_ts = np.concatenate((self.timestamps, bars))
+                all_px = np.concatenate((self.prices, closes))
+                unique_ts, first_from_end = np.unique(all_ts[::-1], return_index=True)
+                merged_ts = unique_ts
+                merged_px = all_px[len(all_ts) - 1 - first_from_end]
+
+            added = len(merged_ts) - known
+            self.timestamps = merged_ts[-self.max_points:]
+            self.prices = merged_px[-self.max_points:]
+            if self.latest is not None and self.latest[0] <= self.timestamps[-1]:
+                self.latest = None
+            return added
+
+    def fetch_start(self, backfill_gaps: bool = False) -> Optional[float]:
+        """Timestamp from which data is missing: the last close, or the start of the first gap; None if empty"""
+        with self._lock:
+            if len(self.timestamps) == 0:
+                return None
+            if backfill_gaps:
+                gaps = np.flatnonzero(np.diff(self.timestamps) > 1.5 * self.interval)
+                if gaps.size:
+                    return float(self.timestamps[gaps[0]])
+            return float(self.timestamps[-1])
+
+    def series(self, points: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Timestamps and prices of the last `points` closes followed by the provisional quote, if any"""
+        with self._lock:
+            timestamps, prices = self.timestamps, self.prices
+            if points is not None:
+                timestamps, prices = timestamps[-points:], prices[-points:]
+            if self.latest is not None:
+                timestamps = np.append(timestamps, self.latest[0])
+                prices = np.append(prices, self.latest[1])
+            return timestamps, prices
+
+    def closes(self, points: Optional[int] = None) -> np.ndarray:
+        """Prices of the last `points` closes followed by the provisional quote, if any"""
+        return self.series(points)[1]
+
+    def load(self):
+        """Read the store from its path, starting empty if the file is unreadable"""
+        try:
+            with np.load(self.path) as data:
+                timestamps, prices = data['timestamps'].astype(float), data['prices'].astype(float)
+        except Exception as e:
+            logger.warning(f"Failed to load {self.asset} price history from {self.path}: {e}")
+            return
+        with self._lock:
+            self.timestamps, self.prices = timestamps, prices
+
+    def save(self):
+        """Write the closes to the store's path (the provisional quote is not persisted)"""
+        if self.path is None:
+            return
+        with self._lock:
+            timestamps, prices = self.timestamps, self.prices
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        try:
+            with open(temporary, 'wb') as f:
+                np.savez(f, timestamps=timestamps, prices=prices)
+            os.replace(temporary, self.path)
+        except BaseException:
+            # Leave the previous file as it was and no partial temporary behind
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+
+def price_history_path(asset: str, directory: str = PRICE_HISTORY_DIR) -> str:
+    return os.path.join(directory, f"{asset}.npz")
@@ -0,0 +1,204 @@
+"""
+ETH Options Realized Volatility
+Single-pass rolling realized volatility over many windows from one price series
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import Dict, Iterable, Optional
+
+# Annualization factors (observations per year): crypto trades every calendar day
+CRYPTO_PERIODS_PER_YEAR = 365.0
+EQUITY_PERIODS_PER_YEAR = 252.0
+
+# Windows up to this many returns are computed directly; longer ones from cumulative sums
+DIRECT_WINDOW_MAX = 64
+
+
+def log_returns(prices) -> np.ndarray:
+    """Log returns of a price series"""
+    prices = np.asarray(prices, dtype=float)
+    return np.diff(np.log(prices))
+
+
+def rolling_realized_volatility(prices, windows: Iterable[int] = (1, 7, 30),
+                                periods_per_year: float = CRYPTO_PERIODS_PER_YEAR,
+                                demean: bool = True) -> Dict[int, np.ndarray]:
+    """Annualized rolling realized volatility (%) for several windows in one pass
+
+    Log returns are computed once. Windows up to DIRECT_WINDOW_MAX returns
+    are evaluated directly over a strided view, so a flat window is exactly
+    zero; longer windows are read off cumulative sums of returns and squared
+    returns, O(n) whatever their length, with the window sums clipped at zero
+    against cancellation. Each series is aligned with the returns: entry
+    i covers the window ending at return i and is NaN until the window is
+    full. demean=True matches np.std (population std of the window's
+    returns); demean=False gives the root mean square of returns.
+    """
+    returns = log_returns(prices)
+    n = len(returns)
+    cum = np.concatenate(([0.0], np.cumsum(returns)))
+    cum_sq = np.concatenate(([0.0], np.cumsum(returns * returns)))
+    scale = 100 * np.sqrt(periods_per_year)
+
+    series = {}
+    for window in windows:
+        rv = np.full(n, np.nan)
+        if 1 <= window <= min(n, DIRECT_WINDOW_MAX):
+            view = sliding_window_view(returns, window)
+            variance = view.var(axis=1) if demean else np.mean(view * view, axis=1)
+            rv[window - 1:] = np.sqrt(variance) * scale
+        elif DIRECT_WINDOW_MAX < window <= n:
+            mean_sq = np.maximum(cum_sq[window:] - cum_sq[:-window], 0.0) / window
+            variance = mean_sq - ((cum[window:] - cum[:-window]) / window) ** 2 if demean else mean_sq
+            rv[window - 1:] = np.sqrt(np.maximum(variance, 0.0)) * scale
+        series[window] = rv
+    return series
+
+
+def realized_volatility(prices, windows: Iterable[int] = (1, 7, 30),
+                        periods_per_year: float = CRYPTO_PERIODS_PER_YEAR,
+                        demean: bool = True) -> Dict[int, Optional[float]]:
+    """Latest annualized realized volatility (%) for each window, None where the history is too short"""
+    series = rolling_realized_volatility(prices, windows, periods_per_year, demean)
+    return {window: float(rv[-1]) if len(rv) and np.isfinite(rv[-1]) else None
+            for window, rv in series.items()}
+
+
+# Per-bar terms accumulated by StreamingRealizedVariance
+_CLOSE_SQ, _PARKINSON, _GARMAN_KLASS, _ROGERS_SATCHELL, _OPEN, _OPEN_SQ, _BODY, _BODY_SQ = range(8)
+_N_TERMS = 8
+
+RANGE_ESTIMATORS = ('close_to_close', 'parkinson', 'garman_klass', 'yang_zhang')
+
+# Default intraday bar length and rolling windows (seconds)
+INTRADAY_BAR_SECONDS = 300
+INTRADAY_WINDOWS = {'1h': 3600, '1d': 86400, '7d': 7 * 86400, '30d': 30 * 86400}
+
+
+class StreamingRealizedVariance:
+    """Rolling intraday realized variance from trades or OHLC bars with O(1) updates
+
+    Trades are aggregated into fixed-length bars; each completed bar adds its
+    close-to-close, Parkinson, Garman-Klass and Rogers-Satchell terms to
+    running sums for every window and removes the terms of the bar that left
+    it. A ring buffer sized to the longest window is the only state, so
+    memory is constant however many trades arrive. Windows count bars, so
+    gaps in the feed stretch a window rather than leave empty bars in it.
+    """
+
+    def __init__(self, bar_seconds: int = INTRADAY_BAR_SECONDS, windows: Optional[Dict[str, int]] = None,
+                 periods_per_year: Optional[float] = None):
+        windows = INTRADAY_WINDOWS if windows is None else windows
+        self.bar_seconds = bar_seconds
+        self.window_names = list(windows)
+        self.window_bars = np.array([max(int(seconds // bar_seconds), 2) for seconds in windows.values()])
+        self.periods_per_year = periods_per_year or CRYPTO_PERIODS_PER_YEAR * 86400 / bar_seconds
+        self.capacity = int(self.window_bars.max())
+        self._ring = np.zeros((self.capacity, _N_TERMS))
+        self._sums = np.zeros((len(self.window_bars), _N_TERMS))
+        self.n_bars = 0  # Bars pushed since creation
+        self.previous_close = None
+        self.last_bar_time = None
+        self._bar = None  # [bar_index, open, high, low, close] of the bar being built from trades
+
+    def add_trade(self, price: float, timestamp: float):
+        """Add a trade (timestamp in epoch seconds), closing the current bar when a new one starts"""
+        bar_index = int(timestamp // self.bar_seconds)
+        if self._bar is None:
+            self._bar = [bar_index, price, price, price, price]
+        elif bar_index > self._bar[0]:
+            self.flush()
+            self._bar = [bar_index, price, price, price, price]
+        elif bar_index == self._bar[0]:
+            bar = self._bar
+            bar[2] = max(bar[2], price)
+            bar[3] = min(bar[3], price)
+            bar[4] = price
+
+    def flush(self):
+        """Close the bar being built from trades"""
+        if self._bar is not None:
+            bar_index, open_, high, low, close = self._bar
+            self._bar = None
+            self.add_bar(open_, high, low, close, bar_index * self.bar_seconds)
+
+    def add_bar(self, open_: float, high: float, low: float, close: float, timestamp: float) -> bool:
+        """Add a completed OHLC bar (timestamp in epoch seconds); bars not newer than the last are ignored"""
+        if self.last_bar_time is not None and timestamp <= self.last_bar_time:
+            return False
+        self.last_bar_time = timestamp
+
+        previous_close, self.previous_close = self.previous_close, close
+        if previous_close is None:
+            return True
+
+        log_high_low = np.log(high / low)
+        log_body = np.log(close / open_)
+        log_open = np.log(open_ / previous_close)
+        log_close = np.log(close / previous_close)
+        log_high_open, log_high_close = np.log(high / open_), np.log(high / close)
+        log_low_open, log_low_close = np.log(low / open_), np.log(low / close)
+
+        terms = np.empty(_N_TERMS)
+        terms[_CLOSE_SQ] = log_close * log_close
+        terms[_PARKINSON] = log_high_low * log_high_low / (4 * np.log(2))
+        terms[_GARMAN_KLASS] = 0.5 * log_high_low * log_high_low - (2 * np.log(2) - 1) * log_body * log_body
+        terms[_ROGERS_SATCHELL] = log_high_close * log_high_open + log_low_close * log_low_open
+        terms[_OPEN] = log_open
+        terms[_OPEN_SQ] = log_open * log_open
+        terms[_BODY] = log_body
+        terms[_BODY_SQ] = log_body * log_body
+
+        # Drop the bar leaving each full window before its ring slot can be overwritten
+        leaving = self.n_bars >= self.window_bars
+        if leaving.any():
+            self._sums[leaving] -= self._ring[(self.n_bars - self.window_bars[leaving]) % self.capacity]
+        self._sums += terms
+        self._ring[self.n_bars % self.capacity] = terms
+        self.n_bars += 1
+
+        # Re-sum from the ring once per pass over it so add/subtract rounding cannot accumulate
+        if self.n_bars % self.capacity == 0:
+            self._resum()
+        return True
+
+    def _resum(self):
+        for i, bars in enumerate(self.window_bars):
+            count = min(self.n_bars, bars)
+            rows = (self.n_bars - 1 - np.arange(count)) % self.capacity
+            self._sums[i] = self._ring[rows].sum(axis=0)
+
+    def is_ready(self, window: str) -> bool:
+        """Whether the window has a full set of bars"""
+        return self.n_bars >= self.window_bars[self.window_names.index(window)]
+
+    def volatility(self, window: str) -> Dict[str, Optional[float]]:
+        """Annualized volatility (%) of each estimator over a window, None until it holds two bars"""
+        i = self.window_names.index(window)
+        n = min(self.n_bars, self.window_bars[i])
+        if n < 2:
+            return {estimator: None for estimator in RANGE_ESTIMATORS}
+
+        sums = self._sums[i]
+        open_var = (sums[_OPEN_SQ] - sums[_OPEN] ** 2 / n) / (n - 1)
+        body_var = (sums[_BODY_SQ] - sums[_BODY] ** 2 / n) / (n - 1)
+        k = 0.34 / (1.34 + (n + 1) / (n - 1))
+        variances = {
+            'close_to_close': sums[_CLOSE_SQ] / n,
+            'parkinson': sums[_PARKINSON] / n,
+            'garman_klass': sums[_GARMAN_KLASS] / n,
+            'yang_zhang': open_var + k * body_var + (1 - k) * sums[_ROGERS_SATCHELL] / n
+        }
+        return {estimator: float(np.sqrt(max(variance, 0.0) * self.periods_per_year) * 100)
+                for estimator, variance in variances.items()}
+
+    def snapshot(self) -> Dict:
+        """All estimators for every window, plus bar counts"""
+        return {
+            'bar_seconds': self.bar_seconds,
+            'n_bars': self.n_bars,
+            'windows': {name: {'bars': int(min(self.n_bars, bars)), 'full': bool(self.n_bars >= bars),
+                               **self.volatility(name)}
+                        for name, bars in zip(self.window_names, self.window_bars)}
+        }
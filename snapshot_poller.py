@@ -0,0 +1,154 @@
+"""
+ETH Options Snapshot Poller
+Background collection of market snapshots on a fixed cadence, kept in memory for the routes
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from data_collector import ETHDataCollector
+
+logger = logging.getLogger(__name__)
+
+# Seconds between collections
+POLL_INTERVAL_SECONDS = 30.0
+
+# Snapshots older than this are not served in place of a live collection
+SNAPSHOT_MAX_AGE_SECONDS = 300.0
+
+Subscriber = Callable[[Dict], None]
+
+
+class SnapshotPoller:
+    """Runs the collector on a daemon thread and keeps the latest snapshot
+
+    Each collected snapshot is persisted (when a persist callback is set),
+    stored as the latest, then handed to every subscriber on the poller
+    thread. A failing persist or subscriber is logged and does not stop the
+    loop. Snapshots collected elsewhere can be shared through publish();
+    pass notify=False from request threads so subscriber work stays on the
+    poller thread. Readers get copies, never the stored snapshot.
+    """
+
+    def __init__(self, interval: float = POLL_INTERVAL_SECONDS,
+                 collector_factory: Callable[[], ETHDataCollector] = ETHDataCollector,
+                 persist: Optional[Subscriber] = None):
+        self.interval = interval
+        self.collector_factory = collector_factory
+        self.persist = persist
+        self._subscribers: List[Subscriber] = []
+        self._latest = None
+        self._published_at = None  # time.monotonic() of the latest snapshot
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.polls = 0
+        self.failures = 0
+        self.last_poll_ms = None
+        self.last_error = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> bool:
+        """Start polling; returns False if already running"""
+        with self._lock:
+            if self.running:
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='eth-snapshot-poller', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop polling after the collection in progress, if any"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.poll_once()
+            self._stop.wait(max(self.interval - (time.monotonic() - started), 0.0))
+
+    def poll_once(self) -> Optional[Dict]:
+        """Collect, persist and publish one snapshot; None if collection failed"""
+        start = time.perf_counter()
+        try:
+            snapshot = self.collector_factory().collect_all_data()
+        except Exception as e:
+            self.failures += 1
+            self.last_error = str(e)
+            logger.error(f"Snapshot collection failed: {e}")
+            return None
+        finally:
+            self.polls += 1
+            self.last_poll_ms = (time.perf_counter() - start) * 1000
+
+        if self.persist is not None:
+            try:
+                self.persist(snapshot)
+            except Exception as e:
+                logger.warning(f"Failed to persist snapshot: {e}")
+        self.publish(snapshot)
+        return snapshot
+
+    def publish(self, snapshot: Dict, notify: bool = True):
+        """Make a copy of snapshot the latest and, if notify, run the subscribers on it in this thread"""
+        with self._lock:
+            self._latest = dict(snapshot)
+            self._published_at = time.monotonic()
+            subscribers = list(self._subscribers) if notify else []
+
+        for subscriber in subscribers:
+            try:
+                subscriber(snapshot)
+            except Exception as e:
+                logger.warning(f"Snapshot subscriber {getattr(subscriber, '__name__', subscriber)} failed: {e}")
+
+    def subscribe(self, subscriber: Subscriber) -> Callable[[], None]:
+        """Call subscriber with every new snapshot (once, however often it subscribes); returns a function that unsubscribes it"""
+        with self._lock:
+            if subscriber not in self._subscribers:
+                self._subscribers.append(subscriber)
+
+        def unsubscribe():
+            with self._lock:
+                if subscriber in self._subscribers:
+                    self._subscribers.remove(subscriber)
+        return unsubscribe
+
+    def age(self) -> Optional[float]:
+        """Seconds since the latest snapshot was published"""
+        published_at = self._published_at
+        return time.monotonic() - published_at if published_at is not None else None
+
+    def latest(self, max_age: Optional[float] = SNAPSHOT_MAX_AGE_SECONDS) -> Optional[Dict]:
+        """Copy of the latest snapshot, or None if there is none or it is older than max_age seconds"""
+        with self._lock:
+            snapshot = self._latest
+            age = self.age()
+        if snapshot is None or (max_age is not None and age > max_age):
+            return None
+        return dict(snapshot)
+
+    def stats(self) -> Dict:
+        """Counters for monitoring"""
+        return {
+            'running': self.running,
+            'interval': self.interval,
+            'polls': self.polls,
+            'failures': self.failures,
+            'last_poll_ms': self.last_poll_ms,
+            'last_error': self.last_error,
+            'snapshot_age_seconds': self.age(),
+            'subscribers': len(self._subscribers)
+        }
+
+
+# Poller shared by the routes; started by the app
+snapshot_poller = SnapshotPoller()
@@ -3,7 +3,9 @@ ETH Options Analysis API Routes with Input Validation
 """
 
 from flask import Blueprint, request, jsonify
-from marshmallow import Schema, fields, validate, ValidationError
+from marshmallow import Schema, fields, validate, validates, ValidationError
+import numpy as np
+import pandas as pd
 import logging
 from datetime import datetime
 import os
@@ -12,9 +14,12 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from data_collector import ETHDataCollector
-from analysis_engine import ETHOptionsAnalyzer
+from data_collector import ETHDataCollector, source_cache, source_flights
+from snapshot_poller import snapshot_poller
+from analysis_engine import ENTRY_THRESHOLDS, ETHOptionsAnalyzer, projection_cache, analysis_memo, iv_history, ou_calibrator
+from iv_window import to_epoch_seconds
 from ai_assistant import ETHOptionsAIAssistant
+from backtest import MAX_SWEEP_COMBINATIONS, SWEEP_RANK_METRICS, StrategyBacktester, prepare_features, sweep_size
 from src.models.eth_data import ETHMarketData, ETHAnalysisResults, TradingPositions, db
 
 logger = logging.getLogger(__name__)
@@ -24,40 +29,125 @@ eth_bp = Blueprint('eth', __name__)
 # Input validation schemas
 class AIChatSchema(Schema):
     question = fields.Str(required=True, validate=validate.Length(min=1, max=1000))
+    live = fields.Bool(load_default=False)
+
+class ThresholdSweepSchema(Schema):
+    strategy = fields.Str(required=True, validate=validate.OneOf(list(ENTRY_THRESHOLDS)))
+    grid = fields.Dict(keys=fields.Str(validate=validate.OneOf(['vrp', 'abs_vrp', 'ivr', 'skew', 'iv'])),
+                       values=fields.List(fields.Float(), validate=validate.Length(min=1, max=200)), required=True)
+    rank_by = fields.Str(load_default='total_pnl', validate=validate.OneOf(SWEEP_RANK_METRICS))
+    min_trades = fields.Int(load_default=5, validate=validate.Range(min=1))
+    overlapping = fields.Bool(load_default=False)
+    top = fields.Int(load_default=50, validate=validate.Range(min=1, max=1000))
+
+    @validates('grid')
+    def validate_grid_size(self, grid, **kwargs):
+        n_combinations = sweep_size(grid)
+        if n_combinations > MAX_SWEEP_COMBINATIONS:
+            raise ValidationError(f"Grid has {n_combinations} threshold combinations; at most "
+                                  f"{MAX_SWEEP_COMBINATIONS} are allowed")
 
 class AnalysisRequestSchema(Schema):
     use_cached_data = fields.Bool(load_default=False)
     include_ai_insights = fields.Bool(load_default=True)
+    include_stress_test = fields.Bool(load_default=False)
+    live = fields.Bool(load_default=False)
+
+def sync_iv_history():
+    """Feed stored IV observations newer than what the IV window and OU calibrator have seen into both
+    
+    Run once at startup to backfill from the database; afterwards
+    store_market_data feeds each stored snapshot directly, so requests never
+    query the table for IV history.
+    """
+    try:
+        query = ETHMarketData.query.filter(ETHMarketData.eth_iv_deribit.isnot(None))
+        seen = [ts for ts in (iv_history.last_timestamp, ou_calibrator.last_timestamp) if ts is not None]
+        if len(seen) == 2:
+            query = query.filter(ETHMarketData.timestamp > min(seen, key=to_epoch_seconds))
+        
+        for timestamp, iv in query.order_by(ETHMarketData.timestamp).with_entities(
+                ETHMarketData.timestamp, ETHMarketData.eth_iv_deribit):
+            iv_history.push(iv, timestamp)
+            ou_calibrator.push(iv, timestamp)
+    except Exception as db_error:
+        logger.warning(f"Failed to sync IV history from DB: {db_error}")
+
+def store_market_data(market_data: dict):
+    """Persist a market snapshot and feed its IV to the IV window and OU calibrator"""
+    db_entry = ETHMarketData(
+        timestamp=datetime.utcnow(),
+        eth_price=market_data.get('eth_price'),
+        eth_iv_deribit=market_data.get('eth_iv_deribit'),
+        eth_iv_binance=market_data.get('eth_iv_binance'),
+        eth_rv_1d=market_data.get('eth_rv_1d'),
+        eth_rv_7d=market_data.get('eth_rv_7d'),
+        eth_rv_30d=market_data.get('eth_rv_30d'),
+        btc_rv_7d=market_data.get('btc_rv_7d'),
+        btc_rv_30d=market_data.get('btc_rv_30d'),
+        vix=market_data.get('vix'),
+        move_index=market_data.get('move_index')
+    )
+    
+    timestamp, iv = db_entry.timestamp, db_entry.eth_iv_deribit
+    try:
+        db.session.add(db_entry)
+        db.session.commit()
+    except Exception as db_error:
+        logger.warning(f"Failed to store market data in DB: {db_error}")
+        db.session.rollback()
+    else:
+        # Values taken before the commit expires db_entry, so feeding them costs no query
+        iv_history.push(iv, timestamp)
+        ou_calibrator.push(iv, timestamp)
+
+def collect_live_market_data() -> dict:
+    """Collect, store and publish a snapshot on the request thread
+    
+    Subscribers are not run here; the request analyzes the snapshot itself.
+    """
+    market_data = ETHDataCollector().collect_all_data()
+    store_market_data(market_data)
+    snapshot_poller.publish(market_data, notify=False)
+    return dict(market_data)
+
+def polled_market_data() -> dict:
+    """Copy of the running poller's recent snapshot with its age, or None"""
+    if not snapshot_poller.running:
+        return None
+    market_data = snapshot_poller.latest()
+    if market_data is not None:
+        market_data['snapshot_age_seconds'] = snapshot_poller.age()
+    return market_data
+
+def current_market_data(live: bool = False) -> dict:
+    """The poller's latest snapshot, or a live collection when asked for or when no recent snapshot exists"""
+    market_data = None if live else polled_market_data()
+    if market_data is None:
+        return collect_live_market_data()
+    return market_data
+
+def warm_analysis(market_data: dict):
+    """Precompute the memoized analysis of a new snapshot so /analysis reads it from memory"""
+    ETHOptionsAnalyzer(projection_method='auto').memoized_analysis(market_data)
+
+def init_snapshot_poller(app, interval: float = None) -> bool:
+    """Start the background poller, persisting snapshots inside app's context"""
+    def persist(market_data):
+        with app.app_context():
+            store_market_data(market_data)
+    
+    snapshot_poller.persist = persist
+    if interval is not None:
+        snapshot_poller.interval = interval
+    snapshot_poller.subscribe(warm_analysis)
+    return snapshot_poller.start()
 
 @eth_bp.route('/market-data', methods=['GET'])
 def get_market_data():
-    """Get current ETH market data"""
+    """Get current ETH market data (latest background snapshot unless ?live=true)"""
     try:
-        collector = ETHDataCollector()
-        
-        # Get fresh data
-        market_data = collector.collect_all_data()
-        
-        # Store in database
-        db_entry = ETHMarketData(
-            eth_price=market_data.get('eth_price'),
-            eth_iv_deribit=market_data.get('eth_iv_deribit'),
-            eth_iv_binance=market_data.get('eth_iv_binance'),
-            eth_rv_1d=market_data.get('eth_rv_1d'),
-            eth_rv_7d=market_data.get('eth_rv_7d'),
-            eth_rv_30d=market_data.get('eth_rv_30d'),
-            btc_rv_7d=market_data.get('btc_rv_7d'),
-            btc_rv_30d=market_data.get('btc_rv_30d'),
-            vix=market_data.get('vix'),
-            move_index=market_data.get('move_index')
-        )
-        
-        try:
-            db.session.add(db_entry)
-            db.session.commit()
-        except Exception as db_error:
-            logger.warning(f"Failed to store market data in DB: {db_error}")
-            db.session.rollback()
+        market_data = current_market_data(request.args.get('live', 'false').lower() == 'true')
         
         # Add options flow data
         market_data.update({
@@ -68,11 +158,16 @@ def get_market_data():
             'net_put_bias': market_data.get('net_put_bias', 10.1)
         })
         
-        return jsonify({
+        response = {
             'success': True,
             'data': market_data,
             'timestamp': datetime.utcnow().isoformat()
-        }), 200
+        }
+        failed = [source for source, status in market_data.get('source_status', {}).items()
+                  if status['status'] != 'ok']
+        if failed:
+            response['warning'] = f"Partial data: {', '.join(failed)} unavailable"
+        return jsonify(response), 200
         
     except Exception as e:
         logger.error(f"Error fetching market data: {e}")
@@ -110,15 +205,19 @@ def run_analysis():
             }), 400
         
         # Get market data
-        collector = ETHDataCollector()
         if validated_data.get('use_cached_data', False):
-            market_data = collector.get_cached_data()
+            market_data = ETHDataCollector().get_cached_data()
         else:
-            market_data = collector.collect_all_data()
+            market_data = current_market_data(validated_data.get('live', False))
         
         # Run analysis
-        analyzer = ETHOptionsAnalyzer()
-        analysis_results = analyzer.comprehensive_analysis(market_data)
+        analyzer = ETHOptionsAnalyzer(projection_method='auto')  # Closed form unless IV bounds bind
+        analysis_results = analyzer.memoized_analysis(market_data)
+        
+        # Spot x vol repricing of the recommended positions if requested
+        if validated_data.get('include_stress_test', False):
+            analysis_results['stress_test'] = analyzer.stress_test_positions(
+                analysis_results.get('trading_positions', []), market_data.get('eth_price', 3600))
         
         # Add AI insights if requested
         if validated_data.get('include_ai_insights', True):
@@ -194,11 +293,14 @@ def ai_chat():
         question = data['question']
         
         # Get latest market data and analysis
-        collector = ETHDataCollector()
-        market_data = collector.get_cached_data()  # Use cached for speed
+        if data.get('live', False):
+            market_data = collect_live_market_data()
+        else:
+            # Background snapshot, or demo data for speed when the poller has none
+            market_data = polled_market_data() or ETHDataCollector().get_cached_data()
         
-        analyzer = ETHOptionsAnalyzer()
-        analysis_results = analyzer.comprehensive_analysis(market_data)
+        analyzer = ETHOptionsAnalyzer(projection_method='auto')  # Closed form unless IV bounds bind
+        analysis_results = analyzer.memoized_analysis(market_data)
         
         # Get AI response
         ai_assistant = ETHOptionsAIAssistant()
@@ -275,4 +377,107 @@ def get_analysis_history():
         return jsonify({
             'success': False,
             'error': 'Failed to fetch analysis history'
-        }), 500
\ No newline at end of file
+        }), 500
+
+@eth_bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Get hit/miss counters of the in-memory caches"""
+    return jsonify({
+        'success': True,
+        'caches': {
+            'projections': projection_cache.stats(),
+            'analyses': analysis_memo.stats(),
+            'market_data_sources': source_cache.stats()
+        },
+        'market_data_fetches': source_flights.stats(),
+        'snapshot_poller': snapshot_poller.stats(),
+        'timestamp': datetime.utcnow().isoformat()
+    }), 200
+
+def load_snapshot_history() -> pd.DataFrame:
+    """Stored market snapshots with the put-call skew of the latest analysis at or before each one"""
+    snapshots = pd.DataFrame(
+        ETHMarketData.query.with_entities(
+            ETHMarketData.timestamp, ETHMarketData.eth_price, ETHMarketData.eth_iv_deribit, ETHMarketData.eth_rv_30d
+        ).order_by(ETHMarketData.timestamp).all(),
+        columns=['timestamp', 'eth_price', 'eth_iv_deribit', 'eth_rv_30d']
+    )
+    skews = pd.DataFrame(
+        ETHAnalysisResults.query.with_entities(
+            ETHAnalysisResults.timestamp, ETHAnalysisResults.put_call_skew
+        ).filter(ETHAnalysisResults.put_call_skew.isnot(None)).order_by(ETHAnalysisResults.timestamp).all(),
+        columns=['timestamp', 'put_call_skew']
+    )
+    if snapshots.empty or skews.empty:
+        return snapshots
+    return pd.merge_asof(snapshots, skews, on='timestamp', direction='backward')
+
+@eth_bp.route('/backtest', methods=['GET'])
+def run_backtest():
+    """Backtest the recommended-position entry rules over stored market snapshots"""
+    try:
+        overlapping = request.args.get('overlapping', 'false').lower() == 'true'
+        
+        features = prepare_features(load_snapshot_history())
+        if len(features['time']) < 2:
+            return jsonify({
+                'success': False,
+                'error': 'Not enough stored market data to backtest'
+            }), 400
+        
+        results = StrategyBacktester(overlapping=overlapping).run(features)
+        
+        return jsonify({
+            'success': True,
+            'backtest': results,
+            'timestamp': datetime.utcnow().isoformat()
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error running backtest: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Backtest failed',
+            'details': str(e)
+        }), 500
+
+@eth_bp.route('/backtest/sweep', methods=['POST'])
+def run_threshold_sweep():
+    """Backtest a grid of entry thresholds for one strategy and return the best combinations"""
+    try:
+        schema = ThresholdSweepSchema()
+        try:
+            params = schema.load(request.get_json() or {})
+        except ValidationError as err:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid input',
+                'details': err.messages
+            }), 400
+        
+        features = prepare_features(load_snapshot_history())
+        if len(features['time']) < 2:
+            return jsonify({
+                'success': False,
+                'error': 'Not enough stored market data to backtest'
+            }), 400
+        
+        backtester = StrategyBacktester(overlapping=params['overlapping'])
+        ranked = backtester.sweep(features, params['strategy'], params['grid'],
+                                  rank_by=params['rank_by'], min_trades=params['min_trades'])
+        
+        return jsonify({
+            'success': True,
+            'strategy': params['strategy'],
+            'n_combinations': len(ranked),
+            'results': ranked.head(params['top']).replace({np.nan: None}).to_dict(orient='records'),
+            'timestamp': datetime.utcnow().isoformat()
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error running threshold sweep: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Threshold sweep failed',
+            'details': str(e)
+        }), 500
@@ -0,0 +1,145 @@
+import numpy as np
+import pytest
+
+import analysis_engine
+from analysis_engine import ETHOptionsAnalyzer, snapshot_hash
+from iv_window import RollingIVWindow
+from pricing_engine import DAYS_PER_YEAR, black_scholes_price
+
+SPOT = 3500.0
+
+
+def option_chain(dtes=(7, 30, 90)):
+    """Quotes priced off a skewed smile, enough per expiry for an SVI fit"""
+    quotes = []
+    for dte in dtes:
+        for strike in np.linspace(2500, 4700, 12):
+            iv = 0.65 + 0.25 * np.log(strike / SPOT) ** 2 - 0.1 * np.log(strike / SPOT)
+            is_call = strike >= SPOT
+            quotes.append({
+                'strike': float(strike),
+                'dte': dte,
+                'option_type': 'call' if is_call else 'put',
+                'price': float(black_scholes_price(SPOT, strike, dte / DAYS_PER_YEAR, iv, 0.0, is_call)),
+                'underlying_price': SPOT
+            })
+    return quotes
+
+
+@pytest.fixture
+def market_data():
+    return {'eth_price': SPOT, 'eth_iv_deribit': 65.4, 'eth_rv_30d': 59.0, 'vix': 17.73,
+            'option_chain': option_chain(), 'timestamp': '2024-01-01T00:00:00'}
+
+
+def test_memoized_analysis_returns_independent_copies_and_restores_the_surface(market_data):
+    analysis_engine.analysis_memo.clear()
+    window = RollingIVWindow()
+
+    first_analyzer = ETHOptionsAnalyzer(iv_window=window)
+    first = first_analyzer.memoized_analysis(market_data)
+    assert first_analyzer.surface is not None
+    first['current_metrics']['eth_iv'] = -1.0
+    first['trading_positions'].clear()
+
+    second_analyzer = ETHOptionsAnalyzer(iv_window=window)
+    second = second_analyzer.memoized_analysis(dict(market_data, timestamp='2024-01-01T00:05:00'))
+    assert analysis_engine.analysis_memo.stats()['hits'] >= 1
+    assert second['current_metrics']['eth_iv'] == 65.4
+    assert second['trading_positions']
+    assert second_analyzer.surface is first_analyzer.surface
+    assert second['vol_surface'] == second_analyzer.surface.to_dict()
+
+
+def test_snapshot_hash_ignores_key_order_and_volatile_fields():
+    snapshot = {'eth_price': SPOT, 'eth_iv_deribit': 65.4, 'rv_source': {'eth_rv_30d': 'intraday', 'eth_rv_7d': 'daily'},
+                'timestamp': '2024-01-01T00:00:00', 'source_status': {'deribit': 'ok'}}
+    reordered = {'rv_source': {'eth_rv_7d': 'daily', 'eth_rv_30d': 'intraday'}, 'eth_iv_deribit': 65.4,
+                 'source_status': {'deribit': 'timeout'}, 'eth_price': SPOT, 'timestamp': '2024-01-01T00:01:00'}
+    assert snapshot_hash(snapshot) == snapshot_hash(reordered)
+    assert snapshot_hash(snapshot) != snapshot_hash(dict(snapshot, eth_price=SPOT + 1))
+
+
+def test_cached_iv_projection_serves_repeats_from_the_cache():
+    analysis_engine.projection_cache.clear()
+    analyzer = ETHOptionsAnalyzer(iv_quantization=0.5)
+    first = analyzer.cached_iv_projection(65.4, n_simulations=2000, seed=3)
+    assert first == analyzer.monte_carlo_iv_simulation(65.5, n_simulations=2000, seed=3)
+
+    hits = analysis_engine.projection_cache.stats()['hits']
+    first['mc_mean'] = -1.0
+    repeat = analyzer.cached_iv_projection(65.6, n_simulations=2000, seed=3)  # Same 0.5 vol point bucket
+    assert analysis_engine.projection_cache.stats()['hits'] == hits + 1
+    assert repeat['mc_mean'] != -1.0
+
+    other = ETHOptionsAnalyzer(iv_quantization=0.5, variance_reduction='antithetic')
+    assert other.cached_iv_projection(65.4, n_simulations=2000, seed=3) != repeat
+    assert analysis_engine.projection_cache.stats()['hits'] == hits + 1
+
+
+STRUCTURES = {
+    'put_spread': [{'option_type': 'put', 'strike': 3200, 'dte': 30, 'quantity': -1},
+                   {'option_type': 'put', 'strike': 2900, 'dte': 30, 'quantity': 1}],
+    'strangle': [{'option_type': 'put', 'strike': 3000, 'dte': 14, 'quantity': -2},
+                 {'option_type': 'call', 'strike': 4100, 'dte': 45, 'quantity': -2}]
+}
+
+
+def priced_positions(analyzer, current_iv=65.4):
+    priced = analyzer.price_structures(STRUCTURES, SPOT, current_iv)
+    return priced, [{'position_type': name, 'legs': structure['legs']} for name, structure in priced.items()]
+
+
+def leg_value(leg, spot, vol_shock=0.0, horizon_days=0.0, rate=0.0):
+    remaining = max(leg['dte'] - horizon_days, 0.0) / DAYS_PER_YEAR
+    vol = max(leg['iv'] + vol_shock, analysis_engine.STRESS_MIN_IV) / 100
+    return float(black_scholes_price(spot, leg['strike'], remaining, vol, rate, leg['option_type'] == 'call'))
+
+
+def test_stress_grid_cells_match_black_scholes():
+    analyzer = ETHOptionsAnalyzer()
+    _, positions = priced_positions(analyzer)
+    spot_moves, vol_shocks = [-0.2, 0.0, 0.15], [-10.0, 0.0, 25.0]
+    grid = analyzer.stress_test_positions(positions, SPOT, spot_moves, vol_shocks, horizon_days=3.0)
+
+    for position in positions:
+        pnl = np.array(grid['positions'][position['position_type']]['pnl'])
+        for i, move in enumerate(spot_moves):
+            for j, shock in enumerate(vol_shocks):
+                expected = sum(leg['quantity'] * (leg_value(leg, SPOT * (1 + move), shock, 3.0, analyzer.risk_free_rate)
+                                                  - leg['price']) for leg in position['legs'])
+                assert pnl[i, j] == pytest.approx(expected, abs=0.01)
+    combined = sum(np.array(grid['positions'][name]['pnl']) for name in STRUCTURES)
+    np.testing.assert_allclose(grid['combined']['pnl'], combined, atol=0.02)
+
+
+def test_stress_grid_base_cell_is_the_current_value():
+    analyzer = ETHOptionsAnalyzer()
+    _, positions = priced_positions(analyzer)
+    grid = analyzer.stress_test_positions(positions, SPOT, horizon_days=0.0)
+    base = (list(analysis_engine.STRESS_SPOT_MOVES).index(0.0), list(analysis_engine.STRESS_VOL_SHOCKS).index(0.0))
+    for name in STRUCTURES:
+        assert grid['positions'][name]['pnl'][base[0]][base[1]] == 0.0
+
+
+def test_price_structures_match_black_scholes_per_leg():
+    analyzer = ETHOptionsAnalyzer()
+    priced, _ = priced_positions(analyzer)
+    for name, legs in STRUCTURES.items():
+        structure = priced[name]
+        prices = [leg_value(dict(leg, iv=65.4), SPOT, rate=analyzer.risk_free_rate) for leg in legs]
+        assert [leg['price'] for leg in structure['legs']] == pytest.approx(prices, rel=1e-12)
+        assert structure['net_premium'] == pytest.approx(-sum(leg['quantity'] * p for leg, p in zip(legs, prices)))
+
+
+def test_price_structures_read_leg_ivs_from_the_fitted_surface(market_data):
+    analyzer = ETHOptionsAnalyzer()
+    analyzer.comprehensive_analysis(market_data)
+    priced, _ = priced_positions(analyzer)
+    for name, legs in STRUCTURES.items():
+        strikes = np.array([leg['strike'] for leg in legs], dtype=float)
+        dtes = np.array([leg['dte'] for leg in legs], dtype=float)
+        ivs = analyzer.surface.grid.implied_vol(np.log(strikes / SPOT), dtes)
+        for leg, iv in zip(priced[name]['legs'], ivs):
+            assert leg['iv'] == pytest.approx(iv)
+            assert leg['price'] == pytest.approx(leg_value(leg, SPOT, rate=analyzer.risk_free_rate), rel=1e-12)
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis_engine import ENTRY_THRESHOLDS
+from backtest import MAX_SWEEP_COMBINATIONS, StrategyBacktester, prepare_features, sweep_size
+
+
+@pytest.fixture(scope='module')
+def features():
+    rng = np.random.default_rng(7)
+    n = 1500
+    iv = 60 + np.cumsum(rng.normal(0, 1, n))
+    history = pd.DataFrame({
+        'timestamp': pd.date_range('2024-01-01', periods=n, freq='6h'),
+        'eth_price': 3000 * np.exp(np.cumsum(rng.normal(0, 0.01, n))),
+        'eth_iv_deribit': iv,
+        'eth_rv_30d': iv - rng.normal(3, 4, n)
+    })
+    return prepare_features(history)
+
+
+def test_sweep_size_is_product_of_grid_lengths():
+    assert sweep_size({'vrp': [1, 2, 3], 'ivr': [0.1, 0.2]}) == 6
+    assert sweep_size({}) == 1
+
+
+def test_sweep_rejects_grids_above_cap(features):
+    grid = {'vrp': list(range(200)), 'ivr': list(np.linspace(0, 1, MAX_SWEEP_COMBINATIONS // 200 + 1))}
+    assert sweep_size(grid) > MAX_SWEEP_COMBINATIONS
+    with pytest.raises(ValueError, match='combinations'):
+        StrategyBacktester().sweep(features, 'short_put_spread', grid)
+
+
+@pytest.mark.parametrize('overlapping', [False, True])
+def test_sweep_matches_individual_runs(features, overlapping):
+    grid = {'vrp': [0.0, 2.0, 5.0], 'ivr': [0.2, 0.5]}
+    backtester = StrategyBacktester(overlapping=overlapping)
+    ranked = backtester.sweep(features, 'short_put_spread', grid, min_trades=0)
+    assert len(ranked) == sweep_size(grid)
+
+    for row in ranked.itertuples():
+        rules = {**ENTRY_THRESHOLDS['short_put_spread'], 'vrp': row.vrp, 'ivr': row.ivr}
+        run = backtester.run(features, {'short_put_spread': rules})
+        expected = run['strategies']['short_put_spread']
+        assert row.n_trades == expected['n_trades']
+        assert row.total_pnl == pytest.approx(expected['total_pnl'])
+
+
+def test_sweep_schema_rejects_grids_above_cap():
+    from marshmallow import ValidationError
+    from src.routes.eth_analysis import ThresholdSweepSchema
+
+    schema = ThresholdSweepSchema()
+    assert schema.load({'strategy': 'short_put_spread', 'grid': {'vrp': [1.0, 2.0]}})['grid'] == {'vrp': [1.0, 2.0]}
+    grid = {name: list(np.linspace(0, 1, 200)) for name in ('vrp', 'ivr')}
+    with pytest.raises(ValidationError) as err:
+        schema.load({'strategy': 'short_put_spread', 'grid': grid})
+    assert 'grid' in err.value.messages
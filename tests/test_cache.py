@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+
+from cache import SingleFlight, StaleWhileRevalidateCache, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_stale_while_revalidate_states():
+    clock = FakeClock()
+    cache = StaleWhileRevalidateCache({'price': (10, 60)}, clock=clock)
+    assert cache.lookup('price')[0] == 'miss'
+
+    cache.set('price', 3500.0)
+    assert cache.lookup('price')[:2] == ('fresh', 3500.0)
+    clock.now += 10
+    assert cache.lookup('price')[:2] == ('fresh', 3500.0)
+    clock.now += 1
+    assert cache.lookup('price')[:2] == ('stale', 3500.0)
+    clock.now += 50
+    assert cache.lookup('price') == ('expired', None, None)
+
+    cache.set('price', 3600.0)
+    assert cache.lookup('price')[:2] == ('fresh', 3600.0)
+    stats = cache.stats()
+    assert (stats['fresh_hits'], stats['stale_hits'], stats['misses'], stats['expirations']) == (3, 1, 2, 1)
+
+
+def test_only_one_background_refresh_is_claimed():
+    cache = StaleWhileRevalidateCache()
+    assert cache.claim_refresh('vix')
+    assert not cache.claim_refresh('vix')
+    assert cache.claim_refresh('eth_price')
+    cache.release_refresh('vix')
+    assert cache.claim_refresh('vix')
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 42
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do('k', slow)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flights.do('k', slow))) for _ in range(3)]
+    for thread in followers:
+        thread.start()
+    while flights.stats()['coalesced'] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(results, key=lambda r: r[1]) == [(42, False)] + [(42, True)] * 3
+    assert flights.stats()['in_flight'] == 0
+
+    # Nothing is kept once the call finished
+    assert flights.do('k', lambda: 7) == (7, False)
+
+
+def test_single_flight_shares_errors():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ConnectionError('down')
+
+    errors = []
+
+    def call():
+        try:
+            flights.do('k', failing)
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    started.wait(5)
+    threads.append(threading.Thread(target=call))
+    threads[1].start()
+    while flights.stats()['coalesced'] < 1:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(errors) == 2 and errors[0] is errors[1]
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=None)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'b' is now the least recently used
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+
+    cache.set('a', 10)  # Overwriting refreshes recency too
+    cache.set('d', 4)
+    assert cache.get('c') is None
+    assert (cache.get('a'), cache.get('d')) == (10, 4)
+    assert cache.stats()['evictions'] == 2
+
+
+def test_ttl_cache_expires_entries_by_age():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=4, ttl=60, clock=clock)
+    cache.set('a', 1)
+    clock.now += 30
+    cache.set('b', 2)
+    clock.now += 30
+    assert cache.get('a') == 1  # Exactly ttl old is still valid, and reads do not extend the age
+    clock.now += 1
+    assert cache.get('a', 'gone') == 'gone'
+    assert cache.get('b') == 2
+    clock.now += 30
+    assert cache.get('b') is None
+    assert len(cache) == 0
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['expirations']) == (2, 2, 2)
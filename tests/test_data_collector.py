@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from cache import SingleFlight, StaleWhileRevalidateCache
+from data_collector import SOURCE_CACHE_POLICIES, ETHDataCollector
+from garch import GARCHModel
+from realized_vol import StreamingRealizedVariance
+
+
+class Response:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class StubSession:
+    """Answers every upstream the collector calls after a per-endpoint delay, counting calls"""
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        endpoint = next(key for key in ('simple/price', 'market_chart', 'volatility_index', 'book_summary',
+                                        'tradingview', 'VIX') if key in url)
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        time.sleep(self.delays.get(endpoint, 0.0))
+        now_ms = int(time.time() * 1000)
+        return Response({
+            'simple/price': {'ethereum': {'usd': 3600.0}},
+            'market_chart': {'prices': [[now_ms - (90 - i) * 86400000, 3000.0 + 10 * (i % 7)] for i in range(91)]},
+            'volatility_index': {'result': [[now_ms, 66.0]]},
+            'book_summary': {'result': []},
+            'tradingview': {'result': {}},
+            'VIX': {'chart': {'result': [{'meta': {'regularMarketPrice': 18.0}}]}}
+        }[endpoint])
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_collector(session, **kwargs):
+    return ETHDataCollector(session=session, intraday_rv=StreamingRealizedVariance(), **kwargs)
+
+
+def test_collects_every_source_concurrently():
+    session = StubSession({'simple/price': 0.2, 'volatility_index': 0.2, 'VIX': 0.2, 'market_chart': 0.2})
+    start = time.perf_counter()
+    data = make_collector(session).collect_all_data()
+    elapsed = time.perf_counter() - start
+
+    assert data['eth_price'] == 3600.0 and data['eth_iv_deribit'] == 66.0 and data['vix'] == 18.0
+    assert all(status['status'] == 'ok' and status['cache'] == 'miss' for status in data['source_status'].values())
+    assert elapsed < 0.6  # Five 0.2 s sources in parallel, not in sequence
+
+
+def test_cache_states_fresh_stale_and_expired():
+    clock = FakeClock()
+    session = StubSession()
+    collector = make_collector(session, cache=StaleWhileRevalidateCache(SOURCE_CACHE_POLICIES, clock=clock))
+    ttl, max_stale = SOURCE_CACHE_POLICIES['vix']
+
+    def fetch():
+        return asyncio.run(collector.fetch_source('vix', collector.fetch_vix))
+
+    value, status = fetch()
+    assert (value, status['cache'], session.calls['VIX']) == (18.0, 'miss', 1)
+
+    value, status = fetch()
+    assert (value, status['cache'], session.calls['VIX']) == (18.0, 'fresh', 1)
+
+    clock.now += ttl + 1
+    value, status = fetch()
+    assert (value, status['cache']) == (18.0, 'stale')
+    deadline = time.time() + 5
+    while session.calls['VIX'] < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert session.calls['VIX'] == 2  # One background refresh
+    time.sleep(0.05)
+    assert fetch()[1]['cache'] == 'fresh'
+
+    clock.now += max_stale + 1
+    value, status = fetch()
+    assert (value, status['cache'], session.calls['VIX']) == (18.0, 'expired', 3)
+
+
+def test_deadline_timeout_and_the_call_after_it():
+    session = StubSession({'VIX': 0.6})
+    collector = make_collector(session, deadlines={'vix': 0.2})
+
+    start = time.perf_counter()
+    data = collector.collect_all_data()
+    assert time.perf_counter() - start < 0.5
+    assert data['vix'] is None
+    assert data['source_status']['vix']['status'] == 'timeout'
+    assert data['source_status']['eth_price']['status'] == 'ok'
+
+    # Nothing was cached: the next call is a miss again, joins the abandoned fetch and waits the deadline again
+    value, status = asyncio.run(collector.fetch_source('vix', collector.fetch_vix))
+    assert (value, status['status'], status['cache']) == (None, 'timeout', 'miss')
+    assert status['elapsed_ms'] >= 200
+    assert session.calls['VIX'] == 1
+
+    # Once the abandoned fetch returns, its value is served from the cache
+    time.sleep(0.5)
+    value, status = asyncio.run(collector.fetch_source('vix', collector.fetch_vix))
+    assert (value, status['cache'], session.calls['VIX']) == (18.0, 'fresh', 1)
+
+
+def test_concurrent_collections_share_each_fetch():
+    session = StubSession({endpoint: 0.3 for endpoint in ('simple/price', 'market_chart', 'volatility_index',
+                                                           'book_summary', 'tradingview', 'VIX')})
+    flights = SingleFlight()
+    collectors = [make_collector(session, flights=flights) for _ in range(4)]
+    results = []
+    threads = [threading.Thread(target=lambda c=c: results.append(c.collect_all_data())) for c in collectors]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert len(results) == 4
+    assert session.calls['simple/price'] == 1 and session.calls['VIX'] == 1
+    coalesced = sum(result['source_status']['vix']['coalesced'] for result in results)
+    assert coalesced == 3
+    assert flights.stats()['coalesced'] >= 3 * 5
+
+
+def test_realized_vols_annualize_over_365_calendar_days():
+    """Crypto trades every day, so reported RVs scale by sqrt(365) rather than the equity sqrt(252)"""
+    prices = 3000 * np.exp(np.cumsum(np.random.default_rng(2).normal(0, 0.03, 91)))
+    returns = np.diff(np.log(prices))
+
+    collector = make_collector(StubSession())
+    assert collector.calculate_realized_volatility(prices, 30) == pytest.approx(np.std(returns[-30:]) * np.sqrt(365) * 100)
+    assert collector.calculate_realized_volatilities(prices, (7, 90)) == pytest.approx(
+        {7: np.std(returns[-7:]) * np.sqrt(365) * 100, 90: np.std(returns) * np.sqrt(365) * 100})
+
+    assert StreamingRealizedVariance(bar_seconds=300).periods_per_year == 365 * 288
+    assert GARCHModel().periods_per_year == 365
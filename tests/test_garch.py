@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from garch import RETURN_SCALE, GARCHModel, _conditional_variance, _negative_log_likelihood
+
+
+def simulate_gjr(n, omega=0.05, alpha=0.06, gamma=0.08, beta=0.88, seed=0):
+    """Daily decimal returns from a GJR-GARCH(1,1) with parameters in percent-return units"""
+    rng = np.random.default_rng(seed)
+    returns = np.empty(n)
+    variance = omega / (1 - alpha - gamma / 2 - beta)
+    shock = 0.0
+    for t in range(n):
+        if t:
+            variance = omega + (alpha + gamma * (shock < 0)) * shock * shock + beta * variance
+        shock = np.sqrt(variance) * rng.standard_normal()
+        returns[t] = shock
+    return returns / RETURN_SCALE
+
+
+def loop_variance(params, sq, negative, variance0):
+    omega, alpha, gamma, beta = params
+    variance = np.empty_like(sq)
+    variance[0] = variance0
+    for t in range(1, len(sq)):
+        variance[t] = omega + (alpha + gamma * negative[t - 1]) * sq[t - 1] + beta * variance[t - 1]
+    return variance
+
+
+@pytest.fixture(scope='module')
+def shocks():
+    returns = simulate_gjr(1500) * RETURN_SCALE
+    shocks = returns - returns.mean()
+    return shocks * shocks, (shocks < 0).astype(float), float((shocks * shocks).mean())
+
+
+def test_filter_recursion_matches_loop(shocks):
+    sq, negative, variance0 = shocks
+    params = (0.04, 0.07, 0.05, 0.9)
+    np.testing.assert_allclose(_conditional_variance(params, sq, negative, variance0),
+                               loop_variance(params, sq, negative, variance0), rtol=1e-10)
+
+
+@pytest.mark.parametrize('params', [(0.04, 0.07, 0.05, 0.9), (0.2, 0.15, 0.0, 0.7), (0.01, 0.02, 0.2, 0.85)])
+def test_gradient_matches_finite_differences(shocks, params):
+    sq, negative, variance0 = shocks
+    params = np.array(params)
+    _, gradient = _negative_log_likelihood(params, sq, negative, variance0)
+
+    numeric = np.empty(4)
+    for i in range(4):
+        h = 1e-6 * max(abs(params[i]), 1e-3)
+        up, down = params.copy(), params.copy()
+        up[i] += h
+        down[i] -= h
+        numeric[i] = (_negative_log_likelihood(up, sq, negative, variance0)[0]
+                      - _negative_log_likelihood(down, sq, negative, variance0)[0]) / (2 * h)
+    np.testing.assert_allclose(gradient, numeric, rtol=1e-5)
+
+
+def test_forecast_matches_step_by_step_loop():
+    returns = simulate_gjr(1500, seed=3)
+    model = GARCHModel()
+    model.fit(returns)
+
+    scaled = returns * RETURN_SCALE
+    shocks = scaled - scaled.mean()
+    sq, negative = shocks * shocks, (shocks < 0).astype(float)
+    omega, alpha, gamma, beta = model.params
+    variance = loop_variance(model.params, sq, negative, float(sq.mean()))
+
+    # Expected daily variance k days ahead: sigma2[T+1] from the last shock, then omega + persistence * sigma2
+    ahead = omega + (alpha + gamma * negative[-1]) * sq[-1] + beta * variance[-1]
+    persistence = alpha + 0.5 * gamma + beta
+    path = []
+    for _ in range(90):
+        path.append(ahead)
+        ahead = omega + persistence * ahead
+
+    for h, vol in model.forecast((1, 30, 60, 90)).items():
+        expected = np.sqrt(np.mean(path[:h]) * model.periods_per_year) / RETURN_SCALE * 100
+        assert vol == pytest.approx(expected, rel=1e-10)
+
+
+def test_fit_recovers_parameters_and_warm_starts():
+    returns = simulate_gjr(5000, seed=5)
+    model = GARCHModel()
+    cold = model.fit(returns)
+    assert cold['converged'] and not cold['warm_started']
+    assert cold['alpha'] == pytest.approx(0.06, abs=0.03)
+    assert cold['gamma'] == pytest.approx(0.08, abs=0.05)
+    assert cold['beta'] == pytest.approx(0.88, abs=0.04)
+
+    warm = model.fit(returns)
+    assert warm['warm_started'] and warm['iterations'] <= cold['iterations']
+    assert warm['log_likelihood'] == pytest.approx(cold['log_likelihood'], abs=1e-3)
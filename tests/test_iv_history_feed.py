@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+from iv_window import RollingIVWindow
+from ou_calibration import OUCalibrator
+from src.models.eth_data import ETHMarketData, db
+from src.routes import eth_analysis
+
+@pytest.fixture
+def app(monkeypatch):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    app.register_blueprint(eth_analysis.eth_bp, url_prefix='/api/eth')
+    monkeypatch.setattr(eth_analysis, 'iv_history', RollingIVWindow())
+    monkeypatch.setattr(eth_analysis, 'ou_calibrator', OUCalibrator())
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def market_data_queries():
+    """Statements reading eth_market_data, recorded while the context is open"""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith('SELECT') and 'eth_market_data' in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    return statements, lambda: event.remove(db.engine, 'before_cursor_execute', record)
+
+
+def test_startup_backfill_then_stored_snapshots_feed_the_window_directly(app):
+    start = datetime.utcnow() - timedelta(days=10)
+    for day in range(5):
+        db.session.add(ETHMarketData(timestamp=start + timedelta(days=day), eth_iv_deribit=60.0 + day))
+    db.session.commit()
+    eth_analysis.sync_iv_history()
+    assert len(eth_analysis.iv_history) == 5
+
+    statements, stop = market_data_queries()
+    try:
+        eth_analysis.store_market_data({'eth_price': 3500.0, 'eth_iv_deribit': 70.0})
+        eth_analysis.store_market_data({'eth_price': 3500.0, 'eth_iv_deribit': None})
+    finally:
+        stop()
+    assert statements == []
+    assert len(eth_analysis.iv_history) == 6
+    assert eth_analysis.iv_history.iv_rank(70.0) == 1.0
+    assert ETHMarketData.query.count() == 7
+
+
+def test_analysis_requests_do_not_query_iv_history(app):
+    statements, stop = market_data_queries()
+    try:
+        response = app.test_client().post('/api/eth/analysis',
+                                          json={'use_cached_data': True, 'include_ai_insights': False})
+    finally:
+        stop()
+    assert response.status_code == 200
+    assert statements == []
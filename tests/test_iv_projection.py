@@ -0,0 +1,127 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from analysis_engine import ETHOptionsAnalyzer
+from iv_paths import draw_standard_normals, simulate_iv_steps
+
+CURRENT_IV = 65.4
+DAYS = 30
+
+
+@pytest.fixture(scope='module')
+def analytic():
+    return ETHOptionsAnalyzer().analytic_iv_projection(CURRENT_IV, DAYS)
+
+
+@pytest.mark.parametrize('variance_reduction', [None, 'antithetic', 'sobol', 'control_variate'])
+def test_simulation_matches_closed_form(analytic, variance_reduction):
+    analyzer = ETHOptionsAnalyzer(variance_reduction=variance_reduction)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        simulated = analyzer.monte_carlo_iv_simulation(CURRENT_IV, 2**16, DAYS, seed=5)
+
+    assert not analytic['bounds_binding']
+    assert simulated['mc_mean'] == pytest.approx(analytic['mc_mean'], abs=0.1)
+    assert simulated['mc_std'] == pytest.approx(analytic['mc_std'], rel=0.03)
+    for key in ('mc_5th_percentile', 'mc_median', 'mc_95th_percentile'):
+        assert simulated[key] == pytest.approx(analytic[key], abs=0.25)
+
+
+def test_fan_matches_closed_form_at_every_horizon():
+    analyzer = ETHOptionsAnalyzer()
+    fan = analyzer.monte_carlo_iv_fan(CURRENT_IV, horizons=(7, 30, 90), n_simulations=100_000, seed=11)
+    for horizon in fan['fan']:
+        expected = analyzer.analytic_iv_projection(CURRENT_IV, horizon['days'])
+        assert horizon['mean'] == pytest.approx(expected['mc_mean'], abs=0.1)
+        assert horizon['std'] == pytest.approx(expected['mc_std'], rel=0.03)
+        assert horizon['percentiles']['50'] == pytest.approx(expected['mc_median'], abs=0.2)
+
+
+def test_path_blocks_do_not_change_the_distribution():
+    model = {'long_term_iv_mean': 70.0, 'mean_reversion_speed': 2.0, 'iv_volatility': 30.0}
+
+    def terminal(block_size):
+        out = np.empty(50_000)
+        for start, day, iv, _, _ in simulate_iv_steps(CURRENT_IV, len(out), DAYS, np.random.default_rng(0), model,
+                                                      (10.0, 150.0), block_size=block_size):
+            if day == DAYS:
+                out[start:start + len(iv)] = iv
+        return out
+
+    whole, blocked = terminal(50_000), terminal(4096)
+    assert whole.mean() == pytest.approx(blocked.mean(), abs=0.15)
+    assert whole.std() == pytest.approx(blocked.std(), rel=0.03)
+
+
+def test_sobol_falls_back_for_non_power_of_two_counts():
+    rng = np.random.default_rng(0)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        balanced = draw_standard_normals(rng, 4, 1024, 'sobol')
+        fallback = draw_standard_normals(rng, 4, 1000, 'sobol')
+    assert balanced.shape == (4, 1024) and fallback.shape == (4, 1000)
+    assert np.abs(balanced.mean(axis=1)).max() < 0.01
+
+
+@pytest.mark.parametrize('sobol', [False, True])
+def test_shard_sizes_cover_exactly_the_requested_paths(sobol):
+    from analysis_engine import MC_SHARD_SIZE, shard_sizes
+    from iv_paths import is_power_of_two
+
+    for n in (1, 1000, MC_SHARD_SIZE, 3 * MC_SHARD_SIZE + 12345, 10_000_000):
+        sizes = shard_sizes(n, sobol)
+        assert sum(sizes) == n
+        assert max(sizes) <= MC_SHARD_SIZE
+        if sobol:
+            assert all(is_power_of_two(size) for size in sizes)
+
+
+@pytest.mark.parametrize('variance_reduction', [None, 'sobol'])
+def test_sharded_projection_is_reproducible_whatever_the_worker_count(analytic, variance_reduction):
+    from concurrent.futures import ProcessPoolExecutor
+
+    analyzer = ETHOptionsAnalyzer(variance_reduction=variance_reduction)
+    n = 2 * 2**18 + 54321
+    with ProcessPoolExecutor(max_workers=1) as one, ProcessPoolExecutor(max_workers=3) as three:
+        first = analyzer.monte_carlo_iv_sharded(CURRENT_IV, n, DAYS, seed=9, executor=one)
+        again = analyzer.monte_carlo_iv_sharded(CURRENT_IV, n, DAYS, seed=9, executor=three)
+    assert first == again
+    assert first['mc_paths_used'] == n
+
+    assert first['mc_mean'] == pytest.approx(analytic['mc_mean'], abs=0.05)
+    assert first['mc_std'] == pytest.approx(analytic['mc_std'], rel=0.01)
+    assert first['mc_median'] == pytest.approx(analytic['mc_median'], abs=0.1)
+
+
+def seed_spread(variance_reduction, n_seeds=30):
+    """Spread over seeds of each estimate named in MC_ESTIMATES, i.e. its true Monte Carlo error"""
+    from analysis_engine import MC_ESTIMATES
+
+    analyzer = ETHOptionsAnalyzer(variance_reduction=variance_reduction)
+    runs = [analyzer.monte_carlo_iv_simulation(CURRENT_IV, 2**13, DAYS, seed=seed) for seed in range(n_seeds)]
+    return {name: np.std([run['mc_' + name] for run in runs]) for name in MC_ESTIMATES}
+
+
+@pytest.mark.parametrize('variance_reduction', ['antithetic', 'sobol', 'control_variate'])
+def test_variance_reduction_lowers_the_errors_it_targets(variance_reduction):
+    from analysis_engine import VARIANCE_REDUCED_ESTIMATES
+
+    baseline, reduced = seed_spread(None), seed_spread(variance_reduction)
+    for name in VARIANCE_REDUCED_ESTIMATES[variance_reduction]:
+        assert reduced[name] < 0.8 * baseline[name], name
+
+
+def test_target_stderr_stops_on_the_targeted_estimates():
+    target = 0.02
+    baseline = ETHOptionsAnalyzer().monte_carlo_iv_simulation(CURRENT_IV, days=DAYS, target_stderr=target)
+    assert baseline['converged']
+    assert max(baseline['mc_stderr'].values()) <= target
+
+    for variance_reduction in ('antithetic', 'sobol', 'control_variate'):
+        result = ETHOptionsAnalyzer(variance_reduction=variance_reduction).monte_carlo_iv_simulation(
+            CURRENT_IV, days=DAYS, target_stderr=target)
+        assert result['converged']
+        assert max(result['mc_stderr'][name] for name in result['mc_stderr_targets']) <= target
+        assert result['mc_paths_used'] < baseline['mc_paths_used']
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from scipy.stats import percentileofscore
+
+from iv_window import RollingIVWindow
+
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture(scope='module')
+def series():
+    rng = np.random.default_rng(8)
+    n = 3000
+    # Irregular sampling, values on the 0.01 rank grid with many ties
+    hours = np.cumsum(rng.integers(1, 12, n))
+    values = np.round(np.clip(60 + np.cumsum(rng.normal(0, 1.5, n)), 15, 180), 1)
+    return [START + timedelta(hours=int(h)) for h in hours], values
+
+
+def brute_window(times, values, end, window_days):
+    cutoff = times[end] - timedelta(days=window_days)
+    return np.array([v for t, v in zip(times[:end + 1], values[:end + 1]) if t >= cutoff])
+
+
+def test_percentile_matches_percentileofscore(series):
+    times, values = series
+    window = RollingIVWindow(window_days=30)
+    rng = np.random.default_rng(2)
+    for i, (timestamp, value) in enumerate(zip(times, values)):
+        assert window.push(value, timestamp)
+        if i % 97 == 0:
+            expected = brute_window(times, values, i, 30)
+            assert len(window) == len(expected)
+            for query in np.append(np.round(rng.uniform(10, 190, 5), 2), [value, expected.min(), expected.max()]):
+                assert window.percentile(query) == pytest.approx(percentileofscore(expected, query, kind='rank') / 100)
+
+
+def test_min_max_and_rank_track_the_window(series):
+    times, values = series
+    window = RollingIVWindow(window_days=10)
+    for i, (timestamp, value) in enumerate(zip(times, values)):
+        window.push(value, timestamp)
+        if i % 53 == 0:
+            expected = brute_window(times, values, i, 10)
+            assert (window.min, window.max) == (expected.min(), expected.max())
+            if len(expected) >= 2 and expected.max() > expected.min():
+                assert window.iv_rank(value) == pytest.approx(
+                    (value - expected.min()) / (expected.max() - expected.min()))
+
+
+def test_stale_and_missing_values_are_ignored():
+    window = RollingIVWindow(window_days=30)
+    assert window.percentile(50.0) is None
+    assert window.push(50.0, START)
+    assert not window.push(70.0, START)
+    assert not window.push(None, START + timedelta(hours=1))
+    assert len(window) == 1
+    assert window.iv_rank(50.0) is None
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ou_calibration import DEFAULT_OU_PARAMETERS, MIN_OU_PAIRS, OU_DT, OUCalibrator
+
+START = datetime(2020, 1, 1)
+
+
+def simulate_ou(kappa, theta, sigma, n_days, seed=0):
+    """Daily Euler path of the OU IV model, the discretization the projections simulate"""
+    rng = np.random.default_rng(seed)
+    path = np.empty(n_days)
+    path[0] = theta
+    for t in range(1, n_days):
+        path[t] = path[t - 1] + kappa * (theta - path[t - 1]) * OU_DT + sigma * np.sqrt(OU_DT) * rng.standard_normal()
+    return path
+
+
+def test_fit_recovers_known_parameters():
+    kappa, theta, sigma = 12.0, 60.0, 25.0
+    calibrator = OUCalibrator()
+    for day, iv in enumerate(simulate_ou(kappa, theta, sigma, 40_000, seed=3)):
+        calibrator.push(iv, START + timedelta(days=day, hours=12))
+
+    fit = calibrator.parameters()
+    assert fit['calibrated'] and fit['n_pairs'] == 40_000 - 2  # The last day is still open
+    assert fit['mean_reversion_speed'] == pytest.approx(kappa, rel=0.1)
+    assert fit['long_term_iv_mean'] == pytest.approx(theta, abs=0.5)
+    assert fit['iv_volatility'] == pytest.approx(sigma, rel=0.02)
+    assert fit['ar1_coefficient'] == pytest.approx(1 - kappa * OU_DT, abs=0.002)
+
+
+def test_pairs_use_the_last_iv_of_consecutive_days():
+    path = simulate_ou(12.0, 60.0, 25.0, 200, seed=5)
+    reference, calibrator = OUCalibrator(), OUCalibrator()
+    for day, iv in enumerate(path):
+        reference.push(iv, START + timedelta(days=day))
+        if day != 100:  # A missing day breaks two pairs
+            calibrator.push(iv + 5, START + timedelta(days=day, hours=1))  # Superseded intraday
+            calibrator.push(iv, START + timedelta(days=day, hours=23))
+    # Pairs close when the next day starts, so the last day is still open
+    assert reference.n == len(path) - 2
+    assert calibrator.n == reference.n - 2
+    assert not calibrator.push(50.0, START)  # Older than the latest observation
+
+
+def test_defaults_until_enough_pairs():
+    calibrator = OUCalibrator()
+    for day, iv in enumerate(simulate_ou(12.0, 60.0, 25.0, MIN_OU_PAIRS + 1, seed=1)):
+        calibrator.push(iv, START + timedelta(days=day))
+    fit = calibrator.parameters()
+    assert not fit['calibrated']
+    assert {key: fit[key] for key in DEFAULT_OU_PARAMETERS} == DEFAULT_OU_PARAMETERS
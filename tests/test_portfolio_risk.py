@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from analysis_engine import IV_CAP, IV_FLOOR, ETHOptionsAnalyzer
+from portfolio_risk import PortfolioRiskEngine, leg_arrays
+
+
+def test_leg_arrays_membership_groups_legs_by_position():
+    positions = [
+        {'position_type': 'a', 'legs': [
+            {'option_type': 'put', 'strike': 3000, 'dte': 30, 'quantity': -1, 'iv': 60, 'price': 80},
+            {'option_type': 'put', 'strike': 2800, 'dte': 30, 'quantity': 1, 'iv': 62, 'price': 40}]},
+        {'position_type': 'empty'},
+        {'position_type': 'b', 'legs': [
+            {'option_type': 'call', 'strike': 3600, 'dte': 14, 'quantity': -2, 'iv': 58, 'price': 90}]}
+    ]
+    legs = leg_arrays(positions)
+    assert legs['membership'].tolist() == [[1, 0, 0], [1, 0, 0], [0, 0, 1]]
+    assert legs['is_call'].tolist() == [False, False, True]
+    assert legs['quantity'] @ legs['membership'] == pytest.approx([0, 0, -2])
+    assert leg_arrays([])['membership'].shape == (0, 0)
+
+
+def test_horizon_iv_matches_closed_form_moments():
+    analyzer = ETHOptionsAnalyzer()
+    engine = PortfolioRiskEngine(horizon_days=10, n_paths=200_000, seed=3)
+    paths = engine.simulate_paths(3500.0, 65.0, analyzer._iv_model(), (IV_FLOOR, IV_CAP))
+    mean, std = analyzer._iv_horizon_moments(65.0, np.array([10]))
+    assert paths['iv'].mean() == pytest.approx(mean[0], abs=4 * std[0] / np.sqrt(200_000))
+    assert paths['iv'].std() == pytest.approx(std[0], rel=0.01)
+    # Spot is a martingale under the lognormal walk
+    assert paths['spot'].mean() == pytest.approx(3500.0, rel=0.002)
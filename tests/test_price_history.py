@@ -0,0 +1,152 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+import price_history
+from data_collector import PRICE_HISTORY_BACKFILL_DAYS, ETHDataCollector
+from price_history import DAY_SECONDS, PriceHistoryStore
+from realized_vol import StreamingRealizedVariance
+
+DAY0 = 1_700_000_000 // DAY_SECONDS * DAY_SECONDS
+
+
+def days(*offsets):
+    return np.array([DAY0 + offset * DAY_SECONDS for offset in offsets], dtype=float)
+
+
+def test_tail_and_overlapping_merges():
+    store = PriceHistoryStore('ethereum')
+    assert store.merge(days(0, 1, 2), [100.0, 101.0, 102.0]) == 3
+    # Overlap: day 2 is refetched with a new value, days 3-4 are new
+    assert store.merge(days(2, 3, 4), [102.5, 103.0, 104.0]) == 2
+    np.testing.assert_array_equal(store.timestamps, days(0, 1, 2, 3, 4))
+    np.testing.assert_array_equal(store.prices, [100.0, 101.0, 102.5, 103.0, 104.0])
+    # Nothing new
+    assert store.merge(days(3, 4), [103.0, 104.0]) == 0
+
+
+def test_out_of_order_and_duplicate_timestamps():
+    store = PriceHistoryStore('ethereum')
+    assert store.merge(days(3, 1, 2, 1, 3), [13.0, 11.0, 12.0, 11.5, 13.5]) == 3
+    np.testing.assert_array_equal(store.timestamps, days(1, 2, 3))
+    np.testing.assert_array_equal(store.prices, [11.5, 12.0, 13.5])  # Last value of each bar wins
+
+    # Backfill before the stored range, with duplicates and a refetched stored bar
+    assert store.merge(days(0, 2, -1, 0), [10.0, 12.2, 9.0, 10.1]) == 2
+    np.testing.assert_array_equal(store.timestamps, days(-1, 0, 1, 2, 3))
+    np.testing.assert_array_equal(store.prices, [9.0, 10.1, 11.5, 12.2, 13.5])
+
+
+def test_bar_alignment_and_provisional_quote():
+    store = PriceHistoryStore('ethereum')
+    # Slightly off-boundary points count as closes; a mid-day point is the latest quote
+    store.merge(np.append(days(0, 1) + [30.0, -20.0], DAY0 + 1.5 * DAY_SECONDS), [100.0, 101.0, 101.7])
+    np.testing.assert_array_equal(store.timestamps, days(0, 1))
+    np.testing.assert_array_equal(store.closes(), [100.0, 101.0, 101.7])
+    # An older quote does not replace a newer one, a newer close retires it
+    store.merge([DAY0 + 1.2 * DAY_SECONDS], [99.0])
+    assert store.latest == (DAY0 + 1.5 * DAY_SECONDS, 101.7)
+    store.merge(days(2), [102.0])
+    assert store.latest is None
+    np.testing.assert_array_equal(store.closes(2), [101.0, 102.0])
+
+
+def test_invalid_points_and_max_points():
+    store = PriceHistoryStore('ethereum', max_points=3)
+    assert store.merge(days(0, 1, 2, 3, 4), [1.0, np.nan, 0.0, 4.0, 5.0]) == 3
+    np.testing.assert_array_equal(store.timestamps, days(0, 3, 4))
+    store.merge(days(5), [6.0])
+    np.testing.assert_array_equal(store.timestamps, days(3, 4, 5))
+
+
+def test_fetch_start_after_partial_history():
+    store = PriceHistoryStore('ethereum')
+    assert store.fetch_start() is None
+    store.merge(days(0, 1, 2, 5, 6), [1.0, 2.0, 3.0, 6.0, 7.0])  # Days 3-4 missing
+    assert store.fetch_start() == days(6)[0]
+    assert store.fetch_start(backfill_gaps=True) == days(2)[0]
+    store.merge(days(3, 4), [4.0, 5.0])
+    assert store.fetch_start(backfill_gaps=True) == days(6)[0]
+
+
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / 'nested' / 'ethereum.npz')
+    store = PriceHistoryStore('ethereum', path)
+    store.merge(np.append(days(0, 1, 2), DAY0 + 2.5 * DAY_SECONDS), [100.0, 101.0, 102.0, 102.4])
+    store.save()
+    assert os.listdir(os.path.dirname(path)) == ['ethereum.npz']
+
+    loaded = PriceHistoryStore('ethereum', path)
+    np.testing.assert_array_equal(loaded.timestamps, store.timestamps)
+    np.testing.assert_array_equal(loaded.prices, store.prices)
+    assert loaded.latest is None  # The provisional quote is not persisted
+
+
+def test_failed_save_keeps_previous_file(tmp_path, monkeypatch):
+    path = str(tmp_path / 'ethereum.npz')
+    store = PriceHistoryStore('ethereum', path)
+    store.merge(days(0, 1), [100.0, 101.0])
+    store.save()
+
+    store.merge(days(2), [102.0])
+
+    def broken_savez(f, **arrays):
+        f.write(b'partial')
+        raise OSError('disk full')
+
+    monkeypatch.setattr(price_history.np, 'savez', broken_savez)
+    with pytest.raises(OSError):
+        store.save()
+    monkeypatch.undo()
+
+    assert os.listdir(tmp_path) == ['ethereum.npz']
+
+    np.testing.assert_array_equal(PriceHistoryStore('ethereum', path).timestamps, days(0, 1))
+
+
+def test_unreadable_file_starts_empty(tmp_path):
+    path = tmp_path / 'ethereum.npz'
+    path.write_bytes(b'not an npz file')
+    assert len(PriceHistoryStore('ethereum', str(path))) == 0
+
+
+class ChartSession:
+    """CoinGecko daily chart: midnight closes for the requested days plus a current quote"""
+
+    def __init__(self):
+        self.requested_days = []
+
+    def get(self, url, params=None, timeout=None):
+        self.requested_days.append(params['days'])
+        now = time.time()
+        today = now // DAY_SECONDS * DAY_SECONDS
+        closes = [[(today - i * DAY_SECONDS) * 1000, 3000.0 + i] for i in range(params['days'], -1, -1)]
+        return _Response({'prices': closes + [[now * 1000, 2999.5]]})
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+def test_sync_price_history_fetches_only_missing_days():
+    session = ChartSession()
+    collector = ETHDataCollector(session=session, intraday_rv=StreamingRealizedVariance())
+    store = collector.histories['ethereum']
+
+    assert collector.sync_price_history('ethereum') == PRICE_HISTORY_BACKFILL_DAYS + 1
+    assert session.requested_days == [PRICE_HISTORY_BACKFILL_DAYS]
+    assert store.latest is not None
+
+    # Drop the last three closes: the next sync asks for just those days
+    store.timestamps, store.prices = store.timestamps[:-3], store.prices[:-3]
+    assert collector.sync_price_history('ethereum') == 3
+    assert session.requested_days[-1] == 4
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from pricing_engine import IV_SOLVER_MAX_ITER, black_scholes, black_scholes_price, implied_volatility
+
+
+@pytest.fixture(scope='module')
+def quotes():
+    rng = np.random.default_rng(3)
+    n = 20_000
+    spot = 3500.0
+    strike = spot * np.exp(rng.uniform(-0.6, 0.6, n))
+    time = rng.uniform(2, 365, n) / 365
+    vol = rng.uniform(0.2, 2.0, n)
+    rate = rng.uniform(0.0, 0.05, n)
+    is_call = rng.random(n) < 0.5
+    return spot, strike, time, vol, rate, is_call
+
+
+def test_round_trip_recovers_volatility(quotes):
+    spot, strike, time, vol, rate, is_call = quotes
+    price = black_scholes_price(spot, strike, time, vol, rate, is_call)
+    result = implied_volatility(price, spot, strike, time, rate, is_call)
+
+    # Quotes with no time value left cannot pin down a volatility
+    lower = np.where(is_call, np.maximum(spot - strike * np.exp(-rate * time), 0),
+                     np.maximum(strike * np.exp(-rate * time) - spot, 0))
+    identifiable = price - lower > 1e-6 * spot
+    assert identifiable.mean() > 0.95
+    assert result['converged'][identifiable].all()
+    assert result['iterations'] <= IV_SOLVER_MAX_ITER
+    np.testing.assert_allclose(result['iv'][identifiable], vol[identifiable], rtol=1e-6)
+
+
+def test_round_trip_reprices_quotes(quotes):
+    spot, strike, time, vol, rate, is_call = quotes
+    price = black_scholes_price(spot, strike, time, vol, rate, is_call)
+    iv = implied_volatility(price, spot, strike, time, rate, is_call)['iv']
+    ok = np.isfinite(iv)
+    np.testing.assert_allclose(black_scholes_price(spot, strike[ok], time[ok], iv[ok], rate[ok], is_call[ok]),
+                               price[ok], rtol=1e-7, atol=1e-8 * spot)
+
+
+def test_arbitrage_violations_are_flagged():
+    spot, strike, time = 3500.0, np.array([3000.0, 3000.0, 4000.0]), 30 / 365
+    prices = np.array([400.0, spot + 1, 0.0])  # below intrinsic, above spot, zero time value
+    result = implied_volatility(prices, spot, strike, time, is_call=True)
+    assert result['arbitrage_violation'].all()
+    assert np.isnan(result['iv']).all()
+
+
+def test_price_matches_greeks_call():
+    price = black_scholes_price(3500.0, 3600.0, 0.1, 0.7, 0.01, True)
+    greeks = black_scholes(3500.0, 3600.0, 0.1, 0.7, 0.01, True)
+    assert greeks['price'] == pytest.approx(price)
+    # Put-call parity
+    put = black_scholes_price(3500.0, 3600.0, 0.1, 0.7, 0.01, False)
+    assert price - put == pytest.approx(3500.0 - 3600.0 * np.exp(-0.01 * 0.1))
+
+
+def test_converged_quotes_are_independent_of_the_rest_of_the_batch(quotes):
+    spot, strike, time, vol, rate, is_call = quotes
+    price = black_scholes_price(spot, strike, time, vol, rate, is_call)
+    full = implied_volatility(price, spot, strike, time, rate, is_call)
+    subset = slice(0, 500)
+    alone = implied_volatility(price[subset], spot, strike[subset], time[subset], rate[subset], is_call[subset])
+    np.testing.assert_array_equal(alone['converged'], full['converged'][subset])
+    np.testing.assert_array_equal(alone['iv'], full['iv'][subset])
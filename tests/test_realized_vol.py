@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from realized_vol import (CRYPTO_PERIODS_PER_YEAR, DIRECT_WINDOW_MAX, StreamingRealizedVariance,
+                          realized_volatility, rolling_realized_volatility)
+
+
+@pytest.fixture(scope='module')
+def prices():
+    rng = np.random.default_rng(4)
+    return 3000 * np.exp(np.cumsum(rng.normal(0, 0.03, 600)))
+
+
+@pytest.mark.parametrize('demean', [True, False])
+def test_rolling_matches_brute_force(prices, demean):
+    windows = (1, 7, 30, DIRECT_WINDOW_MAX, DIRECT_WINDOW_MAX + 1, 200)
+    series = rolling_realized_volatility(prices, windows, demean=demean)
+    returns = np.diff(np.log(prices))
+    scale = 100 * np.sqrt(CRYPTO_PERIODS_PER_YEAR)
+    for window in windows:
+        expected = np.full(len(returns), np.nan)
+        for end in range(window - 1, len(returns)):
+            chunk = returns[end - window + 1:end + 1]
+            expected[end] = (np.std(chunk) if demean else np.sqrt(np.mean(chunk * chunk))) * scale
+        np.testing.assert_allclose(series[window], expected, rtol=1e-9, atol=1e-9)
+
+
+def test_flat_windows_are_exactly_zero(prices):
+    flat = np.concatenate((prices, np.full(250, prices[-1])))
+    latest = realized_volatility(flat, (1, 7, 30, 200))
+    assert latest == {1: 0.0, 7: 0.0, 30: 0.0, 200: 0.0}
+    assert (rolling_realized_volatility(prices, (1,))[1] == 0.0).all()
+
+
+def test_short_history_and_annualization(prices):
+    assert realized_volatility(prices[:10], (7, 30)) == {7: pytest.approx(realized_volatility(prices[:10], (7,))[7]),
+                                                         30: None}
+    crypto = realized_volatility(prices, (30,))[30]
+    equity = realized_volatility(prices, (30,), periods_per_year=252)[30]
+    assert crypto / equity == pytest.approx(np.sqrt(365 / 252))
+
+
+def random_bars(n, seed=0, start=1_700_000_000, bar_seconds=300):
+    rng = np.random.default_rng(seed)
+    closes = 3000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    opens = np.concatenate(([3000.0], closes[:-1])) * np.exp(rng.normal(0, 0.0005, n))
+    highs = np.maximum(opens, closes) * np.exp(np.abs(rng.normal(0, 0.001, n)))
+    lows = np.minimum(opens, closes) * np.exp(-np.abs(rng.normal(0, 0.001, n)))
+    times = start + bar_seconds * np.arange(n)
+    return opens, highs, lows, closes, times
+
+
+def brute_estimators(opens, highs, lows, closes, window, periods_per_year):
+    """Estimators over the last `window` bars that have a previous close"""
+    o, h, l, c = opens[1:][-window:], highs[1:][-window:], lows[1:][-window:], closes[1:][-window:]
+    prev = closes[:-1][-window:]
+    n = len(c)
+    hl, body = np.log(h / l), np.log(c / o)
+    overnight = np.log(o / prev)
+    rs = np.log(h / c) * np.log(h / o) + np.log(l / c) * np.log(l / o)
+    k = 0.34 / (1.34 + (n + 1) / (n - 1))
+    variances = {
+        'close_to_close': np.mean(np.log(c / prev) ** 2),
+        'parkinson': np.mean(hl * hl) / (4 * np.log(2)),
+        'garman_klass': np.mean(0.5 * hl * hl - (2 * np.log(2) - 1) * body * body),
+        'yang_zhang': np.var(overnight, ddof=1) + k * np.var(body, ddof=1) + (1 - k) * np.mean(rs)
+    }
+    return {name: np.sqrt(v * periods_per_year) * 100 for name, v in variances.items()}
+
+
+def test_streaming_estimators_match_brute_force():
+    windows = {'1h': 3600, '4h': 4 * 3600}
+    accumulator = StreamingRealizedVariance(windows=windows)
+    opens, highs, lows, closes, times = random_bars(500)
+    for i in range(len(closes)):
+        accumulator.add_bar(opens[i], highs[i], lows[i], closes[i], times[i])
+        if i in (5, 12, 47, 48, 49, 200, 499):  # Before and after the ring wraps and re-sums
+            for name, bars in zip(accumulator.window_names, accumulator.window_bars):
+                expected = brute_estimators(opens[:i + 1], highs[:i + 1], lows[:i + 1], closes[:i + 1], bars,
+                                            accumulator.periods_per_year)
+                got = accumulator.volatility(name)
+                for estimator, value in expected.items():
+                    assert got[estimator] == pytest.approx(value, rel=1e-9), (i, name, estimator)
+                assert accumulator.is_ready(name) == (i >= bars)
+
+
+def test_trades_are_aggregated_into_bars():
+    from_trades = StreamingRealizedVariance(windows={'1h': 3600})
+    from_bars = StreamingRealizedVariance(windows={'1h': 3600})
+    rng = np.random.default_rng(1)
+    price = 3000.0
+    for bar in range(30):
+        start = 1_700_000_100 + bar * 300  # Bar-aligned
+        bar_prices = price * np.exp(np.cumsum(rng.normal(0, 0.0005, 20)))
+        for j, p in enumerate(bar_prices):
+            from_trades.add_trade(p, start + j * 10)
+        from_bars.add_bar(bar_prices[0], bar_prices.max(), bar_prices.min(), bar_prices[-1], start)
+        price = bar_prices[-1]
+    from_trades.flush()
+    assert from_trades.n_bars == from_bars.n_bars == 29
+    assert from_trades.volatility('1h') == pytest.approx(from_bars.volatility('1h'))
+
+
+def test_old_bars_are_ignored():
+    accumulator = StreamingRealizedVariance(windows={'1h': 3600})
+    assert accumulator.add_bar(1, 1.1, 0.9, 1.05, 600)
+    assert not accumulator.add_bar(1, 1.1, 0.9, 1.05, 600)
+    assert not accumulator.add_bar(1, 1.1, 0.9, 1.05, 300)
@@ -0,0 +1,70 @@
+import threading
+
+from snapshot_poller import SnapshotPoller
+
+
+class StubCollector:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def collect_all_data(self):
+        return dict(self.snapshot)
+
+
+def test_latest_is_a_copy_of_the_published_snapshot():
+    poller = SnapshotPoller()
+    published = {'eth_price': 3500.0}
+    poller.publish(published)
+
+    published['eth_price'] = 1.0
+    read = poller.latest()
+    assert read == {'eth_price': 3500.0}
+
+    read['snapshot_age_seconds'] = 12.0
+    read['eth_price'] = 2.0
+    assert poller.latest() == {'eth_price': 3500.0}
+
+
+def test_latest_respects_max_age():
+    poller = SnapshotPoller()
+    assert poller.latest() is None
+    poller.publish({'eth_price': 3500.0})
+    poller._published_at -= 10
+    assert poller.latest(max_age=5) is None
+    assert poller.latest(max_age=None) == {'eth_price': 3500.0}
+
+
+def test_subscribe_is_idempotent_and_notify_can_be_skipped():
+    poller = SnapshotPoller()
+    seen = []
+    unsubscribe = poller.subscribe(seen.append)
+    poller.subscribe(seen.append)
+
+    poller.publish({'eth_price': 1.0})
+    assert seen == [{'eth_price': 1.0}]
+    poller.publish({'eth_price': 2.0}, notify=False)
+    assert seen == [{'eth_price': 1.0}]
+    assert poller.latest() == {'eth_price': 2.0}
+
+    unsubscribe()
+    poller.publish({'eth_price': 3.0})
+    assert len(seen) == 1
+
+
+def test_poll_once_persists_and_notifies_on_the_polling_thread():
+    persisted, notified = [], []
+    poller = SnapshotPoller(collector_factory=lambda: StubCollector({'eth_price': 3500.0}),
+                            persist=persisted.append)
+    poller.subscribe(lambda snapshot: notified.append(threading.current_thread()))
+    poller.poll_once()
+    assert persisted == [{'eth_price': 3500.0}]
+    assert notified == [threading.current_thread()]
+    assert poller.stats()['polls'] == 1
+
+
+def test_routes_ignore_snapshots_when_the_poller_is_not_running():
+    from src.routes.eth_analysis import polled_market_data, snapshot_poller
+
+    snapshot_poller.publish({'eth_price': 3500.0}, notify=False)
+    assert not snapshot_poller.running
+    assert polled_market_data() is None
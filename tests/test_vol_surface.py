@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from pricing_engine import DAYS_PER_YEAR
+from vol_surface import SurfaceCalibrator, SVISurface, svi_total_variance
+
+FORWARD = 3500.0
+
+# Raw-SVI (a, b, rho, m, sigma) per expiry in days, with total variance increasing in time
+TRUE_SLICES = {
+    7: np.array([0.004, 0.06, -0.35, 0.02, 0.08]),
+    30: np.array([0.018, 0.11, -0.30, 0.03, 0.12]),
+    90: np.array([0.055, 0.17, -0.25, 0.04, 0.18])
+}
+
+
+def synthetic_chain(slices=TRUE_SLICES, noise=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    strikes, dtes, ivs = [], [], []
+    for dte, params in slices.items():
+        k = np.linspace(-0.5, 0.5, 41)
+        t = dte / DAYS_PER_YEAR
+        iv = np.sqrt(svi_total_variance(params, k) / t) * 100
+        strikes.append(FORWARD * np.exp(k))
+        dtes.append(np.full(len(k), float(dte)))
+        ivs.append(iv + noise * rng.standard_normal(len(k)))
+    strike = np.concatenate(strikes)
+    return {
+        'strike': strike,
+        'dte': np.concatenate(dtes),
+        'iv': np.concatenate(ivs),
+        'forward': np.full(len(strike), FORWARD),
+        'is_call': strike >= FORWARD,
+        'converged': np.ones(len(strike), dtype=bool)
+    }
+
+
+def test_fit_recovers_slices():
+    surface = SurfaceCalibrator().calibrate(synthetic_chain())
+    assert surface is not None
+    assert max(surface.fit_errors) < 0.05  # vol points
+
+    k = np.linspace(-0.45, 0.45, 19)
+    for dte, params in TRUE_SLICES.items():
+        expected = np.sqrt(svi_total_variance(params, k) / (dte / DAYS_PER_YEAR)) * 100
+        np.testing.assert_allclose(surface.implied_vol(k, dte), expected, atol=0.05)
+
+
+def test_noisy_fit_error_matches_noise():
+    surface = SurfaceCalibrator().calibrate(synthetic_chain(noise=0.5, seed=4))
+    assert all(0.3 < error < 0.7 for error in surface.fit_errors)
+
+
+def test_warm_start_reuses_previous_fit():
+    calibrator = SurfaceCalibrator()
+    cold = calibrator.calibrate(synthetic_chain())
+    cold_iterations = calibrator.last_iterations
+    warm = calibrator.calibrate(synthetic_chain())
+    assert all(warm.warm_started) and not any(cold.warm_started)
+    assert calibrator.last_iterations <= cold_iterations
+    assert max(warm.fit_errors) < 0.05
+
+
+def test_total_variance_never_decreases_with_expiry():
+    # The 30-day slice dips below the 7-day slice in the wings, a calendar arbitrage in the raw fits
+    crossing = SVISurface([7 / DAYS_PER_YEAR, 30 / DAYS_PER_YEAR, 90 / DAYS_PER_YEAR],
+                          [np.array([0.004, 0.30, -0.2, 0.0, 0.05]),
+                           np.array([0.015, 0.05, -0.2, 0.0, 0.10]),
+                           TRUE_SLICES[90]], FORWARD)
+    k = np.linspace(-1.5, 1.5, 61)
+    t = np.linspace(1, 180, 180) / DAYS_PER_YEAR
+    w = crossing.total_variance(k[None, :], t[:, None])
+    assert (np.diff(w, axis=0) >= -1e-12).all()
+    assert (w >= 0).all()
+
+
+def test_implied_vol_is_flat_outside_fitted_expiries():
+    surface = SVISurface([30 / DAYS_PER_YEAR, 90 / DAYS_PER_YEAR], [TRUE_SLICES[30], TRUE_SLICES[90]], FORWARD)
+    k = np.array([-0.2, 0.0, 0.2])
+    np.testing.assert_allclose(surface.implied_vol(k, 10), surface.implied_vol(k, 30))
+    np.testing.assert_allclose(surface.implied_vol(k, 365), surface.implied_vol(k, 90))
+
+
+def test_grid_lookups_match_the_surface():
+    surface = SurfaceCalibrator().calibrate(synthetic_chain())
+    rng = np.random.default_rng(1)
+    k = rng.uniform(-1.0, 1.0, 500)
+    dte = rng.integers(1, 200, 500).astype(float)
+    np.testing.assert_allclose(surface.grid.implied_vol(k, dte), surface.implied_vol(k, dte), atol=0.05)
+
+
+@pytest.mark.parametrize('option_type', ['call', 'put'])
+def test_grid_delta_strikes_have_the_requested_delta(option_type):
+    from pricing_engine import black_scholes
+
+    surface = SurfaceCalibrator().calibrate(synthetic_chain())
+    dtes = np.array([7.0, 30.0, 60.0, 90.0])
+    for delta in (0.10, 0.25, 0.50):
+        k = surface.grid.log_moneyness_for_delta(delta, dtes, option_type)
+        iv = surface.implied_vol(k, dtes) / 100
+        greeks = black_scholes(1.0, np.exp(k), dtes / DAYS_PER_YEAR, iv, 0.0, option_type == 'call')
+        np.testing.assert_allclose(np.abs(greeks['delta']), delta, atol=0.005)
@@ -0,0 +1,318 @@
+"""
+ETH Options Volatility Surface
+Raw-SVI slice calibration with calendar-arbitrage-free interpolation
+"""
+
+import threading
+import time
+import numpy as np
+from typing import Dict, List, Optional
+
+from pricing_engine import DAYS_PER_YEAR, black_scholes
+
+# Minimum converged out-of-the-money quotes needed to fit an expiry slice
+MIN_SLICE_QUOTES = 5
+
+# Cap on Levenberg-Marquardt iterations per calibration
+SVI_MAX_ITERATIONS = 100
+
+# Warm starts are reused only for expiries this close (in days) to a previous slice
+WARM_START_MAX_SHIFT_DAYS = 3.0
+
+# Axes of the dense lookup grid built for each fitted surface
+GRID_LOG_MONEYNESS = np.linspace(-1.5, 1.5, 301)
+GRID_MIN_MAX_DTE = 365
+GRID_DELTAS = np.linspace(0.01, 0.99, 99)
+
+# Bounds on raw-SVI (a, b, rho, m, sigma); only m and sigma are optimized directly
+SVI_LOWER_BOUNDS = np.array([-1.0, 0.0, -0.999, -2.0, 1e-3])
+SVI_UPPER_BOUNDS = np.array([1.0, 5.0, 0.999, 2.0, 5.0])
+
+
+def svi_total_variance(params, k) -> np.ndarray:
+    """Raw SVI total variance w(k) = a + b * (rho * (k - m) + sqrt((k - m)^2 + sigma^2))"""
+    a, b, rho, m, sigma = params
+    shifted = np.asarray(k, dtype=float) - m
+    return a + b * (rho * shifted + np.sqrt(shifted * shifted + sigma * sigma))
+
+
+class SVISurface:
+    """Implied volatility surface built from raw-SVI slices, one per expiry
+
+    Slice variances are evaluated with a running maximum across expiries, so
+    total variance never decreases with time to expiry (no calendar
+    arbitrage). Between fitted expiries total variance is interpolated
+    linearly in time at fixed log-moneyness, which preserves that ordering,
+    and outside them implied vol is held flat.
+    """
+
+    def __init__(self, times: List[float], params: List[np.ndarray], forward: float,
+                 fit_errors: Optional[List[float]] = None, warm_started: Optional[List[bool]] = None,
+                 fit_time_ms: Optional[float] = None):
+        order = np.argsort(times)
+        self.times = np.asarray(times, dtype=float)[order]
+        self.params = [np.asarray(params[i], dtype=float) for i in order]
+        self.forward = forward
+        self.fit_errors = [fit_errors[i] for i in order] if fit_errors else [None] * len(order)
+        self.warm_started = [warm_started[i] for i in order] if warm_started else [False] * len(order)
+        self.fit_time_ms = fit_time_ms
+        self._grid = None
+
+    @property
+    def grid(self) -> 'SurfaceGrid':
+        """Dense lookup grid of this surface, built on first use and then reused"""
+        if self._grid is None:
+            self._grid = SurfaceGrid(self)
+        return self._grid
+
+    def total_variance(self, k, t) -> np.ndarray:
+        """Total implied variance at log-moneyness k = log(K/F) and time t (years), broadcast"""
+        k, t = np.broadcast_arrays(np.asarray(k, dtype=float), np.asarray(t, dtype=float))
+
+        # Slice variances on the requested moneyness, made non-decreasing across expiries
+        slice_variances = np.maximum.accumulate(
+            np.stack([np.maximum(svi_total_variance(p, k), 0.0) for p in self.params]), axis=0)
+
+        idx = np.clip(np.searchsorted(self.times, t), 1, len(self.times) - 1) if len(self.times) > 1 \
+            else np.zeros(t.shape, dtype=int)
+        lower = np.maximum(idx - 1, 0) if len(self.times) > 1 else idx
+        t0, t1 = self.times[lower], self.times[idx]
+        w0 = np.take_along_axis(slice_variances, lower[None, ...], axis=0)[0]
+        w1 = np.take_along_axis(slice_variances, idx[None, ...], axis=0)[0]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weight = np.where(t1 > t0, (t - t0) / (t1 - t0), 0.0)
+        interpolated = w0 + weight * (w1 - w0)
+
+        # Flat implied vol before the first and after the last expiry
+        before = t < self.times[0]
+        after = t > self.times[-1]
+        interpolated = np.where(before, slice_variances[0] * t / self.times[0], interpolated)
+        return np.where(after, slice_variances[-1] * t / self.times[-1], interpolated)
+
+    def implied_vol(self, k, dte) -> np.ndarray:
+        """Implied volatility in % at log-moneyness k and days to expiry dte"""
+        t = np.asarray(dte, dtype=float) / DAYS_PER_YEAR
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.sqrt(self.total_variance(k, t) / t) * 100
+
+    def to_dict(self) -> Dict:
+        """Slice parameters and fit diagnostics for API responses"""
+        return {
+            'model': 'raw_svi',
+            'forward': self.forward,
+            'fit_time_ms': self.fit_time_ms,
+            'slices': [
+                {
+                    'dte': float(t * DAYS_PER_YEAR),
+                    'params': dict(zip(('a', 'b', 'rho', 'm', 'sigma'), p.tolist())),
+                    'rmse_iv': err,
+                    'warm_started': warm
+                }
+                for t, p, err, warm in zip(self.times, self.params, self.fit_errors, self.warm_started)
+            ]
+        }
+
+
+def _uniform_bilinear(table: np.ndarray, row_axis: np.ndarray, col_axis: np.ndarray, rows, cols) -> np.ndarray:
+    """Bilinear interpolation on a table over uniform axes, clamped at the edges"""
+    rows, cols = np.broadcast_arrays(np.asarray(rows, dtype=float), np.asarray(cols, dtype=float))
+    r = np.clip((rows - row_axis[0]) / (row_axis[1] - row_axis[0]), 0, len(row_axis) - 1)
+    c = np.clip((cols - col_axis[0]) / (col_axis[1] - col_axis[0]), 0, len(col_axis) - 1)
+    r0 = np.minimum(r.astype(np.int64), len(row_axis) - 2)
+    c0 = np.minimum(c.astype(np.int64), len(col_axis) - 2)
+    fr, fc = r - r0, c - c0
+    return ((1 - fr) * (1 - fc) * table[r0, c0] + (1 - fr) * fc * table[r0, c0 + 1]
+            + fr * (1 - fc) * table[r0 + 1, c0] + fr * fc * table[r0 + 1, c0 + 1])
+
+
+class SurfaceGrid:
+    """Dense IV grid over (days to expiry, log-moneyness) with a precomputed delta-to-strike map
+
+    Built once per fitted surface, so implied vols and 25/10-delta strikes for
+    any expiry become O(1) bilinear lookups instead of model evaluations and
+    root solves. Lookups outside the grid are clamped to its edges.
+    """
+
+    def __init__(self, surface: SVISurface):
+        self.log_moneyness = GRID_LOG_MONEYNESS
+        max_dte = max(GRID_MIN_MAX_DTE, int(np.ceil(surface.times[-1] * DAYS_PER_YEAR)))
+        self.dte = np.arange(1, max_dte + 1, dtype=float)
+        self.deltas = GRID_DELTAS
+        self.iv = surface.implied_vol(self.log_moneyness[None, :], self.dte[:, None])
+
+        # Forward call deltas along each row, forced non-increasing in strike so they can be inverted
+        call_deltas = black_scholes(1.0, np.exp(self.log_moneyness)[None, :], self.dte[:, None] / DAYS_PER_YEAR,
+                                    self.iv / 100, 0.0, True)['delta']
+        call_deltas = np.minimum.accumulate(call_deltas, axis=1)
+
+        # Log-moneyness at each absolute delta level, per expiry row
+        self.call_log_moneyness = np.empty((len(self.dte), len(self.deltas)))
+        self.put_log_moneyness = np.empty((len(self.dte), len(self.deltas)))
+        for i, row in enumerate(call_deltas):
+            self.call_log_moneyness[i] = np.interp(self.deltas, row[::-1], self.log_moneyness[::-1])
+            self.put_log_moneyness[i] = np.interp(self.deltas, 1 - row, self.log_moneyness)
+
+    def implied_vol(self, k, dte) -> np.ndarray:
+        """Implied volatility in % at log-moneyness k and days to expiry dte"""
+        return _uniform_bilinear(self.iv, self.dte, self.log_moneyness, dte, k)
+
+    def log_moneyness_for_delta(self, delta, dte, option_type: str = 'call') -> np.ndarray:
+        """Log-moneyness of the strike with the given absolute forward delta (0.25 for 25-delta)"""
+        table = self.call_log_moneyness if option_type == 'call' else self.put_log_moneyness
+        return _uniform_bilinear(table, self.dte, self.deltas, dte, delta)
+
+    def skew_term_structure(self, dtes, deltas=(0.25, 0.10)) -> Dict[str, np.ndarray]:
+        """Risk reversals (put minus call IV) and butterflies (wings minus ATM IV) per expiry"""
+        dtes = np.asarray(dtes, dtype=float)
+        atm = self.implied_vol(0.0, dtes)
+        results = {'dte': dtes, 'atm_iv': atm}
+        for delta in deltas:
+            put_iv = self.implied_vol(self.log_moneyness_for_delta(delta, dtes, 'put'), dtes)
+            call_iv = self.implied_vol(self.log_moneyness_for_delta(delta, dtes, 'call'), dtes)
+            label = f'{delta * 100:.0f}d'
+            results[f'rr_{label}'] = put_iv - call_iv
+            results[f'bf_{label}'] = 0.5 * (put_iv + call_iv) - atm
+        return results
+
+
+class SurfaceCalibrator:
+    """Fits an SVISurface to each new chain snapshot, warm-starting from the previous fit"""
+
+    def __init__(self):
+        self.previous: Optional[SVISurface] = None
+        self.last_iterations = 0  # Levenberg-Marquardt iterations of the latest fit
+        self._lock = threading.Lock()
+
+    def calibrate(self, chain_ivs: Dict) -> Optional[SVISurface]:
+        """Fit raw-SVI slices to solved chain IVs (see ETHOptionsAnalyzer.calculate_chain_ivs)
+
+        Only converged out-of-the-money quotes are used. Returns None when no
+        expiry has at least MIN_SLICE_QUOTES of them.
+        """
+        start = time.perf_counter()
+        otm = np.where(chain_ivs['is_call'], chain_ivs['strike'] >= chain_ivs['forward'],
+                       chain_ivs['strike'] < chain_ivs['forward'])
+        usable = chain_ivs['converged'] & otm & (chain_ivs['dte'] > 0)
+
+        slices = []
+        for dte in np.unique(chain_ivs['dte'][usable]):
+            mask = usable & (chain_ivs['dte'] == dte)
+            if mask.sum() >= MIN_SLICE_QUOTES:
+                forward = float(np.median(chain_ivs['forward'][mask]))
+                slices.append((dte, forward, np.log(chain_ivs['strike'][mask] / forward), chain_ivs['iv'][mask]))
+        if not slices:
+            return None
+
+        # Pad slices into (expiries x quotes) arrays so every slice is fitted in the same vectorized pass
+        n_quotes = max(len(k) for _, _, k, _ in slices)
+        times = np.array([dte for dte, _, _, _ in slices]) / DAYS_PER_YEAR
+        k = np.zeros((len(slices), n_quotes))
+        ivs = np.zeros((len(slices), n_quotes))
+        quoted = np.zeros((len(slices), n_quotes), dtype=bool)
+        for i, (_, _, slice_k, slice_ivs) in enumerate(slices):
+            k[i, :len(slice_k)] = slice_k
+            ivs[i, :len(slice_k)] = slice_ivs
+            quoted[i, :len(slice_k)] = True
+        w = np.where(quoted, (ivs / 100) ** 2 * times[:, None], 0.0)
+
+        with self._lock:
+            previous = self.previous
+        warm = [self._warm_start(previous, dte) for dte, _, _, _ in slices]
+        initial = np.array([x if x is not None else self._cold_start(k[i][quoted[i]], w[i][quoted[i]])
+                            for i, x in enumerate(warm)])
+
+        params = self._fit_slices(k, w, quoted, initial)
+
+        fitted_iv = np.sqrt(np.maximum(np.stack([svi_total_variance(p, row) for p, row in zip(params, k)]), 0.0)
+                            / times[:, None]) * 100
+        errors = [float(np.sqrt(np.mean((fitted_iv[i] - ivs[i])[quoted[i]] ** 2))) for i in range(len(slices))]
+
+        surface = SVISurface(list(times), list(params), float(np.median([f for _, f, _, _ in slices])), errors,
+                             [x is not None for x in warm], (time.perf_counter() - start) * 1000)
+        with self._lock:
+            self.previous = surface
+        return surface
+
+    def _fit_slices(self, k: np.ndarray, w: np.ndarray, quoted: np.ndarray, initial: np.ndarray) -> np.ndarray:
+        """Quasi-explicit raw-SVI fit of all slices at once
+
+        For fixed (m, sigma) a slice is linear in (a, b * rho * sigma, b * sigma),
+        so those are solved by batched linear least squares and only (m, sigma)
+        per slice are optimized, by a vectorized Levenberg-Marquardt loop.
+        """
+        counts = quoted.sum(axis=1)
+        scale = np.maximum(w.sum(axis=1) / counts, 1e-8)
+        lower, upper = SVI_LOWER_BOUNDS[3:], SVI_UPPER_BOUNDS[3:]
+
+        def linear_params(x):
+            y = (k - x[:, :1]) / x[:, 1:]
+            z = np.sqrt(y * y + 1)
+            design = np.stack([np.ones_like(y), y, z], axis=1) * quoted[:, None, :]
+            normal = design @ design.transpose(0, 2, 1)
+            # Ridge relative to the matrix scale keeps near-collinear designs (extreme sigma) solvable
+            normal += 1e-10 * np.trace(normal, axis1=1, axis2=2)[:, None, None] * np.eye(3)
+            a, d, c = np.linalg.solve(normal, (design @ w[:, :, None]))[..., 0].T
+            # Keep b >= 0 and |rho| < 1, then refit the level
+            c = np.maximum(c, 0.0)
+            d = np.clip(d, -0.999 * c, 0.999 * c)
+            a = ((w - d[:, None] * y - c[:, None] * z) * quoted).sum(axis=1) / counts
+            return a, d, c, y, z
+
+        def residuals(x):
+            a, d, c, y, z = linear_params(x)
+            return (a[:, None] + d[:, None] * y + c[:, None] * z - w) / scale[:, None] * quoted
+
+        x = np.clip(initial[:, 3:], lower + 1e-9, upper - 1e-9)
+        damping = np.full(len(x), 1e-3)
+        r = residuals(x)
+        cost = (r * r).sum(axis=1)
+        active = np.ones(len(x), dtype=bool)
+
+        for self.last_iterations in range(1, SVI_MAX_ITERATIONS + 1):
+            # Forward-difference Jacobian, one column per parameter
+            h = 1e-7 * (1 + np.abs(x))
+            jacobian = np.stack([(residuals(x + h * e) - r) / h[:, j:j + 1]
+                                 for j, e in enumerate(np.eye(2))], axis=2)
+            jtj = jacobian.transpose(0, 2, 1) @ jacobian
+            gradient = (jacobian.transpose(0, 2, 1) @ r[:, :, None])[..., 0]
+            damped = jtj + damping[:, None, None] * (jtj * np.eye(2) + 1e-12 * np.eye(2))
+            step = np.linalg.solve(damped, -gradient[:, :, None])[..., 0]
+
+            candidate = np.clip(x + step, lower, upper)
+            r_candidate = residuals(candidate)
+            cost_candidate = (r_candidate * r_candidate).sum(axis=1)
+            improved = active & (cost_candidate < cost)
+
+            converged = improved & ((cost - cost_candidate <= 1e-6 * cost + 1e-20)
+                                    | (np.abs(candidate - x).max(axis=1) <= 1e-8))
+            x = np.where(improved[:, None], candidate, x)
+            r = np.where(improved[:, None], r_candidate, r)
+            cost = np.where(improved, cost_candidate, cost)
+            damping = np.where(improved, damping * 0.3, damping * 10)
+            active &= ~converged & (damping < 1e10)
+            if not active.any():
+                break
+
+        a, d, c, _, _ = linear_params(x)
+        m, sigma = x[:, 0], x[:, 1]
+        rho = np.where(c > 0, d / np.where(c > 0, c, 1.0), 0.0)
+        return np.column_stack([a, c / sigma, rho, m, sigma])
+
+    def _cold_start(self, k: np.ndarray, w: np.ndarray) -> np.ndarray:
+        """Heuristic raw-SVI starting point for a slice with no previous fit"""
+        order = np.argsort(k)
+        k, w = k[order], w[order]
+        atm_variance = float(np.interp(0.0, k, w)) if k[0] <= 0 <= k[-1] else float(np.min(w))
+        wing_slope = (w.max() - w.min()) / max(k[-1] - k[0], 1e-6)
+        return np.array([0.5 * atm_variance, max(wing_slope, 1e-3), -0.3, 0.0, 0.1])
+
+    def _warm_start(self, previous: Optional[SVISurface], dte: float) -> Optional[np.ndarray]:
+        """Parameters of the previous surface's slice nearest this expiry, if close enough"""
+        if previous is None:
+            return None
+        previous_dtes = previous.times * DAYS_PER_YEAR
+        nearest = int(np.argmin(np.abs(previous_dtes - dte)))
+        if abs(previous_dtes[nearest] - dte) > WARM_START_MAX_SHIFT_DAYS:
+            return None
+        return previous.params[nearest].copy()